@@ -5,6 +5,8 @@ Proyecto de Procesos Unitarios — 5to Semestre
 Visualización y análisis del sistema de transporte de agua
 desde un río, cruzando una montaña, hasta una planta industrial.
 """
+import json
+import os
 import sys
 from pathlib import Path
 
@@ -14,22 +16,27 @@ sys.path.insert(0, str(Path(__file__).parent))
 import streamlit as st
 import pandas as pd
 import numpy as np
-import streamlit.components.v1 as components
 
 from core.hidraulica import (
     calcular_sistema_completo,
     area_seccion, velocidad, carga_cinetica,
     reynolds, f_colebrook, f_haaland, kw_a_hp,
 )
-from core.tramos import obtener_definicion_tramos, obtener_elevaciones_acumuladas
-from core.datos import extraer_datos_completos
+from core.tramos import (
+    obtener_definicion_tramos, obtener_elevaciones_acumuladas, huella_tramos,
+)
+from core.datos import extraer_datos_completos, firma_csv
 from visualizaciones.mapa_piezometrico import (
     crear_mapa_piezometrico,
     crear_desglose_perdidas,
     crear_grafico_potencia,
     crear_perfil_terreno_con_tramos,
+    crear_curvas_sistema,
+    estadisticas_cache_figuras,
 )
-from visualizaciones.modelo_3d import generar_modelo_tramo
+from visualizaciones.modelo_3d import componente_modelo_3d, componente_modelo_red
+from visualizaciones.recursos import aviso_recursos_cdn, css_fuente_inter
+from core.perfilado import activar_traza, finalizar_traza, etapa
 
 
 # ====================================
@@ -42,6 +49,27 @@ st.set_page_config(
     initial_sidebar_state="expanded",
 )
 
+# ====================================
+# DIAGNÓSTICO DE RENDIMIENTO (opt-in)
+# ====================================
+# Se activa con ?diagnostico=1 en la URL o HIDRAULICA_DIAGNOSTICO=1 en el
+# entorno. Sin activarlo, `etapa(...)` no mide nada.
+DIAGNOSTICO = (
+    st.query_params.get("diagnostico") == "1"
+    or os.environ.get("HIDRAULICA_DIAGNOSTICO") == "1"
+)
+# Con ?diagnostico=1 se miden los tiempos de esta sesión; la memoria
+# (tracemalloc, global al proceso) solo con HIDRAULICA_DIAGNOSTICO_MEMORIA=1.
+MEDIR_MEMORIA = os.environ.get("HIDRAULICA_DIAGNOSTICO_MEMORIA") == "1"
+# Las pestañas (donde ocurren los st.rerun()) cierran la traza en un
+# `finally`; si el rerun anterior se cortó antes de llegar a ellas, su
+# traza sigue abierta y se cierra aquí (finalizar_traza es idempotente).
+if "traza_rerun" in st.session_state:
+    finalizar_traza(st.session_state.pop("traza_rerun"))
+traza_rerun = activar_traza("rerun", medir_memoria=MEDIR_MEMORIA) if DIAGNOSTICO else None
+if traza_rerun is not None:
+    st.session_state.traza_rerun = traza_rerun
+
 # CSS global para animaciones de transición
 st.markdown("""
 <style>
@@ -49,11 +77,12 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# Fuente Inter: copia local en static/vendor si existe (ver visualizaciones/recursos.py)
+st.markdown(f"<style>{css_fuente_inter()}</style>", unsafe_allow_html=True)
+
 # CSS personalizado para Tema Dark Engineering (Versión Optimizada)
 st.markdown("""
 <style>
-    @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700;800&display=swap');
-    
     /* ======================== ANIMACIONES KEYFRAMES ======================== */
     @keyframes fadeInUp {
         from {
@@ -622,14 +651,30 @@ with st.sidebar:
 
     # 3. Visor 3D
     with st.expander("🧊 Configuración 3D", expanded=False):
+        red_3d = st.toggle(
+            "Conducción completa",
+            value=False,
+            help="Muestra los 8 tramos como una sola tubería continua."
+        )
         tramo_3d = st.selectbox(
             "Tramo a visualizar",
             options=list(range(1, 9)),
             index=0,
             format_func=lambda x: f"Tramo {x}",
+            disabled=red_3d,
             help="Selecciona el tramo para inspeccionar en detalle."
         )
 
+    # 4. Rendimiento
+    with st.expander("⚡ Rendimiento", expanded=False):
+        st.toggle(
+            "Renderizado diferido de pestañas",
+            value=True,
+            key="render_diferido",
+            help="Solo se calcula la pestaña visible. Desactívalo para usar "
+                 "pestañas clásicas, que construyen todo en cada cambio.",
+        )
+
     # --- Mini Resumen ---
     st.markdown("---")
     st.markdown("<p class='dev-label' style='margin-bottom: 0.5rem;'>Estado del Flujo (Tramo 1)</p>", unsafe_allow_html=True)
@@ -665,16 +710,25 @@ with st.sidebar:
 # CÁLCULOS CENTRALIZADOS
 # ====================================
 @st.cache_data
-def calcular(Q, D, rho, mu, epsilon):
+def calcular(Q, D, rho, mu, epsilon, huella):
+    # `huella` identifica la definición de tramos: si cambia, se invalida la caché
     return calcular_sistema_completo(Q=Q, D=D, rho=rho, mu=mu, epsilon=epsilon)
 
-resultados = calcular(
-    st.session_state.Q,
-    st.session_state.D,
-    st.session_state.rho,
-    st.session_state.mu,
-    st.session_state.epsilon
-)
+@st.cache_resource(max_entries=1)
+def cargar_datos_csv(firma):
+    # Recurso compartido por todas las sesiones (solo lectura): `firma` es
+    # (mtime, tamaño) del CSV, así que solo se recarga si el archivo cambia
+    return extraer_datos_completos()
+
+with etapa("calcular"):
+    resultados = calcular(
+        st.session_state.Q,
+        st.session_state.D,
+        st.session_state.rho,
+        st.session_state.mu,
+        st.session_state.epsilon,
+        huella_tramos(),
+    )
 
 # Valores derivados globales
 A = area_seccion(st.session_state.D)
@@ -726,23 +780,17 @@ with cols[3]:
 st.markdown("<br>", unsafe_allow_html=True)
 
 # ====================================
-# TABS PRINCIPALES
+# PESTAÑAS PRINCIPALES
 # ====================================
-tab_home, tab_map, tab_terrain, tab_loss, tab_3d, tab_data, tab_docs = st.tabs([
-    "🏠 Inicio",
-    "📈 Mapa Piezométrico",
-    "🏔️ Perfil Topográfico",
-    "📉 Análisis de Pérdidas",
-    "🧊 Modelo 3D",
-    "📊 Datos Detallados",
-    "📑 Documentación"
-])
+# Cada pestaña es una función; el despacho al final del script decide si
+# se ejecutan todas (st.tabs) o solo la seleccionada (modo diferido).
+definiciones = obtener_definicion_tramos()
 
 
 # ==============================
 # TAB HOME: Resumen
 # ==============================
-with tab_home:
+def pestana_inicio():
     col_h1, col_h2 = st.columns([1, 1])
     with col_h1:
         st.markdown("### 📋 Resumen del Proyecto")
@@ -788,7 +836,7 @@ with tab_home:
 # ==============================
 # TAB 1: MAPA PIEZOMÉTRICO
 # ==============================
-with tab_map:
+def pestana_mapa():
     st.markdown("### Líneas de Energía y Gradiente Hidráulico")
     st.caption("Visualización de las presiones a lo largo de todo el recorrido. La línea **cian (EGL)** representa la energía total y la **amarilla (HGL)** el gradiente hidráulico.")
     
@@ -797,19 +845,23 @@ with tab_map:
         "Si la línea de gradiente hidráulico (HGL) cruza por debajo de la tubería, existe riesgo de **presión negativa y cavitación**."
     )
 
-    fig_piezo = crear_mapa_piezometrico(resultados, st.session_state.Q, st.session_state.D)
-    st.plotly_chart(fig_piezo, use_container_width=True)
+    with etapa("figura: mapa piezométrico"):
+        fig_piezo = crear_mapa_piezometrico(resultados, st.session_state.Q, st.session_state.D)
+    with etapa("plotly_chart: mapa piezométrico"):
+        st.plotly_chart(fig_piezo, use_container_width=True)
 
 
 # ==============================
 # TAB 2: PERFIL DEL TERRENO
 # ==============================
-with tab_terrain:
+def pestana_terreno():
     st.markdown("### Perfil Topográfico")
     st.caption("Elevación del terreno y segmentación por tramos. Colores indican la función del tramo (Bombeo, Gravedad, Plano).")
     
-    fig_terreno = crear_perfil_terreno_con_tramos(resultados)
-    st.plotly_chart(fig_terreno, use_container_width=True)
+    with etapa("figura: perfil del terreno"):
+        fig_terreno = crear_perfil_terreno_con_tramos(resultados)
+    with etapa("plotly_chart: perfil del terreno"):
+        st.plotly_chart(fig_terreno, use_container_width=True)
     
     # Tabla resumen de tramos
     st.subheader("Resumen de Tramos")
@@ -844,7 +896,6 @@ with tab_terrain:
     </style>
     """, unsafe_allow_html=True)
     
-    definiciones = obtener_definicion_tramos()
     tabla_tramos = []
     for i in range(1, 9):
         d = definiciones[i]
@@ -879,19 +930,42 @@ with tab_terrain:
 # ==============================
 # TAB 3: ANÁLISIS DE PÉRDIDAS
 # ==============================
-with tab_loss:
+def pestana_perdidas():
     st.markdown("### Análisis de Eficiencia y Pérdidas")
     
     col_left, col_right = st.columns(2)
     with col_left:
         st.subheader("Desglose de Pérdidas")
-        fig_perdidas = crear_desglose_perdidas(resultados)
-        st.plotly_chart(fig_perdidas, use_container_width=True)
+        with etapa("figura: desglose de pérdidas"):
+            fig_perdidas = crear_desglose_perdidas(resultados)
+        with etapa("plotly_chart: desglose de pérdidas"):
+            st.plotly_chart(fig_perdidas, use_container_width=True)
     
     with col_right:
         st.subheader("Consumo de Potencia")
-        fig_potencia = crear_grafico_potencia(resultados)
-        st.plotly_chart(fig_potencia, use_container_width=True)
+        with etapa("figura: potencia"):
+            fig_potencia = crear_grafico_potencia(resultados)
+        with etapa("plotly_chart: potencia"):
+            st.plotly_chart(fig_potencia, use_container_width=True)
+    
+    st.markdown("---")
+    
+    # Curvas del sistema y punto de operación de las bombas de diseño
+    st.subheader("Curvas del Sistema y Punto de Operación")
+    with etapa("figura: curvas del sistema"):
+        fig_curvas = crear_curvas_sistema(
+            st.session_state.Q,
+            st.session_state.D,
+            st.session_state.rho,
+            st.session_state.mu,
+            st.session_state.epsilon,
+        )
+    with etapa("plotly_chart: curvas del sistema"):
+        st.plotly_chart(fig_curvas, use_container_width=True)
+    st.caption(
+        "Bombas seleccionadas para 25 L/s en DN150: al cambiar el diámetro, "
+        "la rugosidad o el fluido, el punto muestra el caudal que realmente entregan."
+    )
     
     st.markdown("---")
     
@@ -922,7 +996,15 @@ with tab_loss:
 # ==============================
 # TAB 4: MODELO 3D
 # ==============================
-with tab_3d:
+def pestana_modelo_3d():
+    aviso_cdn = aviso_recursos_cdn()
+    if aviso_cdn:
+        st.warning(aviso_cdn, icon="🌐")
+
+    if red_3d:
+        pestana_modelo_red()
+        return
+
     st.markdown(f"### Visualización 3D: Tramo {tramo_3d}")
     
     defn_3d = definiciones[tramo_3d]
@@ -935,26 +1017,50 @@ with tab_3d:
     kpi3.metric("Tipo", defn_3d['tipo'].replace('_', ' ').title())
     kpi4.metric("Potencia", f"{r_3d['potencia_kw']:.2f} kW")
 
-    # Render 3D
-    html_3d = generar_modelo_tramo(tramo_3d, resultados)
-    components.html(html_3d, height=720, scrolling=False)
+    # Render 3D: componente persistente; cada rerun solo envía los datos
+    with etapa("modelo 3D: componente"):
+        componente_modelo_3d(tramo_3d, resultados, key="modelo_3d")
     
     st.caption(
         "**Leyenda Visual:** El gradiente de color (Azul → Rojo) indica la caída de presión a lo largo del tramo. "
-        "Las partículas blancas representan el flujo turbulento del agua."
+        "Las partículas blancas representan el flujo turbulento del agua: avanzan a la velocidad media "
+        "calculada y su cantidad es proporcional al caudal."
     )
 
     if defn_3d.get('notas'):
         st.info(f"**Nota Técnica:** {defn_3d['notas']}")
 
 
+def pestana_modelo_red():
+    st.markdown("### Visualización 3D: Conducción completa")
+
+    kpi1, kpi2, kpi3, kpi4 = st.columns(4)
+    kpi1.metric("Longitud", f"{sum(d['longitud_tuberia'] for d in definiciones.values()):,.0f} m")
+    kpi2.metric("Tramos", len(definiciones))
+    kpi3.metric("Estaciones de bombeo", sum(
+        r['num_estaciones'] for r in resultados.values() if not r['es_bajada']
+    ))
+    kpi4.metric("Potencia", f"{sum(r['potencia_kw'] for r in resultados.values()):.2f} kW")
+
+    # Misma key que la vista por tramo: se reutiliza el iframe
+    with etapa("modelo 3D: componente"):
+        componente_modelo_red(resultados, key="modelo_3d")
+
+    st.caption(
+        "**Leyenda Visual:** El color codifica la presión manométrica (azul alta → rojo baja); "
+        "los saltos de color marcan bombas y tanques rompe-presión. Altura exagerada para legibilidad. "
+        "Pasa el cursor sobre la tubería para ver la presión en cada punto."
+    )
+
+
 # ==============================
 # TAB 5: DATOS DETALLADOS
 # ==============================
-with tab_data:
+def pestana_datos():
     st.markdown("### Tablas de Datos y Fórmulas")
     
-    datos = extraer_datos_completos()
+    with etapa("datos CSV"):
+        datos = cargar_datos_csv(firma_csv())
     
     with st.expander("📐 Perfil del Terreno (Raw Data)", expanded=False):
         st.dataframe(datos['perfil_terreno'], use_container_width=True)
@@ -1055,7 +1161,7 @@ if "preview_file" in st.session_state and st.session_state.preview_file:
 # ==============================
 # TAB 6: DOCUMENTACIÓN
 # ==============================
-with tab_docs:
+def pestana_documentacion():
     st.markdown("### Documentación del Proyecto")
     
     col_d1, col_d2 = st.columns([2, 1])
@@ -1089,6 +1195,38 @@ with tab_docs:
                 st.rerun()
 
 
+PESTANAS = {
+    "🏠 Inicio": pestana_inicio,
+    "📈 Mapa Piezométrico": pestana_mapa,
+    "🏔️ Perfil Topográfico": pestana_terreno,
+    "📉 Análisis de Pérdidas": pestana_perdidas,
+    "🧊 Modelo 3D": pestana_modelo_3d,
+    "📊 Datos Detallados": pestana_datos,
+    "📑 Documentación": pestana_documentacion,
+}
+
+try:
+    if st.session_state.render_diferido:
+        # Solo la pestaña visible construye sus figuras, el HTML 3D o los datos
+        # del CSV; el costo de mover un slider escala con lo que se ve
+        pestana_activa = st.radio(
+            "Sección",
+            options=list(PESTANAS),
+            horizontal=True,
+            key="pestana_activa",
+            label_visibility="collapsed",
+        )
+        PESTANAS[pestana_activa]()
+    else:
+        for contenedor, dibujar_pestana in zip(st.tabs(list(PESTANAS)), PESTANAS.values()):
+            with contenedor:
+                dibujar_pestana()
+finally:
+    # También con st.rerun() o una excepción en una pestaña
+    if traza_rerun is not None:
+        finalizar_traza(st.session_state.pop("traza_rerun", traza_rerun))
+
+
 # ====================================
 # FOOTER
 # ====================================
@@ -1106,3 +1244,39 @@ st.markdown(
     """,
     unsafe_allow_html=True,
 )
+
+
+# ====================================
+# PANEL DE DIAGNÓSTICO
+# ====================================
+if traza_rerun is not None:
+    with st.sidebar.expander("🩺 Diagnóstico de rendimiento", expanded=False):
+        memoria = (
+            f"memoria pico: **{traza_rerun.memoria_pico_kib:.0f} KiB**"
+            if traza_rerun.memoria_pico_kib is not None
+            else "memoria: sin medir (HIDRAULICA_DIAGNOSTICO_MEMORIA=1)"
+        )
+        st.caption(f"Rerun: **{traza_rerun.duracion_s * 1000:.1f} ms** · {memoria}")
+        cache_fig = estadisticas_cache_figuras()
+        st.caption(
+            f"Caché de figuras: {cache_fig['entradas']}/{cache_fig['capacidad']} entradas · "
+            f"{cache_fig['aciertos']} aciertos · {cache_fig['fallos']} fallos · "
+            f"{cache_fig['bytes'] / 1024:.0f} KiB"
+        )
+        st.dataframe(
+            pd.DataFrame(traza_rerun.resumen()),
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "tiempo_ms": st.column_config.NumberColumn("Tiempo (ms)", format="%.2f"),
+                "memoria_neta_kib": st.column_config.NumberColumn("Memoria neta (KiB)", format="%.1f"),
+            },
+        )
+        st.download_button(
+            "⬇️ Exportar traza (Chrome Trace JSON)",
+            json.dumps(traza_rerun.a_chrome_trace()),
+            file_name="traza_rerun.json",
+            mime="application/json",
+            use_container_width=True,
+            help="Se abre en chrome://tracing, ui.perfetto.dev o speedscope.app",
+        )
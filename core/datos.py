@@ -3,12 +3,45 @@ datos.py — Parseo del CSV de cálculos hidráulicos.
 
 Lee CALCULOS_HIDRAULICOS.csv y extrae los datos organizados
 en DataFrames de pandas para cada sección del proyecto.
+
+El CSV se convierte una sola vez a una TablaCSV (celdas de texto +
+números ya convertidos del formato latino) y se guarda como instantánea
+binaria (.npy) en .cache/datos/, identificada por el mtime, tamaño y
+SHA-256 del CSV. Las cargas siguientes abren la instantánea como mapa
+de memoria sin volver a parsear.
 """
 
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+
 import pandas as pd
 import numpy as np
 from pathlib import Path
 
+from core.perfilado import perfilar
+
+
+# Directorio de instantáneas binarias (ignorado por git)
+DIR_CACHE = Path(__file__).parent.parent / ".cache" / "datos"
+
+
+def ruta_csv_por_defecto() -> Path:
+    """Ruta de source/CALCULOS_HIDRAULICOS.csv dentro del proyecto."""
+    return Path(__file__).parent.parent / "source" / "CALCULOS_HIDRAULICOS.csv"
+
+
+def firma_csv(ruta: str | Path | None = None) -> tuple[int, int]:
+    """
+    Firma barata del CSV en disco: (mtime en ns, tamaño en bytes).
+    
+    Sirve como clave de caché para invalidar los datos extraídos
+    únicamente cuando el archivo cambia.
+    """
+    info = Path(ruta or ruta_csv_por_defecto()).stat()
+    return info.st_mtime_ns, info.st_size
+
 
 def _limpiar_numero(valor: str) -> float:
     """Convierte un string con formato latino (1.030,49) a float (1030.49)."""
@@ -23,10 +56,74 @@ def _limpiar_numero(valor: str) -> float:
         return np.nan
 
 
+def _limpiar_numeros(celdas: np.ndarray) -> np.ndarray:
+    """
+    Versión vectorizada de _limpiar_numero sobre un arreglo de strings.
+    
+    Convierte todas las celdas en una sola pasada; las vacías o no
+    numéricas quedan como NaN. Conserva la forma del arreglo.
+    """
+    serie = (
+        pd.Series(celdas.ravel(), dtype=object)
+        .str.strip()
+        .str.replace('.', '', regex=False)
+        .str.replace(',', '.', regex=False)
+    )
+    numeros = pd.to_numeric(serie, errors='coerce').to_numpy(dtype=float)
+    return numeros.reshape(celdas.shape)
+
+
+@dataclass(frozen=True)
+class TablaCSV:
+    """
+    CSV en forma columnar.
+    
+    Atributos:
+        texto: celdas como strings, arreglo (filas, columnas) relleno con ''
+        numeros: celdas convertidas a float (NaN si no son numéricas)
+        anchos: número real de campos de cada fila
+    
+    tabla[i] devuelve los campos de la fila i (como cargar_csv), de modo
+    que tabla[i][j] y len(tabla[i]) se comportan igual que con listas.
+    """
+    texto: np.ndarray
+    numeros: np.ndarray
+    anchos: np.ndarray
+    
+    def __getitem__(self, i: int) -> np.ndarray:
+        return self.texto[i, :self.anchos[i]]
+    
+    def __len__(self) -> int:
+        return len(self.anchos)
+    
+    def numero(self, fila: int, columna: int) -> float:
+        """Celda (fila, columna) como float; NaN si está fuera de la fila."""
+        if columna >= self.anchos[fila]:
+            return np.nan
+        return float(self.numeros[fila, columna])
+
+
+def _tabla_desde_filas(filas: list[list[str]]) -> TablaCSV:
+    """Construye una TablaCSV a partir de filas de strings."""
+    anchos = np.array([len(f) for f in filas], dtype=np.int64)
+    n_cols = int(anchos.max()) if len(filas) else 0
+    texto = np.array(
+        [list(f) + [''] * (n_cols - len(f)) for f in filas], dtype=str,
+    ).reshape(len(filas), n_cols)
+    return TablaCSV(texto=texto, numeros=_limpiar_numeros(texto), anchos=anchos)
+
+
+def _como_tabla(filas) -> TablaCSV:
+    """Acepta una TablaCSV o la lista de filas que devuelve cargar_csv."""
+    if isinstance(filas, TablaCSV):
+        return filas
+    return _tabla_desde_filas(filas)
+
+
 def cargar_csv(ruta: str | Path | None = None) -> list[list[str]]:
     """Lee el CSV crudo y devuelve una lista de filas (cada fila es lista de strings)."""
     if ruta is None:
-        ruta = Path(__file__).parent.parent / "source" / "CALCULOS_HIDRAULICOS.csv"
+        ruta = ruta_csv_por_defecto()
     ruta = Path(ruta)
 
     filas = []
@@ -38,87 +135,188 @@ def cargar_csv(ruta: str | Path | None = None) -> list[list[str]]:
     return filas
 
 
-def extraer_perfil_terreno(filas: list[list[str]]) -> pd.DataFrame:
+def _parsear_csv(contenido: bytes) -> TablaCSV:
+    """Parsea el contenido completo del CSV (mismas reglas que cargar_csv)."""
+    texto = contenido.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')
+    lineas = texto.split('\n')
+    if lineas and lineas[-1] == '':
+        lineas.pop()
+    return _tabla_desde_filas([linea.split(';') for linea in lineas])
+
+
+def _rutas_instantanea(ruta: Path) -> dict:
+    """Archivos de la instantánea binaria asociada a un CSV."""
+    base = DIR_CACHE / ruta.stem
+    return {
+        'meta': base.with_suffix('.meta.json'),
+        'texto': base.with_suffix('.texto.npy'),
+        'numeros': base.with_suffix('.numeros.npy'),
+        'anchos': base.with_suffix('.anchos.npy'),
+    }
+
+
+def _leer_instantanea(rutas: dict) -> TablaCSV:
+    return TablaCSV(
+        texto=np.load(rutas['texto'], mmap_mode='r'),
+        numeros=np.load(rutas['numeros'], mmap_mode='r'),
+        anchos=np.load(rutas['anchos']),
+    )
+
+
+def _escribir_instantanea(rutas: dict, tabla: TablaCSV, meta: dict) -> None:
+    """Escribe la instantánea de forma atómica (archivo temporal + replace)."""
+    DIR_CACHE.mkdir(parents=True, exist_ok=True)
+    for clave in ('texto', 'numeros', 'anchos'):
+        tmp = rutas[clave].with_suffix('.tmp.npy')
+        np.save(tmp, getattr(tabla, clave))
+        os.replace(tmp, rutas[clave])
+    _escribir_meta(rutas, meta)
+
+
+def _escribir_meta(rutas: dict, meta: dict) -> None:
+    tmp = rutas['meta'].with_suffix('.tmp')
+    tmp.write_text(json.dumps(meta), encoding='utf-8')
+    os.replace(tmp, rutas['meta'])
+
+
+@perfilar()
+def cargar_tabla(ruta: str | Path | None = None, usar_cache: bool = True) -> TablaCSV:
+    """
+    Carga el CSV como TablaCSV, usando la instantánea binaria si es válida.
+    
+    La instantánea se reutiliza si coinciden mtime y tamaño del CSV; si
+    no, se compara el SHA-256 del contenido (p. ej. tras un checkout que
+    solo tocó el mtime) y solo se reparsea cuando el contenido cambió.
+    Si el directorio de caché no es escribible, se parsea sin guardar.
+    """
+    if ruta is None:
+        ruta = ruta_csv_por_defecto()
+    ruta = Path(ruta)
+    if not usar_cache:
+        return _parsear_csv(ruta.read_bytes())
+    
+    rutas = _rutas_instantanea(ruta)
+    info = ruta.stat()
+    meta_actual = {
+        'ruta': str(ruta.resolve()),
+        'mtime_ns': info.st_mtime_ns,
+        'tamano': info.st_size,
+    }
+    
+    try:
+        meta = json.loads(rutas['meta'].read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        meta = {}
+    
+    if all(meta.get(k) == v for k, v in meta_actual.items()):
+        try:
+            return _leer_instantanea(rutas)
+        except (OSError, ValueError):
+            pass
+    
+    contenido = ruta.read_bytes()
+    meta_actual['sha256'] = hashlib.sha256(contenido).hexdigest()
+    
+    if meta.get('sha256') == meta_actual['sha256']:
+        try:
+            tabla = _leer_instantanea(rutas)
+            _escribir_meta(rutas, meta_actual)
+            return tabla
+        except (OSError, ValueError):
+            pass
+    
+    tabla = _parsear_csv(contenido)
+    try:
+        _escribir_instantanea(rutas, tabla, meta_actual)
+    except OSError:
+        pass
+    return tabla
+
+
+def extraer_perfil_terreno(filas: TablaCSV | list[list[str]]) -> pd.DataFrame:
     """
     Extrae el perfil topográfico del terreno (filas 1-8 del CSV, índice 1-8).
     Retorna DataFrame con: altura_mapa, largo_mapa, hipotenusa_mapa,
     altura_real, distancia_acumulada, distancia, altitud.
     """
+    tabla = _como_tabla(filas)
     datos = []
     for i in range(1, 9):  # filas 1-8 (después del encabezado)
-        fila = filas[i]
         datos.append({
-            'altura_mapa': _limpiar_numero(fila[0]),
-            'largo_mapa': _limpiar_numero(fila[1]),
-            'hipotenusa_mapa': _limpiar_numero(fila[2]),
-            'altura_real': _limpiar_numero(fila[3]),
-            'distancia_acumulada': _limpiar_numero(fila[4]),
-            'distancia': _limpiar_numero(fila[5]),
-            'altitud': _limpiar_numero(fila[6]),
+            'altura_mapa': tabla.numero(i, 0),
+            'largo_mapa': tabla.numero(i, 1),
+            'hipotenusa_mapa': tabla.numero(i, 2),
+            'altura_real': tabla.numero(i, 3),
+            'distancia_acumulada': tabla.numero(i, 4),
+            'distancia': tabla.numero(i, 5),
+            'altitud': tabla.numero(i, 6),
         })
     return pd.DataFrame(datos)
 
 
-def extraer_parametros_globales(filas: list[list[str]]) -> dict:
+def extraer_parametros_globales(filas: TablaCSV | list[list[str]]) -> dict:
     """Extrae parámetros globales: escala, distancia río, etc."""
+    tabla = _como_tabla(filas)
     return {
-        'escala': _limpiar_numero(filas[15][1]),  # fila "Escala"
-        'distancia_rio_mapa': _limpiar_numero(filas[11][2]),  # 7.75
-        'montaña_a_tierra': _limpiar_numero(filas[12][2]),  # 0.46
-        'total_montaña': _limpiar_numero(filas[13][2]),  # 7.29
-        'espacio_tierra_rio': _limpiar_numero(filas[17][2]),  # 87.50 m
-        'distancia_total': _limpiar_numero(filas[34][2]),  # 3433.93 m
-        'num_bombeos': _limpiar_numero(filas[35][2]),  # 7
-        'num_depositos': _limpiar_numero(filas[36][2]),  # 12
+        'escala': tabla.numero(15, 1),  # fila "Escala"
+        'distancia_rio_mapa': tabla.numero(11, 2),  # 7.75
+        'montaña_a_tierra': tabla.numero(12, 2),  # 0.46
+        'total_montaña': tabla.numero(13, 2),  # 7.29
+        'espacio_tierra_rio': tabla.numero(17, 2),  # 87.50 m
+        'distancia_total': tabla.numero(34, 2),  # 3433.93 m
+        'num_bombeos': tabla.numero(35, 2),  # 7
+        'num_depositos': tabla.numero(36, 2),  # 12
     }
 
 
-def extraer_resumen_tramos(filas: list[list[str]]) -> pd.DataFrame:
+def extraer_resumen_tramos(filas: TablaCSV | list[list[str]]) -> pd.DataFrame:
     """
     Extrae tabla resumen de tramos 1-7 (filas 21-27).
     Columnas: tramo, distancia, altura, pendiente, longitud_tuberia.
     """
+    tabla = _como_tabla(filas)
     datos = []
     for i in range(21, 28):
-        fila = filas[i]
         datos.append({
-            'tramo': int(_limpiar_numero(fila[0])),
-            'distancia': _limpiar_numero(fila[1]),
-            'altura': _limpiar_numero(fila[2]),
-            'pendiente': _limpiar_numero(fila[3]),
-            'longitud_tuberia': _limpiar_numero(fila[4]),
+            'tramo': int(tabla.numero(i, 0)),
+            'distancia': tabla.numero(i, 1),
+            'altura': tabla.numero(i, 2),
+            'pendiente': tabla.numero(i, 3),
+            'longitud_tuberia': tabla.numero(i, 4),
         })
     return pd.DataFrame(datos)
 
 
-def extraer_tramo_8_distancias(filas: list[list[str]]) -> pd.DataFrame:
+def extraer_tramo_8_distancias(filas: TablaCSV | list[list[str]]) -> pd.DataFrame:
     """Extrae las sub-distancias del tramo 8 (filas 85-92)."""
+    tabla = _como_tabla(filas)
     nombres = []
     for i in range(85, 92):
-        fila = filas[i]
+        fila = tabla[i]
         nombres.append({
-            'segmento': fila[0].strip() if fila[0].strip() else '',
-            'distancia': _limpiar_numero(fila[1]),
-            'acumulado': _limpiar_numero(fila[2]),
-            'altura': _limpiar_numero(fila[3]),
+            'segmento': str(fila[0]).strip(),
+            'distancia': tabla.numero(i, 1),
+            'acumulado': tabla.numero(i, 2),
+            'altura': tabla.numero(i, 3),
         })
     return pd.DataFrame(nombres)
 
 
-def extraer_accesorios_tramo(filas: list[list[str]], col_inicio: int,
+def extraer_accesorios_tramo(filas: TablaCSV | list[list[str]], col_inicio: int,
                               fila_inicio: int, fila_fin: int) -> pd.DataFrame:
     """
     Extrae la tabla de accesorios de un tramo dado el rango de columnas y filas.
     """
+    tabla = _como_tabla(filas)
     datos = []
     for i in range(fila_inicio, fila_fin):
-        fila = filas[i]
+        fila = tabla[i]
         if col_inicio + 3 < len(fila):
-            nombre = fila[col_inicio].strip() if fila[col_inicio].strip() else None
+            nombre = str(fila[col_inicio]).strip() or None
             if nombre and nombre not in ('Accesorios', 'Accesorios por estación'):
-                cantidad = _limpiar_numero(fila[col_inicio + 1])
-                k_valor = _limpiar_numero(fila[col_inicio + 2])
-                carga = _limpiar_numero(fila[col_inicio + 3])
+                cantidad = tabla.numero(i, col_inicio + 1)
+                k_valor = tabla.numero(i, col_inicio + 2)
+                carga = tabla.numero(i, col_inicio + 3)
                 if not np.isnan(cantidad):
                     datos.append({
                         'nombre': nombre,
@@ -131,11 +329,12 @@ def extraer_accesorios_tramo(filas: list[list[str]], col_inicio: int,
     )
 
 
-def extraer_accesorios_tramo_8(filas: list[list[str]]) -> pd.DataFrame:
+def extraer_accesorios_tramo_8(filas: TablaCSV | list[list[str]]) -> pd.DataFrame:
     """Extrae accesorios del tramo 8 (filas 98-103, columnas 5-8)."""
     return extraer_accesorios_tramo(filas, col_inicio=5, fila_inicio=98, fila_fin=104)
 
 
+@perfilar()
 def extraer_datos_completos() -> dict:
     """
     Función principal: carga y organiza todos los datos del CSV.
@@ -147,12 +346,12 @@ def extraer_datos_completos() -> dict:
     - 'tramo_8_distancias': DataFrame sub-distancias tramo 8
     - 'tramos_detalle': dict con datos detallados por tramo (1-8)
     """
-    filas = cargar_csv()
+    tabla = cargar_tabla()
     
-    perfil = extraer_perfil_terreno(filas)
-    parametros = extraer_parametros_globales(filas)
-    resumen = extraer_resumen_tramos(filas)
-    tramo8_dist = extraer_tramo_8_distancias(filas)
+    perfil = extraer_perfil_terreno(tabla)
+    parametros = extraer_parametros_globales(tabla)
+    resumen = extraer_resumen_tramos(tabla)
+    tramo8_dist = extraer_tramo_8_distancias(tabla)
     
     # Extraer datos detallados por tramo (columnas del CSV en bloques de 5)
     tramos_detalle = {}
@@ -161,25 +360,25 @@ def extraer_datos_completos() -> dict:
     for t in range(1, 8):
         col_base = (t - 1) * 5
         detalle = {
-            'pendiente': _limpiar_numero(filas[43][col_base + 1]),
-            'densidad': _limpiar_numero(filas[43][col_base + 3]),
-            'caudal': _limpiar_numero(filas[44][col_base + 1]),
-            'viscosidad': _limpiar_numero(filas[44][col_base + 3]),
-            'longitud_tuberia': _limpiar_numero(filas[45][col_base + 1]),
-            'rugosidad': _limpiar_numero(filas[45][col_base + 3]),
-            'diametro': _limpiar_numero(filas[46][col_base + 1]),
-            'area': _limpiar_numero(filas[48][col_base + 1]),
-            'velocidad': _limpiar_numero(filas[49][col_base + 1]),
-            'carga_cinetica': _limpiar_numero(filas[50][col_base + 1]),
-            'reynolds': _limpiar_numero(filas[51][col_base + 1]),
-            'f_colebrook': _limpiar_numero(filas[52][col_base + 1]),
-            'f_haaland': _limpiar_numero(filas[53][col_base + 1]),
-            'perdidas_darcy_crane': _limpiar_numero(filas[54][col_base + 1]),
-            'perdidas_darcy_haaland': _limpiar_numero(filas[55][col_base + 1]),
+            'pendiente': tabla.numero(43, col_base + 1),
+            'densidad': tabla.numero(43, col_base + 3),
+            'caudal': tabla.numero(44, col_base + 1),
+            'viscosidad': tabla.numero(44, col_base + 3),
+            'longitud_tuberia': tabla.numero(45, col_base + 1),
+            'rugosidad': tabla.numero(45, col_base + 3),
+            'diametro': tabla.numero(46, col_base + 1),
+            'area': tabla.numero(48, col_base + 1),
+            'velocidad': tabla.numero(49, col_base + 1),
+            'carga_cinetica': tabla.numero(50, col_base + 1),
+            'reynolds': tabla.numero(51, col_base + 1),
+            'f_colebrook': tabla.numero(52, col_base + 1),
+            'f_haaland': tabla.numero(53, col_base + 1),
+            'perdidas_darcy_crane': tabla.numero(54, col_base + 1),
+            'perdidas_darcy_haaland': tabla.numero(55, col_base + 1),
         }
         # Accesorios
         detalle['accesorios'] = extraer_accesorios_tramo(
-            filas, col_inicio=col_base, fila_inicio=58, fila_fin=63
+            tabla, col_inicio=col_base, fila_inicio=58, fila_fin=63
         )
         tramos_detalle[t] = detalle
     
@@ -267,7 +466,7 @@ def extraer_datos_completos() -> dict:
         'potencia_hp': 49.47,
         'num_estaciones': 1,
         'tipo': 'bomba',
-        'accesorios': extraer_accesorios_tramo_8(filas),
+        'accesorios': extraer_accesorios_tramo_8(tabla),
     }
     
     return {
@@ -4,14 +4,39 @@ hidraulica.py — Motor de cálculos hidráulicos.
 Implementa todas las fórmulas de mecánica de fluidos:
 Reynolds, Colebrook-White, Haaland, Darcy-Weisbach,
 pérdidas menores y potencia de bombas.
+
+Además de la evaluación puntual (calcular_sistema_completo), ofrece una
+evaluación por lotes (calcular_sistema_lote) sobre muchos puntos de
+operación a la vez.
+
+El factor de fricción de Colebrook se obtiene con un método seleccionable
+(registro METODOS_FRICCION): 'colebrook' (fsolve / Newton), 'lambert'
+(forma cerrada con la función omega de Wright), 'newton' (iteraciones
+fijas) y 'tabla' (interpolación sobre una malla precalculada).
 """
 
+import os
+from functools import lru_cache
+from pathlib import Path
+
 import numpy as np
+import pandas as pd
 from scipy.optimize import fsolve
+from scipy.special import wrightomega
+
+from core.perfilado import perfilar
 
 # Constante gravitacional
 g = 9.81  # m/s²
 
+# 2/ln(10), derivada de 2·log₁₀(u) respecto a ln(u)
+_DOS_SOBRE_LN10 = 2.0 / np.log(10.0)
+
+
+def _es_escalar(*valores) -> bool:
+    """True si todos los argumentos son escalares (no arreglos)."""
+    return all(np.ndim(x) == 0 for x in valores)
+
 
 def area_seccion(D: float) -> float:
     """Área de la sección transversal circular. A = π·D²/4"""
@@ -42,28 +67,64 @@ def reynolds(rho: float, v: float, D: float, mu: float) -> float:
     return rho * v * D / mu
 
 
-def f_haaland(Re: float, epsilon: float, D: float) -> float:
+def f_haaland(Re, epsilon, D):
     """
     Factor de fricción por la correlación de Haaland (explícita).
     
     1/√f = -1.8·log₁₀[(ε/D / 3.7)^1.11 + 6.9/Re]
+    
+    Acepta escalares o arreglos NumPy (se difunden entre sí).
     """
-    if Re <= 0:
-        return 0.0
-    termino = (epsilon / D / 3.7)**1.11 + 6.9 / Re
+    if _es_escalar(Re, epsilon, D):
+        if Re <= 0:
+            return 0.0
+        termino = (epsilon / D / 3.7)**1.11 + 6.9 / Re
+        inv_sqrt_f = -1.8 * np.log10(termino)
+        return 1.0 / inv_sqrt_f**2
+    
+    Re = np.asarray(Re, dtype=float)
+    valido = Re > 0
+    Re_seguro = np.where(valido, Re, 1.0)
+    termino = (np.asarray(epsilon) / D / 3.7)**1.11 + 6.9 / Re_seguro
     inv_sqrt_f = -1.8 * np.log10(termino)
-    return 1.0 / inv_sqrt_f**2
+    return np.where(valido, 1.0 / inv_sqrt_f**2, 0.0)
 
 
-def f_colebrook(Re: float, epsilon: float, D: float) -> float:
+def f_colebrook(Re, epsilon, D, modo: str = 'exacto'):
     """
     Factor de fricción por la ecuación de Colebrook-White (implícita).
     
     1/√f = -2·log₁₀(ε/D / 3.7 + 2.51/(Re·√f))
     
-    Resuelve iterativamente usando scipy.optimize.fsolve,
+    Con modo='rapido' se interpola sobre la malla precalculada
+    (f_colebrook_tabla, O(1) por punto, error relativo < 5e-5); solo es
+    más rápido con ε y D escalares, ver f_colebrook_tabla.
+    
+    Con escalares resuelve iterativamente usando scipy.optimize.fsolve,
     con la solución de Haaland como semilla inicial.
+    
+    Con arreglos NumPy de Re, ε y/o D resuelve todos los puntos a la vez
+    mediante una iteración de Newton vectorizada (ver _colebrook_newton),
+    también sembrada con Haaland. Los puntos con Re ≤ 0 devuelven 0.
     """
+    if modo == 'rapido':
+        return f_colebrook_tabla(Re, epsilon, D)
+    if modo != 'exacto':
+        raise ValueError(f"modo debe ser 'exacto' o 'rapido', no {modo!r}")
+    
+    if not _es_escalar(Re, epsilon, D):
+        Re, epsilon, D = np.broadcast_arrays(
+            np.asarray(Re, dtype=float),
+            np.asarray(epsilon, dtype=float),
+            np.asarray(D, dtype=float),
+        )
+        valido = Re > 0
+        # Valor de relleno turbulento para que Newton no diverja en puntos inválidos
+        Re_seguro = np.where(valido, Re, 4000.0)
+        f0 = f_haaland(Re_seguro, epsilon, D)
+        f = _colebrook_newton(Re_seguro, epsilon / D, f0)
+        return np.where(valido, f, 0.0)
+    
     if Re <= 0:
         return 0.0
     
@@ -80,16 +141,350 @@ def f_colebrook(Re: float, epsilon: float, D: float) -> float:
     return float(sol[0])
 
 
-def f_swamee_jain(Re: float, epsilon: float, D: float) -> float:
+def _colebrook_newton(
+    Re: np.ndarray, rugosidad_rel: np.ndarray, f0: np.ndarray,
+    max_iter: int = 20, tol: float = 1e-12,
+) -> np.ndarray:
+    """
+    Newton vectorizado sobre x = 1/√f para la ecuación de Colebrook-White.
+    
+    F(x)  = x + 2·log₁₀(a + b·x),   a = (ε/D)/3.7,  b = 2.51/Re
+    F'(x) = 1 + (2/ln 10) · b/(a + b·x)
+    
+    Todos los puntos iteran juntos hasta que el mayor cambio relativo
+    es menor que tol (típicamente 3-4 iteraciones desde Haaland).
+    Re debe ser estrictamente positivo.
+    """
+    a = rugosidad_rel / 3.7
+    b = 2.51 / Re
+    x = 1.0 / np.sqrt(f0)
+    for _ in range(max_iter):
+        arg = a + b * x
+        F = x + 2.0 * np.log10(arg)
+        dF = 1.0 + _DOS_SOBRE_LN10 * b / arg
+        dx = F / dF
+        x = x - dx
+        if np.max(np.abs(dx) / x, initial=0.0) < tol:
+            break
+    return 1.0 / x**2
+
+
+def f_swamee_jain(Re, epsilon, D):
     """
     Factor de fricción por la ecuación de Swamee-Jain (explícita).
     
     f = 0.25 / [log₁₀(ε/(3.7·D) + 5.74/Re^0.9)]²
+    
+    Acepta escalares o arreglos NumPy (se difunden entre sí).
     """
-    if Re <= 0:
-        return 0.0
-    termino = epsilon / (3.7 * D) + 5.74 / Re**0.9
-    return 0.25 / (np.log10(termino))**2
+    if _es_escalar(Re, epsilon, D):
+        if Re <= 0:
+            return 0.0
+        termino = epsilon / (3.7 * D) + 5.74 / Re**0.9
+        return 0.25 / (np.log10(termino))**2
+    
+    Re = np.asarray(Re, dtype=float)
+    valido = Re > 0
+    Re_seguro = np.where(valido, Re, 1.0)
+    termino = np.asarray(epsilon) / (3.7 * np.asarray(D)) + 5.74 / Re_seguro**0.9
+    return np.where(valido, 0.25 / (np.log10(termino))**2, 0.0)
+
+
+def f_colebrook_lambert(Re, epsilon, D):
+    """
+    Colebrook-White exacta en forma cerrada (Lambert W / omega de Wright).
+    
+    Con a = (ε/D)/3.7, b = 2.51/Re y c = 2/ln 10, la ecuación
+    x = -c·ln(a + b·x), con x = 1/√f, tiene solución
+    
+        x = -c · ln(b·c·ω),   ω = ω_Wright(a/(b·c) - ln(b·c))
+    
+    (ω + ln ω = z). Esta forma evita la cancelación de x = c·ω - a/b.
+    Error relativo frente a Colebrook iterada a convergencia: < 1e-14
+    en Re ∈ [2300, 1e8], ε/D ∈ [0, 0.05]. Sin iteraciones.
+    """
+    escalar = _es_escalar(Re, epsilon, D)
+    Re = np.asarray(Re, dtype=float)
+    valido = Re > 0
+    b = 2.51 / np.where(valido, Re, 4000.0)
+    a = np.asarray(epsilon) / np.asarray(D) / 3.7
+    bc = b * _DOS_SOBRE_LN10
+    omega = wrightomega(a / bc - np.log(bc))
+    x = -_DOS_SOBRE_LN10 * np.log(bc * omega)
+    f = np.where(valido, 1.0 / x**2, 0.0)
+    return float(f) if escalar else f
+
+
+def f_colebrook_newton(Re, epsilon, D, iteraciones: int = 3):
+    """
+    Colebrook-White con un número fijo de iteraciones de Newton.
+    
+    Parte de Haaland y aplica `iteraciones` pasos de _colebrook_newton
+    sin criterio de parada (costo constante, sin ramas). Error relativo
+    máximo en Re ∈ [2300, 1e8], ε/D ∈ [0, 0.05]:
+        1 iteración  ≈ 3e-5
+        2 iteraciones ≈ 3e-11
+        3 iteraciones < 1e-15 (precisión de máquina)
+    """
+    escalar = _es_escalar(Re, epsilon, D)
+    Re, epsilon, D = np.broadcast_arrays(
+        np.asarray(Re, dtype=float),
+        np.asarray(epsilon, dtype=float),
+        np.asarray(D, dtype=float),
+    )
+    valido = Re > 0
+    Re_seguro = np.where(valido, Re, 4000.0)
+    f0 = f_haaland(Re_seguro, epsilon, D)
+    f = _colebrook_newton(Re_seguro, epsilon / D, f0, max_iter=iteraciones, tol=0.0)
+    f = np.where(valido, f, 0.0)
+    return float(f) if escalar else f
+
+
+# === Tabla de fricción precalculada ===
+# Malla equiespaciada en u = log₁₀(Re) y w = log₁₀(ε/D + RUGOSIDAD_REL_0);
+# el primer nodo en w corresponde exactamente a tubería lisa (ε/D = 0).
+TABLA_RE_MIN = 2300.0
+TABLA_RE_MAX = 1e8
+TABLA_RUGOSIDAD_REL_MAX = 0.05
+RUGOSIDAD_REL_0 = 1e-8
+
+
+# Malla por defecto: 2048 × 512 nodos (8 MB en float64)
+TABLA_N_RE = 2048
+TABLA_N_RUGOSIDAD = 512
+
+# Directorio donde se persiste la malla (ignorado por git)
+DIR_CACHE_FRICCION = Path(__file__).parent.parent / ".cache" / "friccion"
+
+
+def _ruta_tabla_friccion(n_re: int, n_rug: int) -> Path:
+    """Archivo .npy de la malla; el nombre codifica su tamaño y rangos."""
+    nombre = (
+        f"colebrook_{n_re}x{n_rug}"
+        f"_re{TABLA_RE_MIN:g}-{TABLA_RE_MAX:g}"
+        f"_rr{TABLA_RUGOSIDAD_REL_MAX:g}.npy"
+    )
+    return DIR_CACHE_FRICCION / nombre
+
+
+def _construir_tabla_friccion(n_re: int, n_rug: int) -> np.ndarray:
+    """Evalúa Colebrook exacta (Lambert) en todos los nodos de la malla."""
+    u, w = _ejes_tabla_friccion(n_re, n_rug)
+    rug_rel = np.maximum(10.0**w - RUGOSIDAD_REL_0, 0.0)
+    rug_rel[0] = 0.0
+    return f_colebrook_lambert(10.0**u[:, np.newaxis], rug_rel[np.newaxis, :], 1.0)
+
+
+def _ejes_tabla_friccion(n_re: int, n_rug: int) -> tuple[np.ndarray, np.ndarray]:
+    u = np.linspace(np.log10(TABLA_RE_MIN), np.log10(TABLA_RE_MAX), n_re)
+    w = np.linspace(
+        np.log10(RUGOSIDAD_REL_0),
+        np.log10(TABLA_RUGOSIDAD_REL_MAX + RUGOSIDAD_REL_0),
+        n_rug,
+    )
+    return u, w
+
+
+@lru_cache(maxsize=4)
+def _tabla_friccion(n_re: int = TABLA_N_RE, n_rug: int = TABLA_N_RUGOSIDAD) -> dict:
+    """
+    Malla de Colebrook exacta para f_colebrook_tabla (perezosa, una vez).
+    
+    Se lee de DIR_CACHE_FRICCION como mapa de memoria si existe; si no,
+    se calcula con f_colebrook_lambert y se guarda para los próximos
+    procesos. Si el directorio no es escribible, queda solo en memoria.
+    """
+    u, w = _ejes_tabla_friccion(n_re, n_rug)
+    ruta = _ruta_tabla_friccion(n_re, n_rug)
+    try:
+        f = np.load(ruta, mmap_mode='r')
+        if f.shape == (n_re, n_rug):
+            return {'u': u, 'w': w, 'f': f}
+    except (OSError, ValueError):
+        pass
+    
+    f = _construir_tabla_friccion(n_re, n_rug)
+    try:
+        DIR_CACHE_FRICCION.mkdir(parents=True, exist_ok=True)
+        tmp = ruta.with_suffix('.tmp.npy')
+        np.save(tmp, f)
+        os.replace(tmp, ruta)
+    except OSError:
+        pass
+    return {'u': u, 'w': w, 'f': f}
+
+
+def reporte_precision_tabla(
+    n_muestras: int = 200_000, semilla: int = 0,
+    n_re: int = TABLA_N_RE, n_rug: int = TABLA_N_RUGOSIDAD,
+) -> dict:
+    """
+    Precisión de f_colebrook_tabla frente a Colebrook exacta (Lambert).
+    
+    Evalúa puntos aleatorios log-uniformes en Re ∈ [2300, 1e8] y
+    ε/D ∈ [0, 0.05] (incluida tubería lisa), más los centros de todas
+    las celdas de la malla, donde el error bilineal es máximo.
+    
+    Retorna dict con error relativo máximo, medio y percentil 99, y el
+    punto (Re, ε/D) del peor caso.
+    """
+    rng = np.random.default_rng(semilla)
+    u, w = _ejes_tabla_friccion(n_re, n_rug)
+    Re = 10.0**rng.uniform(u[0], u[-1], n_muestras)
+    rug_rel = np.maximum(10.0**rng.uniform(w[0], w[-1], n_muestras) - RUGOSIDAD_REL_0, 0.0)
+    
+    # Centros de celda (peor caso de la interpolación bilineal)
+    uc = (u[:-1] + u[1:]) / 2
+    wc = (w[:-1] + w[1:]) / 2
+    Re_c, rr_c = np.meshgrid(10.0**uc, np.maximum(10.0**wc - RUGOSIDAD_REL_0, 0.0))
+    Re = np.concatenate([Re, Re_c.ravel()])
+    rug_rel = np.concatenate([rug_rel, rr_c.ravel()])
+    
+    tabla = _tabla_friccion(n_re, n_rug)
+    f_aprox = _interpolar_tabla(tabla, Re, rug_rel)
+    f_exacto = f_colebrook_lambert(Re, rug_rel, 1.0)
+    error = np.abs(f_aprox - f_exacto) / f_exacto
+    peor = int(np.argmax(error))
+    return {
+        'forma_malla': (n_re, n_rug),
+        'n_puntos': int(error.size),
+        'error_rel_max': float(error[peor]),
+        'error_rel_medio': float(error.mean()),
+        'error_rel_p99': float(np.percentile(error, 99)),
+        'peor_Re': float(Re[peor]),
+        'peor_rugosidad_rel': float(rug_rel[peor]),
+    }
+
+
+def f_colebrook_tabla(Re, epsilon, D):
+    """
+    Colebrook-White interpolada sobre una malla precalculada.
+    
+    Interpolación en (log₁₀ Re, log₁₀(ε/D + 1e-8)) con índice directo
+    (malla equiespaciada), sin búsqueda ni iteraciones. Los puntos fuera
+    de Re ∈ [2300, 1e8] o ε/D > 0.05 se resuelven con f_colebrook_lambert.
+    La malla se construye (o se lee de disco) la primera vez que se usa.
+    
+    Con ε y D escalares (el barrido típico: muchos Re, una tubería) se
+    interpola primero la columna de esa ε/D y luego cada punto en 1D
+    sobre una tabla de 16 KB: unas 3-8× más rápido que Colebrook exacta
+    vectorizada (casos 'f_colebrook/rapido' y 'f_colebrook/barrido_rapido'
+    de tools/benchmark.py). Con ε/D distinta por punto, la interpolación
+    bilineal salta por toda la malla de 8 MB y no es más rápida que la
+    iteración de Newton ('f_colebrook/rapido_rugosidad'): ahí no hay
+    ganancia, solo un costo fijo sin iteraciones.
+    
+    Error relativo máximo con la malla por defecto (2048 × 512): < 5e-5
+    (ver reporte_precision_tabla).
+    """
+    escalar = _es_escalar(Re, epsilon, D)
+    rugosidad_unica = np.ndim(epsilon) == 0 and np.ndim(D) == 0
+    Re, epsilon, D = np.broadcast_arrays(
+        np.asarray(Re, dtype=float),
+        np.asarray(epsilon, dtype=float),
+        np.asarray(D, dtype=float),
+    )
+    dentro = (Re >= TABLA_RE_MIN) & (Re <= TABLA_RE_MAX)
+    if rugosidad_unica:
+        rug_rel = float(epsilon.flat[0] / D.flat[0]) if Re.size else 0.0
+        if not 0 <= rug_rel <= TABLA_RUGOSIDAD_REL_MAX:
+            return f_colebrook_lambert(float(Re) if escalar else Re, epsilon, D)
+    else:
+        rug_rel = epsilon / D
+        dentro &= (rug_rel >= 0) & (rug_rel <= TABLA_RUGOSIDAD_REL_MAX)
+    todos_dentro = bool(np.all(dentro))
+    Re_malla = Re if todos_dentro else np.where(dentro, Re, TABLA_RE_MIN)
+    if rugosidad_unica:
+        f = _interpolar_columna(_tabla_friccion(), Re_malla, rug_rel)
+    else:
+        f = _interpolar_tabla(
+            _tabla_friccion(), Re_malla,
+            rug_rel if todos_dentro else np.where(dentro, rug_rel, 0.0),
+        )
+    if not todos_dentro:
+        # Solo los puntos fuera de la malla pagan la solución exacta
+        fuera = ~dentro
+        f = np.array(f, dtype=float)
+        f[fuera] = f_colebrook_lambert(Re[fuera], epsilon[fuera], D[fuera])
+    return float(f) if escalar else f
+
+
+def _interpolar_tabla(tabla: dict, Re: np.ndarray, rug_rel: np.ndarray) -> np.ndarray:
+    """Interpolación bilineal vectorizada (puntos dentro del rango de la malla)."""
+    u_nodos, w_nodos, f_nodos = tabla['u'], tabla['w'], tabla['f']
+    u = np.log10(Re)
+    w = np.log10(rug_rel + RUGOSIDAD_REL_0)
+    
+    # Posición fraccionaria dentro de la malla
+    pu = (u - u_nodos[0]) / (u_nodos[1] - u_nodos[0])
+    pw = (w - w_nodos[0]) / (w_nodos[1] - w_nodos[0])
+    i = np.clip(pu.astype(np.int64), 0, len(u_nodos) - 2)
+    j = np.clip(pw.astype(np.int64), 0, len(w_nodos) - 2)
+    tu = pu - i
+    tw = pw - j
+    
+    # Índice plano del nodo inferior-izquierdo de cada celda
+    n_w = f_nodos.shape[1]
+    k = i * n_w + j
+    f_plano = f_nodos.ravel()
+    f_0 = f_plano.take(k) * (1 - tw) + f_plano.take(k + 1) * tw
+    f_1 = f_plano.take(k + n_w) * (1 - tw) + f_plano.take(k + n_w + 1) * tw
+    return f_0 + (f_1 - f_0) * tu
+
+
+def _interpolar_columna(tabla: dict, Re: np.ndarray, rug_rel: float) -> np.ndarray:
+    """
+    Interpolación para una sola ε/D (puntos dentro del rango de Re).
+    
+    Se interpola en w la columna f(u) de esa rugosidad (n_re nodos) y
+    cada punto queda en f = f_i + Δf_i·t, con dos lecturas de una tabla
+    que cabe en caché. El resultado coincide con la bilineal.
+    """
+    u_nodos, w_nodos, f_nodos = tabla['u'], tabla['w'], tabla['f']
+    pw = (np.log10(rug_rel + RUGOSIDAD_REL_0) - w_nodos[0]) / (w_nodos[1] - w_nodos[0])
+    j = min(max(int(pw), 0), len(w_nodos) - 2)
+    tw = pw - j
+    columna = np.asarray(f_nodos[:, j]) * (1 - tw) + np.asarray(f_nodos[:, j + 1]) * tw
+    incremento = np.diff(columna)
+    
+    pu = (np.log10(Re) - u_nodos[0]) * (1.0 / (u_nodos[1] - u_nodos[0]))
+    i = np.clip(pu.astype(np.intp), 0, len(u_nodos) - 2)
+    pu -= i
+    pu *= incremento.take(i)
+    pu += columna.take(i)
+    return pu
+
+
+# Métodos de cálculo del factor de fricción de Colebrook, por nombre.
+# Todos aceptan (Re, epsilon, D) escalares o arreglos.
+METODOS_FRICCION = {
+    'colebrook': f_colebrook,
+    'lambert': f_colebrook_lambert,
+    'newton': f_colebrook_newton,
+    'tabla': f_colebrook_tabla,
+}
+
+
+def registrar_metodo_friccion(nombre: str, funcion) -> None:
+    """Agrega (o reemplaza) un método de fricción en METODOS_FRICCION."""
+    METODOS_FRICCION[nombre] = funcion
+
+
+def obtener_metodo_friccion(metodo):
+    """
+    Resuelve un método de fricción: nombre registrado o función.
+    
+    Lanza ValueError si el nombre no está en METODOS_FRICCION.
+    """
+    if callable(metodo):
+        return metodo
+    try:
+        return METODOS_FRICCION[metodo]
+    except KeyError:
+        raise ValueError(
+            f"Método de fricción desconocido: {metodo!r}. "
+            f"Opciones: {', '.join(METODOS_FRICCION)}"
+        ) from None
 
 
 def perdidas_darcy(f: float, L: float, D: float, v: float) -> float:
@@ -157,6 +552,7 @@ def calcular_tramo(
     K_total: float = 0.0,
     num_estaciones: int = 1,
     es_bajada: bool = False,
+    metodo_friccion: str = 'colebrook',
 ) -> dict:
     """
     Calcula todos los parámetros hidráulicos para un tramo de tubería.
@@ -172,6 +568,8 @@ def calcular_tramo(
         K_total: suma de coeficientes K de accesorios
         num_estaciones: número de estaciones de bombeo en el tramo
         es_bajada: si True, el tramo es descendente (usa válvula en vez de bomba)
+        metodo_friccion: método para el factor de Colebrook, nombre de
+            METODOS_FRICCION o función (Re, epsilon, D) -> f
     
     Retorna dict con todos los valores calculados.
     """
@@ -180,7 +578,7 @@ def calcular_tramo(
     hv = carga_cinetica(v)
     Re = reynolds(rho, v, D, mu)
     
-    f_col = f_colebrook(Re, epsilon, D)
+    f_col = obtener_metodo_friccion(metodo_friccion)(Re, epsilon, D)
     f_haa = f_haaland(Re, epsilon, D)
     f_swa = f_swamee_jain(Re, epsilon, D)
     
@@ -233,75 +631,412 @@ def calcular_tramo(
     }
 
 
+@perfilar()
 def calcular_sistema_completo(
     Q: float = 0.025,
     D: float = 0.1541,
     rho: float = 998.0,
     mu: float = 0.001,
     epsilon: float = 0.000046,
+    metodo_friccion: str = 'colebrook',
 ) -> dict:
     """
     Recalcula todo el sistema hidráulico con los parámetros dados.
     
     Usa las geometrías fijas de los 8 tramos (distancias, alturas, accesorios)
     pero permite cambiar los parámetros del fluido y la tubería.
+    `metodo_friccion` selecciona el método de Colebrook (ver METODOS_FRICCION).
     
     Retorna dict con resultados para cada tramo.
     """
-    from core.tramos import obtener_definicion_tramos
+    from core.tramos import obtener_definicion_tramos, obtener_red_tramos
     
+    red = obtener_red_tramos()
     definiciones = obtener_definicion_tramos()
-    resultados = {}
+    columnas = _evaluar_red(red, Q, D, rho, mu, epsilon, metodo_friccion)
     
-    for num_tramo, defn in definiciones.items():
-        resultado = calcular_tramo(
-            Q=Q, D=D,
-            L=defn['longitud_tuberia'],
-            z=defn['z'],
-            rho=rho, mu=mu, epsilon=epsilon,
-            K_total=defn['K_total'],
-            num_estaciones=defn['num_estaciones'],
-            es_bajada=defn['es_bajada'],
-        )
+    resultados = {}
+    for j, num_tramo in enumerate(red.numeros.tolist()):
+        defn = definiciones[num_tramo]
+        resultado = {
+            clave: columnas[clave][0, j].item() for clave in _CLAVES_TRAMO
+        }
+        if red.fuente_gravedad[j] >= 0:
+            resultado['cabeza_gravedad_recibida'] = (
+                columnas['cabeza_gravedad_recibida'][0, j].item()
+            )
+            resultado['carga_estacion_original'] = (
+                columnas['carga_estacion_original'][0, j].item()
+            )
         resultado['distancia'] = defn['distancia']
         resultado['altura'] = defn['altura']
         resultado['pendiente'] = defn['pendiente']
         resultado['longitud_tuberia'] = defn['longitud_tuberia']
         resultado['tipo'] = defn['tipo']
-        resultado['accesorios'] = defn['accesorios']
+        resultado['accesorios'] = [dict(acc) for acc in defn['accesorios']]
         resultado['notas'] = defn.get('notas', '')
         resultado['tanque_rompe_presion'] = defn.get('tanque_rompe_presion', True)
         resultado['recibe_gravedad_de'] = defn.get('recibe_gravedad_de', None)
         resultados[num_tramo] = resultado
     
+    return resultados
+
+
+# Claves por tramo que produce calcular_tramo (en su orden)
+_CLAVES_TRAMO = (
+    'area', 'velocidad', 'carga_cinetica', 'reynolds',
+    'f_colebrook', 'f_haaland', 'f_swamee_jain',
+    'longitud_estacion',
+    'perdidas_friccion_colebrook', 'perdidas_friccion_haaland',
+    'perdidas_menores', 'z_estacion', 'carga_estacion', 'carga_total',
+    'potencia_kw', 'potencia_hp', 'num_estaciones', 'es_bajada',
+)
+
+
+def _evaluar_red(red, Q, D, rho, mu, epsilon, metodo_friccion='colebrook') -> dict:
+    """
+    Núcleo vectorizado del sistema sobre una RedTramos.
+    
+    Q, D, rho, mu y epsilon se difunden a una columna de N puntos; cada
+    resultado es un arreglo (N, n_tramos). Incluye la transferencia de
+    cabeza gravitacional hacia los tramos con fuente_gravedad ≥ 0.
+    """
+    # Puntos como columna (N, 1) para difundir contra los tramos (n_tramos,)
+    Q, D, rho, mu, epsilon = (
+        np.ravel(x)[:, np.newaxis]
+        for x in np.broadcast_arrays(*(
+            np.asarray(x, dtype=float) for x in (Q, D, rho, mu, epsilon)
+        ))
+    )
+    forma = (Q.shape[0], red.n_tramos)
+    n_est = red.num_estaciones
+    
+    # Magnitudes que sólo dependen del punto de operación: (N, 1)
+    A = area_seccion(D)
+    v = velocidad(Q, A)
+    hv = carga_cinetica(v)
+    Re = reynolds(rho, v, D, mu)
+    f_col = obtener_metodo_friccion(metodo_friccion)(Re, epsilon, D)
+    f_haa = f_haaland(Re, epsilon, D)
+    f_swa = f_swamee_jain(Re, epsilon, D)
+    
+    # Magnitudes por tramo: (N, n_tramos)
+    n_div = np.where(n_est > 0, n_est, 1)
+    L_estacion = red.longitud_tuberia / n_div
+    hf_crane = perdidas_darcy(f_col, L_estacion, D, v)
+    hf_haaland = perdidas_darcy(f_haa, L_estacion, D, v)
+    hm = perdidas_menores(red.K_total, v)
+    z_estacion = red.z / n_div
+    H_estacion = np.broadcast_to(
+        carga_total(np.abs(z_estacion), hf_crane, hm), forma
+    ).copy()
+    H_original = np.full(forma, np.nan)
+    cabeza_recibida = np.full(forma, np.nan)
+    
     # === Transferencia de energía gravitacional entre tramos ===
     # Si un tramo descendente no tiene tanque rompe-presión, su cabeza
-    # gravitacional neta se transfiere al siguiente tramo, reduciendo
-    # la carga requerida por la bomba.
-    for num_tramo, defn in definiciones.items():
-        tramo_fuente = defn.get('recibe_gravedad_de')
-        if tramo_fuente is not None and tramo_fuente in resultados:
-            r_fuente = resultados[tramo_fuente]
-            d_fuente = definiciones[tramo_fuente]
-            
-            # Cabeza disponible = caída gravitacional - pérdidas en tramo fuente
-            cabeza_gravedad = (
-                abs(d_fuente['altura'])
-                - r_fuente['perdidas_friccion_colebrook'] * r_fuente['num_estaciones']
-                - r_fuente['perdidas_menores'] * r_fuente['num_estaciones']
-            )
-            cabeza_gravedad = max(0.0, cabeza_gravedad)
-            
-            # Recalcular carga de la bomba reducida
-            r = resultados[num_tramo]
-            H_original = r['carga_estacion']
-            H_reducida = max(0.0, H_original - cabeza_gravedad)
-            
-            r['cabeza_gravedad_recibida'] = cabeza_gravedad
-            r['carga_estacion_original'] = H_original
-            r['carga_estacion'] = H_reducida
-            r['carga_total'] = H_reducida * r['num_estaciones']
-            r['potencia_kw'] = potencia_bomba(rho, Q, H_reducida)
-            r['potencia_hp'] = kw_a_hp(r['potencia_kw'])
+    # gravitacional neta (caída - pérdidas) se transfiere al tramo receptor,
+    # reduciendo la carga requerida por la bomba.
+    receptores = np.flatnonzero(red.fuente_gravedad >= 0)
+    if receptores.size:
+        fuentes = red.fuente_gravedad[receptores]
+        cabeza = np.maximum(
+            0.0,
+            np.abs(red.altura[fuentes])
+            - hf_crane[:, fuentes] * n_est[fuentes]
+            - hm[:, fuentes] * n_est[fuentes],
+        )
+        cabeza_recibida[:, receptores] = cabeza
+        H_original[:, receptores] = H_estacion[:, receptores]
+        H_estacion[:, receptores] = np.maximum(
+            0.0, H_estacion[:, receptores] - cabeza
+        )
     
-    return resultados
+    # Los tramos descendentes no bombean, salvo que reciban gravedad
+    bombea = ~red.es_bajada | (red.fuente_gravedad >= 0)
+    P_kw = np.where(bombea, potencia_bomba(rho, Q, H_estacion), 0.0)
+    
+    return {
+        'area': np.broadcast_to(A, forma),
+        'velocidad': np.broadcast_to(v, forma),
+        'carga_cinetica': np.broadcast_to(hv, forma),
+        'reynolds': np.broadcast_to(Re, forma),
+        'f_colebrook': np.broadcast_to(f_col, forma),
+        'f_haaland': np.broadcast_to(f_haa, forma),
+        'f_swamee_jain': np.broadcast_to(f_swa, forma),
+        'longitud_estacion': np.broadcast_to(L_estacion, forma),
+        'perdidas_friccion_colebrook': np.broadcast_to(hf_crane, forma),
+        'perdidas_friccion_haaland': np.broadcast_to(hf_haaland, forma),
+        'perdidas_menores': np.broadcast_to(hm, forma),
+        'z_estacion': np.broadcast_to(z_estacion, forma),
+        'carga_estacion': H_estacion,
+        'carga_total': H_estacion * n_est,
+        'potencia_kw': P_kw,
+        'potencia_hp': kw_a_hp(P_kw),
+        'num_estaciones': np.broadcast_to(n_est, forma),
+        'es_bajada': np.broadcast_to(red.es_bajada, forma),
+        'cabeza_gravedad_recibida': cabeza_recibida,
+        'carga_estacion_original': H_original,
+        # Parámetros de entrada difundidos (para el formato largo)
+        'Q': np.broadcast_to(Q, forma),
+        'D': np.broadcast_to(D, forma),
+        'rho': np.broadcast_to(rho, forma),
+        'mu': np.broadcast_to(mu, forma),
+        'epsilon': np.broadcast_to(epsilon, forma),
+    }
+
+
+# Parámetros de operación aceptados por calcular_sistema_lote
+_PARAMETROS_LOTE = ('Q', 'D', 'rho', 'mu', 'epsilon')
+
+
+@perfilar()
+def calcular_sistema_lote(
+    Q=0.025,
+    D=0.1541,
+    rho=998.0,
+    mu=0.001,
+    epsilon=0.000046,
+    puntos: pd.DataFrame | None = None,
+    metodo_friccion: str = 'colebrook',
+) -> pd.DataFrame:
+    """
+    Evalúa el sistema completo sobre un lote de puntos de operación.
+    
+    Equivale a llamar calcular_sistema_completo para cada combinación
+    (Q, D, ρ, μ, ε), pero resuelve los 8 tramos de todos los puntos en
+    una sola pasada vectorizada (incluida la transferencia de cabeza
+    gravitacional T7 → T8).
+    
+    Parámetros:
+        Q, D, rho, mu, epsilon: escalares o arreglos que se difunden
+            entre sí (p. ej. una malla de np.meshgrid aplanada)
+        puntos: DataFrame opcional con columnas Q, D, rho, mu, epsilon;
+            las columnas presentes reemplazan a los argumentos anteriores
+        metodo_friccion: método de Colebrook (ver METODOS_FRICCION)
+    
+    Retorna un DataFrame en formato largo, una fila por (punto, tramo),
+    con las mismas magnitudes que calcular_tramo. Las columnas
+    'cabeza_gravedad_recibida' y 'carga_estacion_original' son NaN en
+    los tramos que no reciben gravedad.
+    """
+    from core.tramos import obtener_red_tramos
+    
+    parametros = {'Q': Q, 'D': D, 'rho': rho, 'mu': mu, 'epsilon': epsilon}
+    if puntos is not None:
+        for nombre in _PARAMETROS_LOTE:
+            if nombre in puntos.columns:
+                parametros[nombre] = puntos[nombre].to_numpy(dtype=float)
+    
+    red = obtener_red_tramos()
+    columnas = _evaluar_red(
+        red, *(parametros[n] for n in _PARAMETROS_LOTE), metodo_friccion
+    )
+    n_puntos = columnas['Q'].shape[0]
+    
+    tabla = {
+        'punto': np.repeat(np.arange(n_puntos), red.n_tramos),
+        'tramo': np.tile(red.numeros, n_puntos),
+    }
+    for nombre in _PARAMETROS_LOTE + _CLAVES_TRAMO + (
+        'cabeza_gravedad_recibida', 'carga_estacion_original'
+    ):
+        tabla[nombre] = columnas[nombre].ravel()
+    return pd.DataFrame(tabla)
+
+
+# =============================================================================
+# CURVAS DEL SISTEMA H(Q)
+# =============================================================================
+
+@perfilar()
+def curvas_sistema(
+    Q=None,
+    D: float = 0.1541,
+    rho: float = 998.0,
+    mu: float = 0.001,
+    epsilon: float = 0.000046,
+    metodo_friccion: str = 'colebrook',
+    Q_max: float = 0.06,
+    n_puntos: int = 200,
+) -> dict:
+    """
+    Curvas del sistema H(Q) de todos los tramos y estaciones a la vez.
+    
+    Evalúa el núcleo de calcular_sistema_completo (_evaluar_red) sobre
+    toda la malla de caudales en una sola pasada: por estación,
+    
+        H(Q) = z_estación + f(Q)·(L/n)/D·v²/(2g) + ΣK·v²/(2g)
+    
+    (perdidas_darcy + perdidas_menores + carga estática), menos la
+    cabeza que T7 transfiere a T8 con ese mismo caudal.
+    
+    Parámetros:
+        Q: malla de caudales (m³/s); por defecto n_puntos valores de
+            Q_max/n_puntos a Q_max
+        D, rho, mu, epsilon: tubería y fluido (escalares)
+        metodo_friccion: método de Colebrook (ver METODOS_FRICCION)
+    
+    Retorna dict con:
+        Q: malla (N,)
+        tramos, num_estaciones: (n_tramos,)
+        estatica: desnivel por estación con signo (n_tramos,)
+        perdidas: hf + hm por estación (N, n_tramos)
+        carga_sistema: estatica + perdidas − gravedad recibida (N, n_tramos);
+            negativa en las bajadas (carga que disipa la válvula)
+        carga_estacion: carga de bombeo por estación, igual que
+            calcular_sistema_completo (N, n_tramos)
+        carga_tramo: carga_estacion · num_estaciones (N, n_tramos)
+    """
+    from core.tramos import obtener_red_tramos
+    
+    if Q is None:
+        Q = np.linspace(Q_max / n_puntos, Q_max, n_puntos)
+    Q = np.ravel(np.asarray(Q, dtype=float))
+    red = obtener_red_tramos()
+    columnas = _evaluar_red(red, Q, D, rho, mu, epsilon, metodo_friccion)
+    
+    # En las bajadas z = 0 (no hay nada que vencer); el desnivel real es negativo
+    n_div = np.where(red.num_estaciones > 0, red.num_estaciones, 1)
+    estatica = np.where(red.es_bajada, red.altura / n_div, columnas['z_estacion'][0])
+    perdidas = columnas['perdidas_friccion_colebrook'] + columnas['perdidas_menores']
+    recibida = np.nan_to_num(columnas['cabeza_gravedad_recibida'])
+    return {
+        'Q': Q,
+        'tramos': red.numeros,
+        'num_estaciones': red.num_estaciones,
+        'estatica': estatica,
+        'perdidas': perdidas,
+        'carga_sistema': estatica + perdidas - recibida,
+        'carga_estacion': columnas['carga_estacion'],
+        'carga_tramo': columnas['carga_total'],
+    }
+
+# =============================================================================
+# PUNTO DE OPERACIÓN (CURVA DE BOMBA ∩ CURVA DEL SISTEMA)
+# =============================================================================
+
+# Caudal mínimo del intervalo de búsqueda (m³/s): evita Re = 0 en Colebrook
+Q_MIN_OPERACION = 1e-6
+
+
+def _carga_sistema_estaciones(bombas, Q, D, rho, mu, epsilon, metodo_friccion) -> np.ndarray:
+    """
+    Carga que exige el sistema a cada estación con su propio caudal Q (n,).
+    
+    Usa el mismo núcleo que calcular_sistema_completo (_evaluar_red),
+    incluida la cabeza que T7 transfiere a T8 con ese caudal.
+    """
+    from core.tramos import obtener_red_tramos
+    
+    columnas = _evaluar_red(obtener_red_tramos(), Q, D, rho, mu, epsilon, metodo_friccion)
+    return columnas['carga_estacion'][np.arange(bombas.n_estaciones), bombas.indice_tramo]
+
+
+@perfilar()
+def punto_operacion(
+    bombas,
+    D: float = 0.1541,
+    rho: float = 998.0,
+    mu: float = 0.001,
+    epsilon: float = 0.000046,
+    metodo_friccion: str = 'colebrook',
+    tolerancia: float = 1e-9,
+    max_iter: int = 100,
+) -> pd.DataFrame:
+    """
+    Caudal real de cada estación: raíz de H_bomba(Q) − H_sistema(Q) = 0.
+    
+    Cada estación bombea de un tanque al siguiente, así que su punto de
+    operación es independiente de las demás. Todas se resuelven a la vez
+    con regula falsi (variante de Illinois), vectorizada:
+    
+        Q_c = Q_b − F_b·(Q_b − Q_a)/(F_b − F_a)
+    
+    El intervalo [Q_MIN_OPERACION, Q_alto] se abre duplicando Q_alto hasta
+    que el sistema supera a la bomba. Si la bomba no vence la carga
+    estática (F < 0 ya en Q_MIN_OPERACION) la estación queda en Q = 0; si
+    tras 60 duplicaciones la bomba sigue por encima del sistema se lanza
+    ValueError. Cuando F_b = F_a la secante no está definida y ese paso se
+    hace por bisección.
+    
+    Parámetros:
+        bombas: BombasEstaciones (instalar_bombas o bombas_diseno)
+        D, rho, mu, epsilon: tubería y fluido
+        metodo_friccion: método de Colebrook (ver METODOS_FRICCION)
+        tolerancia: |H_bomba − H_sistema| admisible (m)
+        max_iter: iteraciones máximas
+    
+    Retorna DataFrame con una fila por estación: tramo, estacion, bomba,
+    Q (m³/s), carga (m), eficiencia, potencia_kw (hidráulica, ρgQH),
+    potencia_eje_kw (ρgQH/η), iteraciones y convergio.
+    """
+    n = bombas.n_estaciones
+    
+    def residuo(Q):
+        return bombas.carga(Q) - _carga_sistema_estaciones(
+            bombas, Q, D, rho, mu, epsilon, metodo_friccion
+        )
+    
+    a = np.full(n, Q_MIN_OPERACION)
+    Fa = residuo(a)
+    sin_flujo = Fa <= 0
+    
+    b = np.full(n, 0.01)
+    Fb = residuo(b)
+    for _ in range(60):
+        abrir = (Fb > 0) & ~sin_flujo
+        if not abrir.any():
+            break
+        a, Fa = np.where(abrir, b, a), np.where(abrir, Fb, Fa)
+        b = np.where(abrir, 2 * b, b)
+        Fb = residuo(b)
+    
+    sin_intervalo = (Fb > 0) & ~sin_flujo
+    if sin_intervalo.any():
+        raise ValueError(
+            "La curva de la bomba no corta la del sistema (H_bomba > H_sistema "
+            f"hasta Q = {b.max():.3g} m³/s) en: "
+            f"{', '.join(np.asarray(bombas.nombres)[sin_intervalo])}"
+        )
+    
+    iteraciones = np.zeros(n, dtype=np.int64)
+    activo = ~sin_flujo & (np.abs(Fb) > tolerancia)
+    for _ in range(max_iter):
+        if not activo.any():
+            break
+        # Secante degenerada (F_b = F_a): paso de bisección
+        denominador = Fb - Fa
+        secante = denominador != 0
+        c = np.where(
+            secante,
+            b - Fb * (b - a) / np.where(secante, denominador, 1.0),
+            0.5 * (a + b),
+        )
+        Fc = residuo(c)
+        cambia = Fc * Fb < 0
+        a = np.where(activo & cambia, b, a)
+        Fa = np.where(activo & cambia, Fb, np.where(activo, Fa / 2, Fa))
+        b = np.where(activo, c, b)
+        Fb = np.where(activo, Fc, Fb)
+        iteraciones += activo
+        activo &= (np.abs(Fc) > tolerancia) & (np.abs(b - a) > 1e-14)
+    Q = np.where(sin_flujo, 0.0, b)
+    F = np.where(sin_flujo, 0.0, Fb)
+    
+    H = bombas.carga(Q)
+    eta = bombas.eficiencia(Q)
+    P_kw = potencia_bomba(rho, Q, H)
+    P_eje = np.where(eta > 0, P_kw / np.where(eta > 0, eta, 1.0), 0.0)
+    return pd.DataFrame({
+        'tramo': bombas.tramo,
+        'estacion': bombas.estacion,
+        'bomba': bombas.nombres,
+        'Q': Q,
+        'carga': np.where(sin_flujo, bombas.carga(0.0), H),
+        'eficiencia': eta,
+        'potencia_kw': P_kw,
+        'potencia_eje_kw': P_eje,
+        'iteraciones': iteraciones,
+        'convergio': sin_flujo | (np.abs(F) <= tolerancia),
+    })
@@ -0,0 +1,421 @@
+"""
+perfil.py — Perfil piezométrico del sistema (EGL, HGL y presión).
+
+Calcula, a lo largo de toda la conducción, la distancia acumulada, la
+elevación de la tubería, la línea de energía (EGL), la línea de gradiente
+hidráulico (HGL = EGL − hv) y la presión manométrica (HGL − z), separado
+de la presentación: el mapa piezométrico, las verificaciones de
+cavitación y las exportaciones usan el mismo cálculo.
+
+La marcha de energía se resuelve con sumas acumuladas por estación:
+
+    E_inicio[s] = E_base[seg] + Σ (H_bomba − hf − hm)   (estaciones previas del segmento)
+    E(φ)        = E_inicio + H_bomba − hm − hf·φ          (φ ∈ [0, 1] fracción de la estación)
+
+Cada tanque rompe-presión abre un segmento nuevo con E_base = z + hv
+(la EGL se reinicia a la cota de la superficie libre del tanque).
+"""
+
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from core.perfilado import perfilar
+
+
+# Pérdida mínima (m) para dibujar el escalón de un tanque rompe-presión
+DISIPACION_MINIMA_TANQUE = 0.01
+
+
+def _estaciones(resultados: dict, red) -> dict:
+    """
+    Aplana los tramos en estaciones (una fila por estación de bombeo /
+    sub-tramo) con su geometría y pérdidas, en el orden del recorrido.
+    """
+    n_est = np.array([resultados[t]['num_estaciones'] for t in red.numeros.tolist()])
+    n_div = np.where(n_est > 0, n_est, 1)
+    tramo = np.repeat(np.arange(red.n_tramos), n_est)
+
+    def por_tramo(clave):
+        return np.array([resultados[t][clave] for t in red.numeros.tolist()], dtype=float)[tramo]
+
+    es_bajada = np.array([resultados[t]['es_bajada'] for t in red.numeros.tolist()])[tramo]
+    dist_sub = (red.distancia / n_div)[tramo]
+    z_est = (red.altura / n_div)[tramo]
+
+    # Posición (distancia y cota) al inicio de cada estación
+    x0 = np.concatenate(([0.0], np.cumsum(dist_sub)[:-1]))
+    z0 = np.concatenate(([0.0], np.cumsum(z_est)[:-1]))
+
+    return {
+        'tramo': tramo,
+        'numero_tramo': red.numeros[tramo],
+        'estacion': np.arange(tramo.size) - np.repeat(np.cumsum(n_est) - n_est, n_est),
+        'num_estaciones': n_est[tramo],
+        'x0': x0,
+        'z0': z0,
+        'dist_sub': dist_sub,
+        'z_est': z_est,
+        'hf': por_tramo('perdidas_friccion_colebrook'),
+        'hm': por_tramo('perdidas_menores'),
+        'carga_bomba': np.where(es_bajada, 0.0, por_tramo('carga_estacion')),
+        'potencia_kw': por_tramo('potencia_kw'),
+        'longitud': por_tramo('longitud_estacion'),
+        'n_tramo': n_est,
+        'es_bajada': es_bajada,
+        'tanque': es_bajada & red.tanque_rompe_presion[tramo],
+    }
+
+
+@lru_cache(maxsize=1)
+def _quiebres_sub_segmentos() -> dict:
+    """
+    Vértices de la poligonal de `sub_segmentos` de cada tramo que los tenga.
+
+    Retorna {num_tramo: (u, dz)}: distancia horizontal acumulada desde el
+    inicio del tramo y cota relativa a ese inicio (la 'altura' de cada
+    sub-segmento es un nivel, como en el perfil topográfico). Los
+    sub-segmentos sin altura se omiten. Solo se usa la poligonal si cierra
+    en (distancia, altura) del tramo; si no, el tramo se trata como recta.
+    """
+    from core.tramos import obtener_definicion_tramos
+
+    quiebres = {}
+    for num, defn in obtener_definicion_tramos().items():
+        segmentos = defn.get('sub_segmentos')
+        if not segmentos:
+            continue
+        u, dz = [], []
+        acum = 0.0
+        for seg in segmentos:
+            if seg['altura'] is None:
+                continue
+            acum += seg['distancia']
+            u.append(acum)
+            dz.append(float(seg['altura']))
+        if u and np.isclose(u[-1], defn['distancia']) and np.isclose(dz[-1], defn['altura']):
+            quiebres[num] = (np.array(u), np.array(dz))
+    return quiebres
+
+
+def poligonal_tramo(num_tramo: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Vértices (u, dz) de la tubería de un tramo, relativos a su inicio.
+
+    u es la distancia horizontal y dz la cota; incluye el punto inicial
+    (0, 0). Usa la poligonal de sub_segmentos si el tramo la tiene y, si
+    no, la recta hasta (distancia, altura).
+    """
+    from core.tramos import obtener_definicion_tramos
+
+    quiebres = _quiebres_sub_segmentos()
+    if num_tramo in quiebres:
+        u, dz = quiebres[num_tramo]
+    else:
+        defn = obtener_definicion_tramos()[num_tramo]
+        u, dz = np.array([defn['distancia']]), np.array([float(defn['altura'])])
+    return np.concatenate(([0.0], u)), np.concatenate(([0.0], dz))
+
+
+def _poligonal_red(red) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Poligonal (x, z) de toda la conducción y los quiebres interiores.
+
+    Retorna (X, Z, tramo_q, u_q, z_q): vértices globales para interpolar la
+    cota, y por cada quiebre de sub_segmentos el índice de tramo, la
+    distancia dentro del tramo y la cota absoluta.
+    """
+    x_tramo = np.concatenate(([0.0], np.cumsum(red.distancia)))
+    z_tramo = np.concatenate(([0.0], np.cumsum(red.altura)))
+    quiebres = _quiebres_sub_segmentos()
+
+    X, Z = [np.zeros(1)], [np.zeros(1)]
+    tramo_q, u_q, z_q = [], [], []
+    for k, num in enumerate(red.numeros.tolist()):
+        if num in quiebres:
+            u, dz = quiebres[num]
+            tramo_q.append(np.full(u.size, k))
+            u_q.append(u)
+            z_q.append(z_tramo[k] + dz)
+        else:
+            u, dz = red.distancia[k:k + 1], red.altura[k:k + 1]
+        X.append(x_tramo[k] + u)
+        Z.append(z_tramo[k] + dz)
+
+    def unir(partes, dtype=float):
+        return np.concatenate(partes).astype(dtype) if partes else np.zeros(0, dtype)
+
+    return (
+        unir(X), unir(Z),
+        unir(tramo_q, np.int64), unir(u_q), unir(z_q),
+    )
+
+
+@perfilar()
+def calcular_perfil_piezometrico(
+    resultados: dict,
+    puntos_por_estacion: int = 5,
+    puntos_por_metro: float | None = None,
+    max_puntos: int | None = None,
+) -> dict:
+    """
+    Perfil piezométrico del sistema como arreglos NumPy.
+
+    Resolución: cada estación se muestrea con `puntos_por_estacion`
+    puntos equiespaciados o, si se da `puntos_por_metro`, con
+    ceil(L_estación · puntos_por_metro) (L = longitud de tubería). Además
+    siempre se incluyen los quiebres de `sub_segmentos` (p. ej. el paso
+    subterráneo de T8) y, al inicio de cada estación, el punto tras el
+    escalón de la pérdida menor (E = E_bombeo − hm). Entre esos puntos
+    estructurales la fricción se reparte linealmente y la tubería es
+    recta, así que EGL, HGL y presión son lineales y sus extremos caen
+    en ellos: la presión mínima no depende de la resolución.
+
+    Parámetros:
+        resultados: salida de calcular_sistema_completo
+        puntos_por_estacion: puntos P por estación (si no hay puntos_por_metro)
+        puntos_por_metro: resolución por longitud de tubería (opcional)
+        max_puntos: si el perfil tiene más puntos, se reduce con
+            decimar_perfil (conserva quiebres y mínimos/máximos de presión)
+
+    Retorna dict con:
+        distancia, elevacion, egl, hgl, presion: arreglos (M,) del perfil,
+            empezando en la captación (x = 0, E = 0: superficie del río)
+        tramo: número de tramo de cada punto (0 en la captación)
+        quiebre: True en los puntos estructurales (captación, inicio tras
+            la pérdida menor y fin de cada estación, quiebres de
+            sub_segmentos, tanques)
+        carga_cinetica: hv usada para la HGL (m)
+        bombas: dict de arreglos por estación de bombeo (distancia,
+            energia_antes, energia_despues, carga, potencia_kw, tramo,
+            estacion, num_estaciones)
+        tanques: dict de arreglos por tanque rompe-presión (distancia,
+            energia, disipacion, tramo, estacion, num_estaciones)
+        transferencias: dict de arreglos por descarga a gravedad sin tanque
+            (distancia, energia, cabeza_disponible, tramo, tramo_receptor)
+    """
+    from core.tramos import obtener_red_tramos
+
+    red = obtener_red_tramos()
+    est = _estaciones(resultados, red)
+    hv = float(resultados[int(red.numeros[0])]['carga_cinetica'])
+    n_estaciones = est['tramo'].size
+
+    # === Energía al inicio de cada estación (suma acumulada segmentada) ===
+    neto = est['carga_bomba'] - est['hf'] - est['hm']
+    acumulado = np.concatenate(([0.0], np.cumsum(neto)))       # exclusivo
+    x_fin = est['x0'] + est['dist_sub']
+    z_fin = est['z0'] + est['z_est']
+
+    # Un tanque al final de la estación s reinicia el segmento en s + 1
+    segmento = np.concatenate(([0], np.cumsum(est['tanque'])[:-1]))
+    inicio_seg = np.concatenate(([0], np.flatnonzero(est['tanque']) + 1))
+    base_seg = np.concatenate(([0.0], z_fin[est['tanque']] + hv))
+    E_inicio = (
+        base_seg[segmento]
+        + acumulado[:-1] - acumulado[inicio_seg[segmento]]
+    )
+    E_bombeo = E_inicio + est['carga_bomba']
+    E_fin = E_bombeo - est['hm'] - est['hf']
+    disipacion = E_fin - (z_fin + hv)
+
+    # === Muestras: (estación, fracción) equiespaciadas por estación ===
+    if puntos_por_metro is not None:
+        if puntos_por_metro <= 0:
+            raise ValueError("puntos_por_metro debe ser > 0")
+        n_pts = np.maximum(1, np.ceil(est['longitud'] * puntos_por_metro)).astype(np.int64)
+    else:
+        if int(puntos_por_estacion) < 1:
+            raise ValueError("puntos_por_estacion debe ser ≥ 1")
+        n_pts = np.full(n_estaciones, int(puntos_por_estacion), dtype=np.int64)
+    s_uni = np.repeat(np.arange(n_estaciones), n_pts)
+    j_uni = np.arange(s_uni.size) - np.repeat(np.cumsum(n_pts) - n_pts, n_pts) + 1
+    f_uni = j_uni / n_pts[s_uni]
+
+    # Quiebres de sub_segmentos, asignados a su estación dentro del tramo
+    X, Z, tramo_q, u_q, z_q = _poligonal_red(red)
+    primera_est = np.cumsum(est['n_tramo']) - est['n_tramo']
+    dist_sub_q = (red.distancia / np.maximum(est['n_tramo'], 1))[tramo_q]
+    e_q = np.clip(np.ceil(u_q / dist_sub_q) - 1, 0, est['n_tramo'][tramo_q] - 1).astype(np.int64)
+    f_q = (u_q - e_q * dist_sub_q) / dist_sub_q
+    dentro = f_q > 0
+    s_q, f_q, z_q = (primera_est[tramo_q] + e_q)[dentro], f_q[dentro], z_q[dentro]
+
+    # Una muestra equiespaciada que coincide con un quiebre se descarta
+    clave_q = np.round(s_q + f_q, 12)
+    repetida = np.isin(np.round(s_uni + f_uni, 12), clave_q)
+    s_uni, f_uni = s_uni[~repetida], f_uni[~repetida]
+
+    # Escalón vertical del tanque (si disipa algo apreciable) como punto extra
+    escalon = np.flatnonzero(
+        est['tanque'] & (np.abs(disipacion) > DISIPACION_MINIMA_TANQUE)
+    )
+
+    # Inicio de cada estación (φ = 0) con la pérdida menor ya aplicada: el
+    # punto más bajo de la EGL en ese escalón
+    s_ini = np.arange(n_estaciones)
+
+    # Orden: estación, fracción y tipo (muestra/quiebre = 0, tanque = 1)
+    s_pt = np.concatenate((s_ini, s_uni, s_q, escalon))
+    f_pt = np.concatenate((np.zeros(n_estaciones), f_uni, f_q, np.ones(escalon.size)))
+    tipo = np.concatenate((
+        np.zeros(n_estaciones + s_uni.size + s_q.size, dtype=np.int8),
+        np.ones(escalon.size, dtype=np.int8),
+    ))
+    z_pt = np.concatenate((
+        np.interp(est['x0'], X, Z),
+        np.interp(est['x0'][s_uni] + est['dist_sub'][s_uni] * f_uni, X, Z),
+        z_q,
+        z_fin[escalon],
+    ))
+    quiebre = np.concatenate((
+        np.ones(n_estaciones, dtype=bool),
+        f_uni == 1.0,
+        np.ones(s_q.size + escalon.size, dtype=bool),
+    ))
+    orden = np.lexsort((tipo, f_pt, s_pt))
+    s_pt, f_pt, tipo, z_pt, quiebre = (
+        s_pt[orden], f_pt[orden], tipo[orden], z_pt[orden], quiebre[orden]
+    )
+
+    x_pt = est['x0'][s_pt] + est['dist_sub'][s_pt] * f_pt
+    E_pt = np.where(
+        tipo == 1,
+        z_fin[s_pt] + hv,
+        E_bombeo[s_pt] - est['hm'][s_pt] - est['hf'][s_pt] * f_pt,
+    )
+
+    # En la captación (superficie del río) v = 0: HGL = EGL = 0
+    distancia = np.concatenate(([0.0], x_pt))
+    elevacion = np.concatenate(([0.0], z_pt))
+    egl = np.concatenate(([0.0], E_pt))
+    hgl = np.concatenate(([0.0], E_pt - hv))
+    perfil_puntos = {
+        'distancia': distancia,
+        'elevacion': elevacion,
+        'egl': egl,
+        'hgl': hgl,
+        'presion': hgl - elevacion,
+        'tramo': np.concatenate(([0], est['numero_tramo'][s_pt])),
+        'quiebre': np.concatenate(([True], quiebre)),
+    }
+    if max_puntos is not None:
+        perfil_puntos = decimar_perfil(perfil_puntos, max_puntos)
+
+    # === Eventos: bombas, tanques y transferencias por gravedad ===
+    bombea = ~est['es_bajada']
+    bombas = {
+        'distancia': est['x0'][bombea],
+        'energia_antes': E_inicio[bombea],
+        'energia_despues': E_bombeo[bombea],
+        'carga': est['carga_bomba'][bombea],
+        'potencia_kw': est['potencia_kw'][bombea],
+        'tramo': est['numero_tramo'][bombea],
+        'estacion': est['estacion'][bombea],
+        'num_estaciones': est['num_estaciones'][bombea],
+    }
+    tq = est['tanque']
+    tanques = {
+        'distancia': x_fin[tq],
+        'energia': E_fin[tq],
+        'disipacion': disipacion[tq],
+        'tramo': est['numero_tramo'][tq],
+        'estacion': est['estacion'][tq],
+        'num_estaciones': est['num_estaciones'][tq],
+    }
+    libre = est['es_bajada'] & ~est['tanque']
+    receptor = {int(f): int(red.numeros[k]) for k, f in enumerate(red.fuente_gravedad) if f >= 0}
+    transferencias = {
+        'distancia': x_fin[libre],
+        'energia': E_fin[libre],
+        'cabeza_disponible': E_fin[libre] - hv - z_fin[libre],
+        'tramo': est['numero_tramo'][libre],
+        'tramo_receptor': np.array(
+            [receptor.get(int(k), int(n) + 1)
+             for k, n in zip(est['tramo'][libre], est['numero_tramo'][libre])],
+            dtype=np.int64,
+        ),
+    }
+
+    return {
+        **perfil_puntos,
+        'carga_cinetica': hv,
+        'bombas': bombas,
+        'tanques': tanques,
+        'transferencias': transferencias,
+    }
+
+
+# Arreglos del perfil con un valor por punto (los que recorta decimar_perfil)
+CAMPOS_POR_PUNTO = ('distancia', 'elevacion', 'egl', 'hgl', 'presion', 'tramo', 'quiebre')
+
+
+def decimar_perfil(perfil: dict, max_puntos: int) -> dict:
+    """
+    Reduce el perfil a ~max_puntos conservando su forma.
+
+    Se conservan siempre los puntos estructurales ('quiebre'); el resto se
+    agrupa en cubetas consecutivas y de cada una se guardan los puntos de
+    presión mínima y máxima (decimación min/max), de modo que ningún
+    extremo local desaparece del gráfico. Si ya tiene ≤ max_puntos, se
+    retorna igual.
+    """
+    n = perfil['distancia'].size
+    if n <= max_puntos:
+        return perfil
+
+    quiebre = perfil['quiebre']
+    resto = np.flatnonzero(~quiebre)
+    n_cubetas = max(1, (max_puntos - int(quiebre.sum())) // 2)
+    conservar = quiebre.copy()
+    if resto.size:
+        # Cubetas de igual tamaño sobre los puntos no estructurales
+        ancho = -(-resto.size // n_cubetas)
+        relleno = n_cubetas * ancho - resto.size
+        presion = np.concatenate((perfil['presion'][resto], np.full(relleno, np.nan)))
+        presion = presion.reshape(n_cubetas, ancho)
+        base = np.arange(n_cubetas) * ancho
+        validas = ~np.all(np.isnan(presion), axis=1)
+        i_min = (base + np.nanargmin(np.where(np.isnan(presion), np.inf, presion), axis=1))[validas]
+        i_max = (base + np.nanargmax(np.where(np.isnan(presion), -np.inf, presion), axis=1))[validas]
+        conservar[resto[i_min]] = True
+        conservar[resto[i_max]] = True
+
+    return {
+        **perfil,
+        **{campo: perfil[campo][conservar] for campo in CAMPOS_POR_PUNTO if campo in perfil},
+    }
+
+
+def presion_minima(perfil: dict, solo_quiebres: bool = False) -> dict:
+    """
+    Punto de presión manométrica mínima del perfil.
+
+    Con solo_quiebres=True se busca solo entre los puntos estructurales,
+    donde cae el mínimo exacto del perfil lineal a trozos: el resultado
+    no depende de la resolución ni de la decimación.
+
+    Retorna dict con indice (en el perfil completo), distancia, presion
+    (m.c.a.), tramo y cavitacion (True si la presión es negativa).
+    """
+    if solo_quiebres:
+        candidatos = np.flatnonzero(perfil['quiebre'])
+        i = int(candidatos[np.argmin(perfil['presion'][candidatos])])
+    else:
+        i = int(np.argmin(perfil['presion']))
+    return {
+        'indice': i,
+        'distancia': float(perfil['distancia'][i]),
+        'presion': float(perfil['presion'][i]),
+        'tramo': int(perfil['tramo'][i]),
+        'cavitacion': bool(perfil['presion'][i] < 0),
+    }
+
+
+def perfil_a_dataframe(perfil: dict) -> pd.DataFrame:
+    """Perfil piezométrico como DataFrame (una fila por punto), para exportar."""
+    return pd.DataFrame({
+        clave: perfil[clave]
+        for clave in ('distancia', 'elevacion', 'egl', 'hgl', 'presion', 'tramo')
+    })
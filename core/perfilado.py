@@ -0,0 +1,185 @@
+"""
+perfilado.py — Instrumentación opcional de tiempos y memoria por etapa.
+
+Registra el tiempo de pared (y, si se pide, la memoria asignada) de cada
+etapa de una ejecución, p. ej. un rerun de Streamlit. Las etapas se
+marcan con el gestor de contexto `etapa` o el decorador `perfilar`;
+cuando no hay una traza activa su costo es una sola consulta a un
+ContextVar.
+
+La traza se exporta en el formato Trace Event de Chrome
+({"traceEvents": [...]}), que abren chrome://tracing, Perfetto y
+speedscope como gráfico de llama.
+"""
+
+import functools
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+
+# Traza activa en el contexto actual (cada rerun de Streamlit tiene su hilo)
+_traza_actual: ContextVar['Traza | None'] = ContextVar('traza_actual', default=None)
+
+# tracemalloc es global al proceso: se cuentan las trazas que lo usan y
+# solo se detiene cuando termina la última, si lo arrancó este módulo
+_candado_tracemalloc = threading.Lock()
+_trazas_con_memoria = 0
+_tracemalloc_propio = False
+
+
+class Traza:
+    """
+    Eventos medidos durante una ejecución.
+
+    Cada evento es un dict con: nombre, inicio_s (relativo al inicio de
+    la traza), duracion_s, profundidad y, si se mide memoria,
+    memoria_neta_kib (asignación neta de la etapa según tracemalloc).
+    """
+
+    def __init__(self, nombre: str, medir_memoria: bool = False):
+        self.nombre = nombre
+        self.medir_memoria = medir_memoria
+        self.eventos: list[dict] = []
+        self.inicio = time.perf_counter()
+        self.duracion_s: float | None = None
+        self.memoria_pico_kib: float | None = None
+        self._profundidad = 0
+
+    def resumen(self) -> list[dict]:
+        """Totales por nombre de etapa (llamadas, tiempo, memoria), del más lento al más rápido."""
+        totales: dict[str, dict] = {}
+        for ev in self.eventos:
+            t = totales.setdefault(ev['nombre'], {
+                'etapa': ev['nombre'], 'llamadas': 0, 'tiempo_ms': 0.0,
+                'memoria_neta_kib': 0.0 if self.medir_memoria else None,
+            })
+            t['llamadas'] += 1
+            t['tiempo_ms'] += ev['duracion_s'] * 1000.0
+            if self.medir_memoria:
+                t['memoria_neta_kib'] += ev.get('memoria_neta_kib', 0.0)
+        return sorted(totales.values(), key=lambda t: t['tiempo_ms'], reverse=True)
+
+    def a_chrome_trace(self) -> dict:
+        """Exporta la traza en formato Trace Event (tiempos en µs)."""
+        eventos = [{
+            'name': self.nombre, 'ph': 'X', 'pid': 1, 'tid': 1, 'ts': 0.0,
+            'dur': (self.duracion_s or 0.0) * 1e6,
+            'args': {'memoria_pico_kib': self.memoria_pico_kib},
+        }]
+        for ev in self.eventos:
+            args = {}
+            if 'memoria_neta_kib' in ev:
+                args['memoria_neta_kib'] = ev['memoria_neta_kib']
+            eventos.append({
+                'name': ev['nombre'], 'ph': 'X', 'pid': 1, 'tid': 1,
+                'ts': ev['inicio_s'] * 1e6, 'dur': ev['duracion_s'] * 1e6,
+                'args': args,
+            })
+        return {'traceEvents': eventos, 'displayTimeUnit': 'ms'}
+
+
+def activar_traza(nombre: str = 'rerun', medir_memoria: bool = False) -> Traza:
+    """
+    Inicia una traza y la deja activa en el contexto actual.
+
+    Con medir_memoria=True arranca tracemalloc si no estaba activo. Eso
+    ralentiza todo el proceso, no solo esta sesión, y con varias sesiones
+    concurrentes las cifras se mezclan: conviene reservarlo para un
+    interruptor del operador, no para cada usuario. Toda traza activada
+    debe cerrarse con finalizar_traza (o usar el gestor `traza`), o
+    tracemalloc seguirá encendido.
+    """
+    global _trazas_con_memoria, _tracemalloc_propio
+    traza = Traza(nombre, medir_memoria)
+    if medir_memoria:
+        with _candado_tracemalloc:
+            if _trazas_con_memoria == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                _tracemalloc_propio = True
+            _trazas_con_memoria += 1
+            tracemalloc.reset_peak()
+    _traza_actual.set(traza)
+    return traza
+
+
+def finalizar_traza(traza: Traza) -> Traza:
+    """Cierra la traza: fija su duración total y la desactiva (idempotente)."""
+    global _trazas_con_memoria, _tracemalloc_propio
+    if traza.duracion_s is not None:
+        return traza
+    traza.duracion_s = time.perf_counter() - traza.inicio
+    if traza.medir_memoria:
+        with _candado_tracemalloc:
+            if tracemalloc.is_tracing():
+                traza.memoria_pico_kib = tracemalloc.get_traced_memory()[1] / 1024.0
+            _trazas_con_memoria -= 1
+            if _trazas_con_memoria == 0 and _tracemalloc_propio:
+                tracemalloc.stop()
+                _tracemalloc_propio = False
+    if _traza_actual.get() is traza:
+        _traza_actual.set(None)
+    return traza
+
+
+@contextmanager
+def traza(nombre: str = 'rerun', medir_memoria: bool = False):
+    """Gestor de contexto: activa una traza durante el bloque y la devuelve."""
+    t = activar_traza(nombre, medir_memoria)
+    try:
+        yield t
+    finally:
+        finalizar_traza(t)
+
+
+@contextmanager
+def etapa(nombre: str):
+    """Mide el bloque como una etapa de la traza activa (no hace nada si no hay)."""
+    traza_activa = _traza_actual.get()
+    if traza_activa is None:
+        yield
+        return
+
+    medir_memoria = traza_activa.medir_memoria and tracemalloc.is_tracing()
+    mem_inicio = tracemalloc.get_traced_memory()[0] if medir_memoria else 0
+    profundidad = traza_activa._profundidad
+    traza_activa._profundidad += 1
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        t1 = time.perf_counter()
+        traza_activa._profundidad = profundidad
+        evento = {
+            'nombre': nombre,
+            'inicio_s': t0 - traza_activa.inicio,
+            'duracion_s': t1 - t0,
+            'profundidad': profundidad,
+        }
+        if medir_memoria:
+            evento['memoria_neta_kib'] = (
+                tracemalloc.get_traced_memory()[0] - mem_inicio
+            ) / 1024.0
+        traza_activa.eventos.append(evento)
+
+
+def perfilar(nombre: str | None = None):
+    """
+    Decorador: mide cada llamada a la función como una etapa.
+
+    Por defecto la etapa se llama como el módulo y la función
+    (p. ej. 'core.hidraulica.calcular_sistema_completo').
+    """
+    def decorador(funcion):
+        nombre_etapa = nombre or f'{funcion.__module__}.{funcion.__qualname__}'
+
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if _traza_actual.get() is None:
+                return funcion(*args, **kwargs)
+            with etapa(nombre_etapa):
+                return funcion(*args, **kwargs)
+        return envoltura
+    return decorador
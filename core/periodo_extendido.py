@@ -0,0 +1,372 @@
+"""
+periodo_extendido.py — Simulación en periodo extendido (tanques y patrones).
+
+Avanza en el tiempo una RedHidraulica con tanques de almacenamiento: en
+cada paso Δt resuelve la red (resolver_red) con los niveles actuales
+como cargas fijas y la demanda del patrón horario, y luego integra el
+nivel de cada tanque (Euler explícito):
+
+    h_tanque(t + Δt) = h_tanque(t) + (Q_entra − Q_sale − demanda)·Δt / A
+
+Controles de bomba por nivel con histéresis (encender / apagar), y
+límites de tanque como en EPANET: un tanque vacío cierra los enlaces
+por los que sale agua y uno lleno los enlaces por los que entra.
+
+Cada paso parte de la solución del anterior (caudales, factores de
+fricción y estados de enlace), así que suele converger en pocas
+iteraciones del gradiente global.
+"""
+
+from dataclasses import dataclass, replace
+
+import numpy as np
+import pandas as pd
+
+from core.hidraulica import g
+from core.perfilado import perfilar
+from core.red import ABIERTO, BOMBA, CERRADO, RedHidraulica, red_desde_tramos, resolver_red
+
+# Multiplicadores horarios de demanda de la planta (media = 1), hora 0..23
+PATRON_DEMANDA_24H = (
+    0.60, 0.55, 0.50, 0.50, 0.55, 0.70,
+    0.95, 1.20, 1.35, 1.35, 1.30, 1.25,
+    1.20, 1.25, 1.30, 1.30, 1.25, 1.20,
+    1.15, 1.10, 1.05, 0.95, 0.80, 0.65,
+)
+
+# Tanques de la conducción (m², m): receptores de cada estación y planta
+AREA_TANQUE_RECEPTOR = 12.0
+ALTURA_TANQUE_RECEPTOR = 3.0
+AREA_TANQUE_PLANTA = 60.0
+ALTURA_TANQUE_PLANTA = 4.0
+
+# Holgura para considerar un tanque en su límite (m)
+TOL_NIVEL = 1e-9
+
+
+@dataclass(frozen=True)
+class TanquesRed:
+    """
+    Tanques de almacenamiento de una red, como estructura de arreglos.
+
+    Atributos (uno por tanque):
+        nodo: índice del nodo de carga fija en la RedHidraulica
+        area: área transversal (m²)
+        nivel_inicial, nivel_min, nivel_max: nivel de agua sobre la
+            cota del nodo (m)
+    """
+    nodo: np.ndarray
+    area: np.ndarray
+    nivel_inicial: np.ndarray
+    nivel_min: np.ndarray
+    nivel_max: np.ndarray
+
+    @property
+    def n_tanques(self) -> int:
+        return len(self.nodo)
+
+
+@dataclass(frozen=True)
+class ControlesBomba:
+    """
+    Controles de bomba por nivel de tanque (histéresis).
+
+    Atributos (uno por control):
+        enlace: índice de la bomba
+        tanque: índice del tanque en TanquesRed
+        encender, apagar: niveles (m). Si apagar > encender la bomba llena
+            el tanque (se apaga al subir); si apagar < encender lo vacía
+            (se apaga al bajar). Una bomba con varios controles funciona
+            solo si todos la dejan encendida.
+    """
+    enlace: np.ndarray
+    tanque: np.ndarray
+    encender: np.ndarray
+    apagar: np.ndarray
+
+    @property
+    def n_controles(self) -> int:
+        return len(self.enlace)
+
+
+def construir_tanques(red: RedHidraulica, tanques: list[dict]) -> TanquesRed:
+    """
+    TanquesRed a partir de dicts {'nodo', 'area', 'nivel_inicial',
+    'nivel_min' (0), 'nivel_max'}.
+
+    Lanza ValueError si el nodo no es de carga fija o los niveles no
+    cumplen nivel_min ≤ nivel_inicial ≤ nivel_max.
+    """
+    nodos = []
+    for t in tanques:
+        k = red.indice_nodo(t['nodo'])
+        if not red.es_fijo[k]:
+            raise ValueError(f"El nodo {t['nodo']!r} no es de carga fija: no puede ser tanque")
+        if t['area'] <= 0:
+            raise ValueError(f"Área de tanque no positiva en {t['nodo']!r}: {t['area']}")
+        if not t.get('nivel_min', 0.0) <= t['nivel_inicial'] <= t['nivel_max']:
+            raise ValueError(f"Niveles inconsistentes en el tanque {t['nodo']!r}")
+        nodos.append(k)
+    return TanquesRed(
+        nodo=np.array(nodos, dtype=np.int64),
+        area=np.array([t['area'] for t in tanques], dtype=float),
+        nivel_inicial=np.array([t['nivel_inicial'] for t in tanques], dtype=float),
+        nivel_min=np.array([t.get('nivel_min', 0.0) for t in tanques], dtype=float),
+        nivel_max=np.array([t['nivel_max'] for t in tanques], dtype=float),
+    )
+
+
+def construir_controles(
+    red: RedHidraulica, tanques: TanquesRed, controles: list[dict],
+) -> ControlesBomba:
+    """
+    ControlesBomba a partir de dicts {'bomba', 'tanque' (nombre del
+    nodo), 'encender', 'apagar'}.
+    """
+    enlaces, indices = [], []
+    posicion = {int(n): i for i, n in enumerate(tanques.nodo)}
+    for c in controles:
+        k = red.indice_enlace(c['bomba'])
+        if red.tipo[k] != BOMBA:
+            raise ValueError(f"El enlace {c['bomba']!r} no es una bomba")
+        nodo = red.indice_nodo(c['tanque'])
+        if nodo not in posicion:
+            raise ValueError(f"El nodo {c['tanque']!r} no es un tanque")
+        if c['encender'] == c['apagar']:
+            raise ValueError(f"Control de {c['bomba']!r} sin histéresis (encender == apagar)")
+        enlaces.append(k)
+        indices.append(posicion[nodo])
+    return ControlesBomba(
+        enlace=np.array(enlaces, dtype=np.int64),
+        tanque=np.array(indices, dtype=np.int64),
+        encender=np.array([c['encender'] for c in controles], dtype=float),
+        apagar=np.array([c['apagar'] for c in controles], dtype=float),
+    )
+
+
+def _aplicar_controles(controles: ControlesBomba, nivel, encendida) -> np.ndarray:
+    """Nuevo estado de cada control según el nivel de su tanque."""
+    h = nivel[controles.tanque]
+    llena = controles.apagar > controles.encender
+    apagar = np.where(llena, h >= controles.apagar, h <= controles.apagar)
+    encender = np.where(llena, h <= controles.encender, h >= controles.encender)
+    return (encendida | encender) & ~apagar
+
+
+def _incidencia_tanques(red: RedHidraulica, tanques: TanquesRed) -> tuple[np.ndarray, ...]:
+    """
+    Extremos de enlace conectados a tanques: (enlace, tanque, signo), con
+    signo +1 si el caudal positivo del enlace entra al tanque y −1 si sale.
+    """
+    en_tanque = np.full(red.n_nodos, -1)
+    en_tanque[tanques.nodo] = np.arange(tanques.n_tanques)
+    t_hasta, t_desde = en_tanque[red.hasta], en_tanque[red.desde]
+    k_hasta, k_desde = np.flatnonzero(t_hasta >= 0), np.flatnonzero(t_desde >= 0)
+    return (
+        np.concatenate((k_hasta, k_desde)),
+        np.concatenate((t_hasta[k_hasta], t_desde[k_desde])),
+        np.concatenate((np.ones(k_hasta.size), -np.ones(k_desde.size))),
+    )
+
+
+@perfilar()
+def simular_periodo(
+    red: RedHidraulica,
+    tanques: TanquesRed,
+    controles: ControlesBomba | None = None,
+    patron=PATRON_DEMANDA_24H,
+    duracion_h: float = 24.0,
+    paso_min: float = 1.0,
+    rho: float = 998.0,
+    mu: float = 0.001,
+    metodo_friccion='colebrook',
+    tolerancia: float = 1e-4,
+) -> dict:
+    """
+    Simula la red durante `duracion_h` horas con pasos de `paso_min`.
+
+    Parámetros:
+        red: RedHidraulica con los tanques como nodos de carga fija
+        tanques: TanquesRed (construir_tanques)
+        controles: ControlesBomba (construir_controles), opcional
+        patron: multiplicadores de demanda, uno por hora (se repite);
+            escala todas las demandas de red.demanda. La demanda en un
+            nodo tanque se extrae directamente del tanque.
+        duracion_h, paso_min: horizonte (h) y paso de integración (min)
+        rho, mu, metodo_friccion: como en resolver_red
+        tolerancia: Σ|Δq|/Σ|q| de cada paso (EPANET usa 1e-3 por defecto);
+            partiendo del paso anterior suele bastar una iteración
+
+    Retorna dict con:
+        t_h: instantes (n_pasos + 1,) en horas
+        nivel: niveles de tanque (n_pasos + 1, n_tanques)
+        caudal: caudal por enlace en cada paso (n_pasos, n_enlaces)
+        carga: carga por nodo en cada paso (n_pasos, n_nodos)
+        encendida: estado de cada control (n_pasos, n_controles)
+        multiplicador: multiplicador de demanda de cada paso (n_pasos,)
+        energia_kwh: energía hidráulica por enlace, Σ ρ·g·Q·ΔH·Δt (solo bombas)
+        iteraciones: iteraciones del gradiente en cada paso (n_pasos,)
+        convergio: todos los pasos convergieron
+    """
+    if paso_min <= 0 or duracion_h <= 0:
+        raise ValueError("duracion_h y paso_min deben ser positivos")
+    if controles is None:
+        controles = construir_controles(red, tanques, [])
+    patron = np.asarray(patron, dtype=float)
+    dt = paso_min * 60.0
+    n_pasos = int(round(duracion_h * 60.0 / paso_min))
+    t_h = np.arange(n_pasos + 1) * paso_min / 60.0
+    multiplicador = patron[np.floor(t_h[:-1]).astype(np.int64) % patron.size]
+
+    nivel = tanques.nivel_inicial.copy()
+    demanda_tanque = red.demanda[tanques.nodo]
+    carga_fija = red.carga_fija.copy()
+    es_bomba = red.tipo == BOMBA
+    encendida = np.ones(controles.n_controles, dtype=bool)
+    cerrado_limite = np.zeros(red.n_enlaces, dtype=bool)
+    enlace_t, tanque_t, signo_t = _incidencia_tanques(red, tanques)
+
+    niveles = np.empty((n_pasos + 1, tanques.n_tanques))
+    niveles[0] = nivel
+    caudales = np.empty((n_pasos, red.n_enlaces))
+    cargas = np.empty((n_pasos, red.n_nodos))
+    encendidas = np.empty((n_pasos, controles.n_controles), dtype=bool)
+    iteraciones = np.zeros(n_pasos, dtype=np.int64)
+    convergio = True
+
+    solucion = None
+    q_abierto = np.full(red.n_enlaces, 1e-3)
+    for paso in range(n_pasos):
+        carga_fija[tanques.nodo] = red.cota[tanques.nodo] + nivel
+        demanda = red.demanda * multiplicador[paso]
+
+        # Controles por nivel
+        encendida = _aplicar_controles(controles, nivel, encendida)
+        apagada = np.zeros(red.n_enlaces, dtype=bool)
+        apagada[controles.enlace[~encendida]] = True
+
+        # Límites: se liberan los enlaces de tanques que dejaron su límite
+        vacio = nivel <= tanques.nivel_min + TOL_NIVEL
+        lleno = nivel >= tanques.nivel_max - TOL_NIVEL
+        en_limite = np.zeros(red.n_enlaces, dtype=bool)
+        en_limite[enlace_t[(vacio | lleno)[tanque_t]]] = True
+        cerrado_limite &= en_limite
+
+        for _ in range(3):
+            cerrados = apagada | cerrado_limite
+            semilla = {}
+            if solucion is not None:
+                estado = solucion['estado'].copy()
+                q = solucion['caudal'].copy()
+                # Enlaces que se reabren: parten abiertos con su último caudal
+                reabre = (estado == CERRADO) & ~cerrados & es_bomba
+                estado[reabre] = ABIERTO
+                q[reabre] = q_abierto[reabre]
+                semilla = {
+                    'q_inicial': q, 'f_inicial': solucion['f'], 'estado_inicial': estado,
+                }
+            solucion = resolver_red(
+                red, rho, mu, metodo_friccion,
+                demanda=demanda, carga_fija=carga_fija, cerrados=cerrados,
+                tolerancia=tolerancia, **semilla,
+            )
+            iteraciones[paso] += solucion['iteraciones']
+            convergio &= solucion['convergio']
+
+            # Tanque vacío que pierde agua o lleno que la gana: cerrar esos enlaces
+            entra = signo_t * solucion['caudal'][enlace_t]
+            viola = ((entra < 0) & vacio[tanque_t]) | ((entra > 0) & lleno[tanque_t])
+            nuevos = enlace_t[viola & ~cerrados[enlace_t]]
+            if not nuevos.size:
+                break
+            cerrado_limite[nuevos] = True
+
+        q = solucion['caudal']
+        abiertos = solucion['estado'] != CERRADO
+        q_abierto[abiertos] = np.where(np.abs(q[abiertos]) > 1e-6, q[abiertos], q_abierto[abiertos])
+        neto = (
+            np.bincount(tanque_t, entra, tanques.n_tanques)
+            - demanda_tanque * multiplicador[paso]
+        )
+        nivel = np.clip(nivel + neto * dt / tanques.area, tanques.nivel_min, tanques.nivel_max)
+
+        niveles[paso + 1] = nivel
+        caudales[paso] = q
+        cargas[paso] = solucion['carga']
+        encendidas[paso] = encendida
+
+    H1, H2 = cargas[:, red.desde], cargas[:, red.hasta]
+    energia = np.where(es_bomba, rho * g * caudales * (H2 - H1), 0.0).sum(axis=0) * dt / 3.6e6
+    return {
+        't_h': t_h,
+        'nivel': niveles,
+        'caudal': caudales,
+        'carga': cargas,
+        'encendida': encendidas,
+        'multiplicador': multiplicador,
+        'energia_kwh': energia,
+        'iteraciones': iteraciones,
+        'convergio': bool(convergio),
+    }
+
+
+# =============================================================================
+# ESCENARIO DE LA CONDUCCIÓN DE 8 TRAMOS
+# =============================================================================
+
+def escenario_tramos(
+    Q: float = 0.025,
+    D: float = 0.1541,
+    rho: float = 998.0,
+    mu: float = 0.001,
+    epsilon: float = 0.000046,
+    factor_bombas: float = 1.4,
+) -> dict:
+    """
+    Red, tanques y controles de la conducción para simular_periodo.
+
+    Red de red_desde_tramos(tanques=True): tanque receptor al final de
+    cada estación de bombeo (T1–T4) y tanque de la planta al final de T8,
+    con bombas de curva seleccionadas para factor_bombas·Q (margen para
+    cubrir la punta del patrón y trabajar por ciclos). Los rompe-presión
+    de T5–T6 siguen como válvulas (su flotador mantiene el nivel, sin
+    almacenar). Cada bomba se controla con el tanque al que descarga: se
+    enciende por debajo de 1/3 de la altura y se apaga al 93 %. La planta
+    extrae Q·patrón de su tanque.
+
+    Retorna {'red', 'tanques', 'controles'}, listo para
+    simular_periodo(**escenario_tramos(), duracion_h=...).
+    """
+    red = red_desde_tramos(factor_bombas * Q, D, rho, mu, epsilon, tanques=True)
+    red = replace(red, demanda=red.demanda / factor_bombas)
+    planta = red.nodos[-1]
+    definiciones, controles = [], []
+    for k in np.flatnonzero(red.tipo == BOMBA).tolist():
+        # La bomba descarga a 'Tn.Es.descarga'; su tanque es 'Tn.Es.fin'
+        nodo = red.enlaces[k].replace('.bomba', '.fin')
+        altura = ALTURA_TANQUE_PLANTA if nodo == planta else ALTURA_TANQUE_RECEPTOR
+        definiciones.append({
+            'nodo': nodo,
+            'area': AREA_TANQUE_PLANTA if nodo == planta else AREA_TANQUE_RECEPTOR,
+            'nivel_inicial': 0.6 * altura,
+            'nivel_max': altura,
+        })
+        controles.append({
+            'bomba': red.enlaces[k], 'tanque': nodo,
+            'encender': altura / 3.0, 'apagar': 0.93 * altura,
+        })
+    tanques = construir_tanques(red, definiciones)
+    return {
+        'red': red,
+        'tanques': tanques,
+        'controles': construir_controles(red, tanques, controles),
+    }
+
+
+def tabla_niveles(red: RedHidraulica, tanques: TanquesRed, simulacion: dict) -> pd.DataFrame:
+    """Niveles de simular_periodo como DataFrame (índice t_h, una columna por tanque)."""
+    return pd.DataFrame(
+        simulacion['nivel'],
+        index=pd.Index(simulacion['t_h'], name='t_h'),
+        columns=[red.nodos[k] for k in tanques.nodo.tolist()],
+    )
@@ -0,0 +1,685 @@
+"""
+red.py — Solucionador de redes de tuberías (Algoritmo del Gradiente Global).
+
+Generaliza la cadena serie de 8 tramos a redes arbitrarias: ramales,
+líneas en paralelo, mallas, varias captaciones. La red se describe con
+nodos (de demanda o de carga fija: embalses y tanques) y enlaces
+(tuberías, bombas y tanques rompe-presión), y se guarda como estructura
+de arreglos (RedHidraulica), igual que RedTramos.
+
+Incógnitas: caudales q de los m enlaces y cargas piezométricas H de los
+nodos de demanda. Con la matriz de incidencia B (B[k, desde] = +1,
+B[k, hasta] = −1) y la pérdida de carga h_k(q) de cada enlace:
+
+    h(q) − B·H = 0          (energía en cada enlace)
+    −Bᵀ·q      = d          (continuidad en cada nodo)
+
+El método de Todini y Pilati (1988) aplica Newton al sistema completo y
+elimina q (complemento de Schur): cada iteración resuelve un sistema
+disperso, simétrico y definido positivo sólo en H,
+
+    (Bᵀ P B) H = −Bᵀ (q − P·h) − d,      P = diag(1/h'(q))
+    q ← q − P·h + P·B·H
+
+con los términos de nodos de carga fija pasados al lado derecho.
+
+Pérdidas por enlace:
+    tubería:        h = (f·L/D + ΣK) · q|q| / (2g·A²)   (f de Colebrook, rezagado)
+    bomba:          h = −(H₀ − r·qⁿ)                     (curva potencial)
+    rompe-presión:  fija H aguas abajo = consigna mientras está ACTIVO
+
+Las bombas y las tuberías con válvula de retención se cierran si el flujo
+se invierte; el tanque rompe-presión queda ABIERTO si aguas arriba no
+llega a la consigna (como una válvula reductora de presión de EPANET).
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from scipy.sparse.linalg import spsolve
+
+from core.hidraulica import area_seccion, g, obtener_metodo_friccion
+from core.perfilado import perfilar
+
+# Tipos de enlace
+TUBERIA = 0
+BOMBA = 1
+ROMPE_PRESION = 2
+TIPOS_ENLACE = {'tuberia': TUBERIA, 'bomba': BOMBA, 'rompe_presion': ROMPE_PRESION}
+
+# Estados de enlace
+CERRADO = 0
+ABIERTO = 1
+ACTIVO = 2
+NOMBRES_ESTADO = ('cerrado', 'abierto', 'activo')
+
+# Derivada mínima de la pérdida (m por m³/s): acota P = 1/h' en caudal nulo
+# y en bombas de carga constante sin arruinar el condicionamiento de Bᵀ P B
+DERIVADA_MINIMA = 1e-3
+# Resistencia de un enlace cerrado y peso de la consigna de un rompe-presión
+RESISTENCIA_CERRADO = 1e8
+PESO_CONSIGNA = 1e8
+# Hasta este número de incógnitas el sistema se resuelve denso: en redes
+# pequeñas el costo fijo de SuperLU supera al de la factorización densa
+MAX_NODOS_DENSO = 64
+# Límites del régimen de transición (f interpolado entre laminar y Colebrook)
+RE_LAMINAR = 2000.0
+RE_TURBULENTO = 4000.0
+# Tolerancias de cambio de estado: caudal (m³/s) y carga (m)
+TOL_CAUDAL = 1e-9
+TOL_CARGA = 1e-4
+
+
+@dataclass(frozen=True)
+class RedHidraulica:
+    """
+    Red de tuberías como estructura de arreglos.
+
+    Atributos de nodo (uno por nodo, en el orden de `nodos`):
+        nodos: nombre de cada nodo
+        cota: elevación (m)
+        demanda: caudal extraído (m³/s, negativo = aporte)
+        carga_fija: carga piezométrica de embalses/tanques (m), NaN en
+            los nodos de demanda
+
+    Atributos de enlace (uno por enlace, en el orden de `enlaces`):
+        enlaces: nombre de cada enlace
+        desde, hasta: índices de nodo (sentido positivo del caudal)
+        tipo: TUBERIA, BOMBA o ROMPE_PRESION
+        longitud, diametro, rugosidad: tubería (m)
+        K: suma de coeficientes de pérdidas menores
+        retencion: la tubería tiene válvula de retención
+        carga_bomba, r_bomba, n_bomba: curva H = H₀ − r·qⁿ (H₀ en m)
+        consigna: carga aguas abajo del rompe-presión (m), NaN si no aplica
+    """
+    nodos: tuple[str, ...]
+    cota: np.ndarray
+    demanda: np.ndarray
+    carga_fija: np.ndarray
+    enlaces: tuple[str, ...]
+    desde: np.ndarray
+    hasta: np.ndarray
+    tipo: np.ndarray
+    longitud: np.ndarray
+    diametro: np.ndarray
+    rugosidad: np.ndarray
+    K: np.ndarray
+    retencion: np.ndarray
+    carga_bomba: np.ndarray
+    r_bomba: np.ndarray
+    n_bomba: np.ndarray
+    consigna: np.ndarray
+
+    @property
+    def n_nodos(self) -> int:
+        return len(self.nodos)
+
+    @property
+    def n_enlaces(self) -> int:
+        return len(self.enlaces)
+
+    @property
+    def es_fijo(self) -> np.ndarray:
+        """True en los nodos de carga fija."""
+        return ~np.isnan(self.carga_fija)
+
+    def indice_nodo(self, nombre: str) -> int:
+        return self.nodos.index(nombre)
+
+    @cached_property
+    def _constantes(self) -> dict:
+        """
+        Índices por tipo de enlace y coeficientes fijos de las tuberías,
+        calculados una vez por red (cached_property escribe en __dict__,
+        así que funciona en la dataclass congelada). Son inmutables: las
+        estructuras dispersas del sistema viven fuera de la red, en la
+        caché acotada de _patron_sistema, indexadas por 'topologia'.
+        """
+        tub = np.flatnonzero(self.tipo == TUBERIA)
+        dos_g_A2 = 2 * g * area_seccion(self.diametro[tub])**2
+        return {
+            'tuberias': tub,
+            'bombas': np.flatnonzero(self.tipo == BOMBA),
+            'rompe_presion': np.flatnonzero(self.tipo == ROMPE_PRESION),
+            'retenciones': np.flatnonzero((self.tipo == TUBERIA) & self.retencion),
+            'consigna': np.nan_to_num(self.consigna),
+            'area': area_seccion(self.diametro),
+            'r_friccion': self.longitud[tub] / self.diametro[tub] / dos_g_A2,
+            'r_menores': self.K[tub] / dos_g_A2,
+            'topologia': hashlib.sha256(b''.join((
+                np.int64(self.n_nodos).tobytes(),
+                self.desde.tobytes(), self.hasta.tobytes(), self.tipo.tobytes(),
+            ))).hexdigest(),
+        }
+
+    def indice_enlace(self, nombre: str) -> int:
+        return self.enlaces.index(nombre)
+
+
+def _arreglo_fijo(valores, dtype) -> np.ndarray:
+    """Arreglo contiguo de solo lectura."""
+    arr = np.ascontiguousarray(valores, dtype=dtype)
+    arr.setflags(write=False)
+    return arr
+
+
+def construir_red(nodos: list[dict], enlaces: list[dict]) -> RedHidraulica:
+    """
+    Construye una RedHidraulica a partir de listas de dicts.
+
+    Nodo:   {'nombre', 'cota', 'demanda' (0), 'carga' (solo embalses/tanques)}
+    Enlace: {'nombre', 'desde', 'hasta', 'tipo' ('tuberia' | 'bomba' |
+             'rompe_presion'), y según el tipo:
+             tubería: 'longitud', 'diametro', 'rugosidad', 'K' (0),
+                      'retencion' (False);
+             bomba: 'carga' (H₀), 'r' (0 = carga constante), 'n' (2);
+             rompe_presion: 'consigna' (carga aguas abajo, m)}
+
+    Lanza ValueError si hay nombres repetidos, nodos desconocidos, tipos
+    inválidos o ningún nodo de carga fija.
+    """
+    nombres_nodo = [n['nombre'] for n in nodos]
+    nombres_enlace = [e['nombre'] for e in enlaces]
+    for tipo, nombres in (('nodo', nombres_nodo), ('enlace', nombres_enlace)):
+        if len(set(nombres)) != len(nombres):
+            raise ValueError(f"Nombres de {tipo} repetidos")
+    indice = {nombre: i for i, nombre in enumerate(nombres_nodo)}
+
+    def nodo(nombre):
+        try:
+            return indice[nombre]
+        except KeyError:
+            raise ValueError(f"Nodo desconocido: {nombre!r}") from None
+
+    def tipo(e):
+        try:
+            return TIPOS_ENLACE[e.get('tipo', 'tuberia')]
+        except KeyError:
+            raise ValueError(
+                f"Tipo de enlace desconocido en {e['nombre']!r}: {e['tipo']!r}. "
+                f"Opciones: {', '.join(TIPOS_ENLACE)}"
+            ) from None
+
+    carga_fija = [n.get('carga', np.nan) for n in nodos]
+    if all(np.isnan(c) for c in carga_fija):
+        raise ValueError("La red necesita al menos un nodo de carga fija (embalse o tanque)")
+
+    def campo(clave, dtype, defecto=0.0):
+        return _arreglo_fijo([e.get(clave, defecto) for e in enlaces], dtype)
+
+    tipos = [tipo(e) for e in enlaces]
+    return RedHidraulica(
+        nodos=tuple(nombres_nodo),
+        cota=_arreglo_fijo([n['cota'] for n in nodos], np.float64),
+        demanda=_arreglo_fijo([n.get('demanda', 0.0) for n in nodos], np.float64),
+        carga_fija=_arreglo_fijo(carga_fija, np.float64),
+        enlaces=tuple(nombres_enlace),
+        desde=_arreglo_fijo([nodo(e['desde']) for e in enlaces], np.int64),
+        hasta=_arreglo_fijo([nodo(e['hasta']) for e in enlaces], np.int64),
+        tipo=_arreglo_fijo(tipos, np.int8),
+        longitud=campo('longitud', np.float64),
+        diametro=campo('diametro', np.float64, 1.0),
+        rugosidad=campo('rugosidad', np.float64),
+        K=campo('K', np.float64),
+        retencion=campo('retencion', np.bool_, False),
+        carga_bomba=_arreglo_fijo(
+            [e.get('carga', 0.0) if t == BOMBA else 0.0 for e, t in zip(enlaces, tipos)],
+            np.float64,
+        ),
+        r_bomba=campo('r', np.float64),
+        n_bomba=campo('n', np.float64, 2.0),
+        consigna=_arreglo_fijo(
+            [e.get('consigna', np.nan) if t == ROMPE_PRESION else np.nan
+             for e, t in zip(enlaces, tipos)],
+            np.float64,
+        ),
+    )
+
+
+# =============================================================================
+# PÉRDIDAS Y ESTADOS
+# =============================================================================
+
+def _reynolds(red, q, rho, mu) -> np.ndarray:
+    """Número de Reynolds de cada enlace, Re = ρ·|q|·D/(μ·A)."""
+    return rho * np.abs(q) / red._constantes['area'] * red.diametro / mu
+
+
+def _factor_friccion(red, q, rho, mu, metodo_friccion) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Reynolds y factor de fricción de las tuberías para los caudales q.
+
+    Laminar (Re < RE_LAMINAR): f = 64/Re; turbulento (Re ≥ RE_TURBULENTO):
+    método de Colebrook; en la transición, interpolación lineal en Re
+    entre ambos extremos. Sin ese tramo continuo, los enlaces con Re cerca
+    del umbral saltan de régimen en cada iteración y el método no converge.
+    """
+    Re = _reynolds(red, q, rho, mu)
+    f = 64.0 / np.maximum(Re, 1.0)
+    no_laminar = Re >= RE_LAMINAR
+    if no_laminar.any():
+        Re_t = np.maximum(Re[no_laminar], RE_TURBULENTO)
+        f_t = obtener_metodo_friccion(metodo_friccion)(
+            Re_t, red.rugosidad[no_laminar], red.diametro[no_laminar]
+        )
+        w = np.clip((Re[no_laminar] - RE_LAMINAR) / (RE_TURBULENTO - RE_LAMINAR), 0.0, 1.0)
+        f[no_laminar] = 64.0 / RE_LAMINAR + w * (f_t - 64.0 / RE_LAMINAR)
+    return Re, f
+
+
+def _perdidas(red, q, f, Re, estado) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Pérdida de carga h(q) de cada enlace y su derivada h'(q).
+
+    En régimen laminar f·q|q| es lineal en q (f = 64/Re), así que la
+    fricción aporta r_f·|q| a h' en lugar de 2·r_f·|q|. Los enlaces
+    cerrados usan una resistencia lineal muy alta; los rompe-presión
+    activos no intervienen (su caudal sale de continuidad).
+    """
+    c = red._constantes
+    h = np.zeros(red.n_enlaces)
+    dh = np.ones(red.n_enlaces)
+    aq = np.abs(q)
+
+    tub = c['tuberias']
+    r_f = f[tub] * c['r_friccion']
+    r_m = c['r_menores']
+    h[tub] = (r_f + r_m) * q[tub] * aq[tub]
+    dh[tub] = (np.where(Re[tub] < RE_LAMINAR, 1.0, 2.0) * r_f + 2 * r_m) * aq[tub]
+
+    bom = c['bombas']
+    if bom.size:
+        n, rb = red.n_bomba[bom], red.r_bomba[bom]
+        qb = np.maximum(q[bom], 0.0)
+        h[bom] = -(red.carga_bomba[bom] - rb * qb**n)
+        dh[bom] = n * rb * qb**(n - 1)
+
+    # Rompe-presión abierto: pérdida despreciable (enlace corto y ancho)
+    rp = c['rompe_presion']
+    h[rp] = q[rp] * aq[rp]
+    dh[rp] = 2 * aq[rp]
+
+    cerrado = estado == CERRADO
+    h[cerrado] = RESISTENCIA_CERRADO * q[cerrado]
+    dh[cerrado] = RESISTENCIA_CERRADO
+    return h, np.maximum(dh, DERIVADA_MINIMA)
+
+
+def _actualizar_estados(red, q, H, estado, forzado) -> np.ndarray:
+    """
+    Nuevos estados de bombas, retenciones y rompe-presión (sin tocar los
+    enlaces forzados a cerrar).
+    """
+    c = red._constantes
+    nuevo = estado.copy()
+
+    # Bombas: cierran con flujo inverso o si la carga pedida supera H₀
+    k = c['bombas'][~forzado[c['bombas']]]
+    if k.size:
+        e, dH = estado[k], H[red.hasta[k]] - H[red.desde[k]]
+        nuevo[k[(e == CERRADO) & (dH < red.carga_bomba[k] - TOL_CARGA)]] = ABIERTO
+        nuevo[k[(e != CERRADO) & (q[k] < -TOL_CAUDAL)]] = CERRADO
+
+    # Retención: cierra con flujo inverso, abre si H1 > H2
+    k = c['retenciones'][~forzado[c['retenciones']]]
+    if k.size:
+        e = estado[k]
+        nuevo[k[(e != CERRADO) & (q[k] < -TOL_CAUDAL)]] = CERRADO
+        nuevo[k[(e == CERRADO) & (H[red.desde[k]] > H[red.hasta[k]] + TOL_CARGA)]] = ABIERTO
+
+    # Rompe-presión (lógica de válvula reductora de EPANET)
+    k = c['rompe_presion'][~forzado[c['rompe_presion']]]
+    if k.size:
+        e, qk, cons = estado[k], q[k], red.consigna[k]
+        H1, H2 = H[red.desde[k]], H[red.hasta[k]]
+        activo, abierto, cerrado = e == ACTIVO, e == ABIERTO, e == CERRADO
+        inverso = qk < -TOL_CAUDAL
+        nuevo[k[activo & inverso]] = CERRADO
+        nuevo[k[activo & ~inverso & (H1 < cons - TOL_CARGA)]] = ABIERTO
+        nuevo[k[abierto & inverso]] = CERRADO
+        nuevo[k[abierto & ~inverso & (H2 >= cons + TOL_CARGA)]] = ACTIVO
+        nuevo[k[cerrado & (H1 >= cons + TOL_CARGA) & (H2 < cons - TOL_CARGA)]] = ACTIVO
+        nuevo[k[cerrado & (H1 < cons - TOL_CARGA) & (H1 > H2 + TOL_CARGA)]] = ABIERTO
+    return nuevo
+
+
+# =============================================================================
+# SOLUCIONADOR
+# =============================================================================
+
+# Caché LRU de patrones dispersos, compartida entre redes y sesiones: la
+# clave es la topología (nodos, extremos y tipo de cada enlace) y la
+# máscara de nodos fijos, que es todo lo que determina el patrón
+TAMANO_CACHE_PATRONES = 32
+
+_cache_patrones: OrderedDict = OrderedDict()
+_candado_patrones = threading.Lock()
+
+
+def _patron_sistema(red, fijo) -> dict:
+    """
+    Estructura dispersa de Bᵀ P B sobre los nodos de carga desconocida.
+
+    El patrón no cambia entre iteraciones: se arma una vez una matriz CSC
+    y `ranura` indica en qué posición de matriz.data suma cada término
+    (p_k en las diagonales de sus extremos, −p_k fuera de ellas, y el
+    peso de consigna de los rompe-presión en la diagonal aguas abajo).
+    Cada iteración solo rellena matriz.data con un np.bincount. Los
+    patrones se reutilizan entre llamadas desde _cache_patrones (LRU de
+    TAMANO_CACHE_PATRONES entradas); la matriz de cada uno se comparte,
+    así que se rellena y factoriza bajo su 'candado'.
+    """
+    clave = (red._constantes['topologia'], fijo.tobytes())
+    with _candado_patrones:
+        patron = _cache_patrones.get(clave)
+        if patron is not None:
+            _cache_patrones.move_to_end(clave)
+            return patron
+
+    incognita = np.flatnonzero(~fijo)
+    pos = np.full(red.n_nodos, -1)
+    pos[incognita] = np.arange(incognita.size)
+    pi, pj = pos[red.desde], pos[red.hasta]
+    ui, uj = pi >= 0, pj >= 0
+    ambos = np.flatnonzero(ui & uj)
+    rp = np.flatnonzero((red.tipo == ROMPE_PRESION) & uj)
+    filas = np.concatenate((pi[ui], pj[uj], pi[ambos], pj[ambos], pj[rp]))
+    cols = np.concatenate((pi[ui], pj[uj], pj[ambos], pi[ambos], pj[rp]))
+
+    # Ranura de cada término en la matriz CSC (orden columna, fila)
+    n = incognita.size
+    claves, ranura = np.unique(cols * max(n, 1) + filas, return_inverse=True)
+    indptr = np.searchsorted(claves // max(n, 1), np.arange(n + 1))
+    matriz = sp.csc_matrix(
+        (np.zeros(claves.size), claves % max(n, 1), indptr), shape=(n, n),
+    )
+    patron = {
+        'incognita': incognita,
+        'pos': pos,
+        'matriz': matriz,
+        'ranura': ranura,
+        'signo': np.concatenate((np.ones(ui.sum() + uj.sum()), -np.ones(2 * ambos.size))),
+        'enlace_de': np.concatenate((np.flatnonzero(ui), np.flatnonzero(uj), ambos, ambos)),
+        'enlace_peso': rp,
+        'fijo_desde': ~ui,
+        'fijo_hasta': ~uj,
+        'candado': threading.Lock(),
+        # Posición de cada ranura en la matriz densa (n, n) aplanada
+        'plano': (claves % max(n, 1)) * n + claves // max(n, 1),
+    }
+    with _candado_patrones:
+        # Si otro hilo lo armó mientras tanto, todos usan el mismo (y su candado)
+        patron = _cache_patrones.setdefault(clave, patron)
+        _cache_patrones.move_to_end(clave)
+        while len(_cache_patrones) > TAMANO_CACHE_PATRONES:
+            _cache_patrones.popitem(last=False)
+    return patron
+
+
+@perfilar()
+def resolver_red(
+    red: RedHidraulica,
+    rho: float = 998.0,
+    mu: float = 0.001,
+    metodo_friccion='colebrook',
+    demanda: np.ndarray | None = None,
+    carga_fija: np.ndarray | None = None,
+    cerrados: np.ndarray | None = None,
+    q_inicial: np.ndarray | None = None,
+    f_inicial: np.ndarray | None = None,
+    estado_inicial: np.ndarray | None = None,
+    tolerancia: float = 1e-6,
+    max_iter: int = 100,
+) -> dict:
+    """
+    Resuelve caudales y cargas de la red (Todini-Pilati).
+
+    Parámetros:
+        red: RedHidraulica (construir_red o red_desde_tramos)
+        rho, mu: densidad (kg/m³) y viscosidad dinámica (Pa·s)
+        metodo_friccion: método de Colebrook (ver METODOS_FRICCION)
+        demanda, carga_fija: reemplazan a red.demanda / red.carga_fija
+            (p. ej. patrones de demanda o niveles de tanque en el tiempo)
+        cerrados: máscara de enlaces forzados a cerrar (bombas apagadas)
+        q_inicial, f_inicial, estado_inicial: semillas (p. ej. la solución
+            del paso anterior); por defecto v = 1 m/s, f de ese caudal y
+            todo abierto (rompe-presión activos)
+        tolerancia: cambio relativo de caudal Σ|Δq|/Σ|q| para converger
+        max_iter: iteraciones máximas
+
+    Retorna dict con arreglos por nodo (carga, presion) y por enlace
+    (caudal, velocidad, perdida, f, reynolds, estado), más iteraciones,
+    convergio, error (último cambio relativo) y desequilibrio (máximo
+    residuo de continuidad, m³/s).
+    """
+    demanda = red.demanda if demanda is None else np.asarray(demanda, dtype=float)
+    carga_fija = red.carga_fija if carga_fija is None else np.asarray(carga_fija, dtype=float)
+    forzado = np.zeros(red.n_enlaces, bool) if cerrados is None else np.asarray(cerrados, bool)
+
+    fijo = ~np.isnan(carga_fija)
+    patron = _patron_sistema(red, fijo)
+    incognita, pj = patron['incognita'], patron['pos'][red.hasta]
+    n_nodos = red.n_nodos
+    i, j = red.desde, red.hasta
+
+    # Semillas
+    tub = red.tipo == TUBERIA
+    if q_inicial is None:
+        q = np.where(tub, area_seccion(red.diametro), 1e-3)
+    else:
+        q = np.array(q_inicial, dtype=float)
+    if estado_inicial is None:
+        estado = np.where(red.tipo == ROMPE_PRESION, ACTIVO, ABIERTO).astype(np.int8)
+    else:
+        estado = np.array(estado_inicial, dtype=np.int8)
+    estado[forzado] = CERRADO
+    H = np.where(fijo, carga_fija, 0.0)
+    if f_inicial is None:
+        Re, f = _factor_friccion(red, q, rho, mu, metodo_friccion)
+    else:
+        Re, f = _reynolds(red, q, rho, mu), np.nan_to_num(f_inicial)
+
+    # Carga fija vista desde el otro extremo de cada enlace (0 si no es fija)
+    fija_hasta = np.where(patron['fijo_hasta'], carga_fija[j], 0.0)
+    fija_desde = np.where(patron['fijo_desde'], carga_fija[i], 0.0)
+    A, candado = patron['matriz'], patron['candado']
+
+    convergio = False
+    error = np.inf
+    iteracion = 0
+    for iteracion in range(1, max_iter + 1):
+        h, dh = _perdidas(red, q, f, Re, estado)
+        p = 1.0 / dh
+        activo = estado == ACTIVO
+        p[activo] = 0.0
+        y = np.where(activo, 0.0, p * h)
+
+        # Sistema (Bᵀ P B) H_u = −Bᵀ (q − P h) − d − (términos de carga fija)
+        flujo = q - y
+        F = (
+            np.bincount(j, flujo + p * fija_desde, n_nodos)
+            - np.bincount(i, flujo - p * fija_hasta, n_nodos)
+            - demanda
+        )
+
+        # Rompe-presión activo: la consigna fija la carga aguas abajo
+        activos = np.flatnonzero(activo & (pj >= 0))
+        peso = np.zeros(red.n_enlaces)
+        peso[activos] = PESO_CONSIGNA
+        F += np.bincount(j, peso * red._constantes['consigna'], n_nodos)
+
+        if incognita.size:
+            datos = np.bincount(
+                patron['ranura'],
+                np.concatenate((p[patron['enlace_de']] * patron['signo'], peso[patron['enlace_peso']])),
+                A.data.size,
+            )
+            if incognita.size <= MAX_NODOS_DENSO:
+                densa = np.zeros(incognita.size**2)
+                densa[patron['plano']] = datos
+                H[incognita] = np.linalg.solve(
+                    densa.reshape(incognita.size, incognita.size), F[incognita],
+                )
+            else:
+                with candado:   # la matriz del patrón se comparte entre llamadas
+                    A.data[:] = datos
+                    H[incognita] = spsolve(A, F[incognita])
+
+        # Caudales nuevos; los rompe-presión activos cierran la continuidad
+        q_nuevo = q - y + p * (H[i] - H[j])
+        if activos.size:
+            residuo = np.bincount(j, q_nuevo, n_nodos) - np.bincount(i, q_nuevo, n_nodos) - demanda
+            q_nuevo[activos] -= residuo[j[activos]]
+
+        error = np.abs(q_nuevo - q).sum() / max(np.abs(q_nuevo).sum(), 1e-12)
+        q = q_nuevo
+        Re, f = _factor_friccion(red, q, rho, mu, metodo_friccion)
+
+        # Estados: se revisan cuando el caudal ya se estabilizó
+        cambio = False
+        if error < 1e-2:
+            nuevo = _actualizar_estados(red, q, H, estado, forzado)
+            cambio = bool((nuevo != estado).any())
+            estado = nuevo
+        if error < tolerancia and not cambio:
+            convergio = True
+            break
+
+    # Con la red equilibrada, h(q) = H_desde − H_hasta en cada enlace
+    h = H[i] - H[j]
+    residuo = np.bincount(j, q, n_nodos) - np.bincount(i, q, n_nodos) - demanda
+    return {
+        'carga': H,
+        'presion': H - red.cota,
+        'caudal': q,
+        'velocidad': np.where(tub, q / area_seccion(red.diametro), 0.0),
+        'perdida': h,
+        'f': np.where(tub, f, np.nan),
+        'reynolds': np.where(tub, Re, np.nan),
+        'estado': estado,
+        'iteraciones': iteracion,
+        'convergio': convergio,
+        'error': float(error),
+        'desequilibrio': float(np.max(np.abs(residuo[~fijo]), initial=0.0)),
+    }
+
+
+def tablas_solucion(red: RedHidraulica, solucion: dict) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Solución de resolver_red como DataFrames (nodos, enlaces)."""
+    nodos = pd.DataFrame({
+        'nodo': red.nodos,
+        'cota': red.cota,
+        'demanda': red.demanda,
+        'fijo': red.es_fijo,
+        'carga': solucion['carga'],
+        'presion': solucion['presion'],
+    })
+    nombres_tipo = {v: k for k, v in TIPOS_ENLACE.items()}
+    enlaces = pd.DataFrame({
+        'enlace': red.enlaces,
+        'tipo': [nombres_tipo[t] for t in red.tipo.tolist()],
+        'desde': [red.nodos[k] for k in red.desde.tolist()],
+        'hasta': [red.nodos[k] for k in red.hasta.tolist()],
+        'caudal': solucion['caudal'],
+        'velocidad': solucion['velocidad'],
+        'perdida': solucion['perdida'],
+        'f': solucion['f'],
+        'estado': [NOMBRES_ESTADO[s] for s in solucion['estado'].tolist()],
+    })
+    return nodos, enlaces
+
+
+# =============================================================================
+# LOS 8 TRAMOS COMO RED
+# =============================================================================
+
+def definicion_red_tramos(
+    Q: float = 0.025,
+    D: float = 0.1541,
+    rho: float = 998.0,
+    mu: float = 0.001,
+    epsilon: float = 0.000046,
+    tanques: bool = False,
+) -> tuple[list[dict], list[dict]]:
+    """
+    Nodos y enlaces de la conducción de 8 tramos (para construir_red).
+
+    Cada estación es una tubería de L/n con el ΣK del tramo; las de
+    bombeo empiezan con una bomba de carga constante igual a la
+    carga_estacion de calcular_sistema_completo (la que asume el diseño);
+    las descendentes con tanque terminan en un rompe-presión con consigna
+    en la cota de llegada. Captación: embalse en el río (H = 0); la planta
+    extrae Q al final de T8. Se puede modificar antes de construir la red
+    (p. ej. añadir un by-pass o una segunda captación).
+
+    Con tanques=True (para simulación en periodo extendido), el tanque
+    receptor de cada estación de bombeo y el de la planta son nodos de
+    carga fija (fondo del tanque; el nivel se suma al simular) y las
+    bombas tienen la curva de curva_punto_diseno en lugar de carga
+    constante: con los tanques llenándose y vaciándose, el caudal de cada
+    estación sale del cruce de su curva con la del sistema.
+    """
+    from core.hidraulica import calcular_sistema_completo
+    from core.tramos import curva_punto_diseno, obtener_red_tramos
+
+    tramos = obtener_red_tramos()
+    resultados = calcular_sistema_completo(Q, D, rho, mu, epsilon)
+    nodos = [{'nombre': 'rio', 'cota': 0.0, 'carga': 0.0}]
+    enlaces = []
+    anterior, z = 'rio', 0.0
+    for k, num in enumerate(tramos.numeros.tolist()):
+        r = resultados[num]
+        n = max(int(tramos.num_estaciones[k]), 1)
+        bombea = not tramos.es_bajada[k]
+        con_tanque = tramos.es_bajada[k] and tramos.tanque_rompe_presion[k]
+        for s in range(1, n + 1):
+            prefijo = f"T{num}.E{s}"
+            z_fin = z + tramos.altura[k] / n
+            if bombea:
+                nodos.append({'nombre': f"{prefijo}.descarga", 'cota': z})
+                bomba = {'carga': r['carga_estacion']}
+                if tanques:
+                    curva = curva_punto_diseno(Q, r['carga_estacion'])
+                    bomba = {'carga': curva.carga[0], 'r': -curva.carga[2], 'n': 2.0}
+                enlaces.append({
+                    'nombre': f"{prefijo}.bomba", 'tipo': 'bomba',
+                    'desde': anterior, 'hasta': f"{prefijo}.descarga", **bomba,
+                })
+                anterior = f"{prefijo}.descarga"
+            llegada = f"{prefijo}.llegada" if con_tanque else f"{prefijo}.fin"
+            nodos.append({'nombre': llegada, 'cota': z_fin})
+            if tanques and bombea:
+                nodos[-1]['carga'] = z_fin
+            enlaces.append({
+                'nombre': f"{prefijo}.tuberia", 'tipo': 'tuberia',
+                'desde': anterior, 'hasta': llegada,
+                'longitud': r['longitud_estacion'], 'diametro': D,
+                'rugosidad': epsilon, 'K': float(tramos.K_total[k]),
+            })
+            if con_tanque:
+                nodos.append({'nombre': f"{prefijo}.fin", 'cota': z_fin})
+                enlaces.append({
+                    'nombre': f"{prefijo}.tanque", 'tipo': 'rompe_presion',
+                    'desde': llegada, 'hasta': f"{prefijo}.fin", 'consigna': z_fin,
+                })
+            anterior, z = f"{prefijo}.fin", z_fin
+    nodos[-1]['demanda'] = Q
+    return nodos, enlaces
+
+
+def red_desde_tramos(
+    Q: float = 0.025,
+    D: float = 0.1541,
+    rho: float = 998.0,
+    mu: float = 0.001,
+    epsilon: float = 0.000046,
+    tanques: bool = False,
+) -> RedHidraulica:
+    """La conducción de 8 tramos como RedHidraulica (ver definicion_red_tramos)."""
+    return construir_red(*definicion_red_tramos(Q, D, rho, mu, epsilon, tanques))
@@ -4,16 +4,78 @@ tramos.py — Definición de los 8 tramos del sistema hidráulico.
 Cada tramo contiene su geometría fija (distancia, altura, pendiente),
 los accesorios instalados (codos, válvulas, entradas/salidas), y
 las decisiones de ingeniería (número de estaciones, tipo de control).
+
+La definición se carga una sola vez, congelada (solo lectura), y se
+identifica con una huella de contenido (huella_tramos) apta como clave
+de caché.
+
+Para los cálculos numéricos, obtener_red_tramos() expone la misma
+información como un objeto inmutable de arreglos NumPy contiguos
+(RedTramos), construido una sola vez y compartido.
 """
 
+import hashlib
+import json
+from collections.abc import Mapping
+from dataclasses import dataclass
+from functools import lru_cache
+from types import MappingProxyType
+
+import numpy as np
 
-def obtener_definicion_tramos() -> dict:
+
+@lru_cache(maxsize=1)
+def obtener_definicion_tramos() -> MappingProxyType:
     """
     Retorna la definición geométrica y de accesorios de los 8 tramos.
     
     Los datos provienen del CSV original y del mapa topográfico.
     La geometría es fija; lo que cambia al interactuar son Q, D, ρ, μ, ε.
+    
+    La definición se construye una sola vez y se devuelve congelada:
+    los dicts son de solo lectura (MappingProxyType) y las listas son
+    tuplas. Quien necesite modificarla debe copiarla antes
+    (p. ej. [dict(a) for a in defn['accesorios']]).
+    """
+    return _congelar(_definir_tramos())
+
+
+def _congelar(valor):
+    """Copia recursiva de solo lectura: dict → MappingProxyType, list → tuple."""
+    if isinstance(valor, Mapping):
+        return MappingProxyType({k: _congelar(v) for k, v in valor.items()})
+    if isinstance(valor, (list, tuple)):
+        return tuple(_congelar(v) for v in valor)
+    return valor
+
+
+def _descongelar(valor):
+    """Inversa de _congelar: devuelve dicts y listas ordinarios."""
+    if isinstance(valor, Mapping):
+        return {k: _descongelar(v) for k, v in valor.items()}
+    if isinstance(valor, tuple):
+        return [_descongelar(v) for v in valor]
+    return valor
+
+
+@lru_cache(maxsize=1)
+def huella_tramos() -> str:
     """
+    Huella de contenido (SHA-256 abreviado) de la definición de tramos.
+    
+    Es una cadena corta y estable: sirve como clave barata para cachés
+    (st.cache_data, cachés de figuras) en lugar de hashear los dicts
+    anidados completos. Cambia si y solo si cambia algún dato de los tramos.
+    """
+    contenido = json.dumps(
+        _descongelar(obtener_definicion_tramos()),
+        sort_keys=True, ensure_ascii=False,
+    )
+    return hashlib.sha256(contenido.encode('utf-8')).hexdigest()[:16]
+
+
+def _definir_tramos() -> dict:
+    """Construye la definición (mutable) de los 8 tramos."""
     tramos = {}
 
     # ==============================
@@ -253,3 +315,290 @@ def obtener_elevaciones_acumuladas() -> list[dict]:
             })
     
     return puntos
+
+
+@dataclass(frozen=True)
+class RedTramos:
+    """
+    Red de tramos en forma de estructura de arreglos.
+    
+    Cada atributo numérico es un arreglo NumPy de solo lectura con un
+    elemento por tramo, en el orden de `numeros`. Los núcleos hidráulicos
+    operan directamente sobre estos arreglos.
+    
+    Atributos:
+        numeros: número de cada tramo (1..8)
+        distancia: distancia horizontal (m)
+        altura: desnivel geométrico del tramo (m)
+        pendiente: pendiente (°)
+        longitud_tuberia: longitud real de tubería (m)
+        z: elevación a vencer por bombeo (m)
+        K_total: suma de coeficientes K de accesorios
+        num_estaciones: estaciones de bombeo / sub-tramos
+        es_bajada: tramo descendente (sin bomba)
+        tanque_rompe_presion: el tramo descarga en tanque rompe-presión
+        fuente_gravedad: índice del tramo que le transfiere cabeza
+            gravitacional, o -1 si no recibe
+        tipos: descripción del tipo de cada tramo
+    """
+    numeros: np.ndarray
+    distancia: np.ndarray
+    altura: np.ndarray
+    pendiente: np.ndarray
+    longitud_tuberia: np.ndarray
+    z: np.ndarray
+    K_total: np.ndarray
+    num_estaciones: np.ndarray
+    es_bajada: np.ndarray
+    tanque_rompe_presion: np.ndarray
+    fuente_gravedad: np.ndarray
+    tipos: tuple[str, ...]
+    
+    @property
+    def n_tramos(self) -> int:
+        return len(self.numeros)
+    
+    def indice(self, num_tramo: int) -> int:
+        """Posición del tramo `num_tramo` dentro de los arreglos."""
+        return int(np.flatnonzero(self.numeros == num_tramo)[0])
+
+
+def _arreglo_fijo(valores, dtype) -> np.ndarray:
+    """Arreglo contiguo de solo lectura."""
+    arr = np.ascontiguousarray(valores, dtype=dtype)
+    arr.setflags(write=False)
+    return arr
+
+
+def construir_red_tramos(definiciones: dict) -> RedTramos:
+    """Convierte la definición de obtener_definicion_tramos() en una RedTramos."""
+    nums = list(definiciones)
+    
+    def campo(clave, dtype, defecto=None):
+        return _arreglo_fijo(
+            [definiciones[t].get(clave, defecto) for t in nums], dtype
+        )
+    
+    fuente = [definiciones[t].get('recibe_gravedad_de') for t in nums]
+    return RedTramos(
+        numeros=_arreglo_fijo(nums, np.int64),
+        distancia=campo('distancia', np.float64),
+        altura=campo('altura', np.float64),
+        pendiente=campo('pendiente', np.float64),
+        longitud_tuberia=campo('longitud_tuberia', np.float64),
+        z=campo('z', np.float64),
+        K_total=campo('K_total', np.float64),
+        num_estaciones=campo('num_estaciones', np.int64),
+        es_bajada=campo('es_bajada', np.bool_),
+        tanque_rompe_presion=campo('tanque_rompe_presion', np.bool_, True),
+        fuente_gravedad=_arreglo_fijo(
+            [nums.index(f) if f in definiciones else -1 for f in fuente],
+            np.int64,
+        ),
+        tipos=tuple(definiciones[t]['tipo'] for t in nums),
+    )
+
+
+@lru_cache(maxsize=1)
+def obtener_red_tramos() -> RedTramos:
+    """
+    Red de tramos como estructura de arreglos, construida una sola vez.
+    
+    El objeto es inmutable y se comparte entre todas las llamadas.
+    """
+    return construir_red_tramos(obtener_definicion_tramos())
+
+
+# ==============================
+# CURVAS DE BOMBA POR ESTACIÓN
+# ==============================
+
+@dataclass(frozen=True)
+class CurvaBomba:
+    """
+    Curva característica de una bomba como polinomios en Q (m³/s).
+    
+        H(Q) = a₀ + a₁·Q + a₂·Q² + …     (carga, m)
+        η(Q) = b₀ + b₁·Q + b₂·Q² + …     (eficiencia, fracción)
+    
+    Los coeficientes van en potencias crecientes: a₀ es la carga a
+    válvula cerrada. La curva H(Q) debe ser decreciente en el rango de
+    operación para que el punto de operación sea único.
+    """
+    carga: tuple[float, ...]
+    eficiencia: tuple[float, ...] = (0.75,)
+    nombre: str = ''
+    
+    def __post_init__(self):
+        if not self.carga or not self.eficiencia:
+            raise ValueError("La curva de bomba necesita al menos un coeficiente de carga y de eficiencia")
+        if self.carga[0] <= 0:
+            raise ValueError(f"Carga a válvula cerrada no positiva: {self.carga[0]}")
+    
+    def carga_en(self, Q):
+        """Carga de la bomba H(Q) (m)."""
+        return np.polynomial.polynomial.polyval(Q, self.carga)
+    
+    def eficiencia_en(self, Q):
+        """Eficiencia η(Q) (fracción)."""
+        return np.polynomial.polynomial.polyval(Q, self.eficiencia)
+
+
+def curva_desde_puntos(Q, H, eta=None, grado: int = 2, nombre: str = '') -> CurvaBomba:
+    """
+    Ajusta por mínimos cuadrados una CurvaBomba a puntos del catálogo.
+    
+    Q (m³/s), H (m) y, opcionalmente, η (fracción) son arreglos de igual
+    largo con al menos grado + 1 puntos.
+    """
+    Q = np.asarray(Q, dtype=float)
+    if Q.size < grado + 1:
+        raise ValueError(f"Se necesitan al menos {grado + 1} puntos para un ajuste de grado {grado}")
+    ajuste = np.polynomial.polynomial.polyfit
+    carga = tuple(ajuste(Q, np.asarray(H, dtype=float), grado).tolist())
+    eficiencia = (
+        (0.75,) if eta is None
+        else tuple(ajuste(Q, np.asarray(eta, dtype=float), min(grado, 2)).tolist())
+    )
+    return CurvaBomba(carga, eficiencia, nombre)
+
+
+def curva_punto_diseno(Q: float, H: float, eta_max: float = 0.75, nombre: str = '') -> CurvaBomba:
+    """
+    Curva de una bomba seleccionada para el punto (Q, H).
+    
+    Forma de un punto de EPANET: carga a válvula cerrada 4/3·H y caudal
+    máximo 2·Q,
+        H(q) = 4/3·H − (H/3)·(q/Q)²
+    y eficiencia parabólica con máximo η_max en el punto de diseño,
+        η(q) = η_max·(2·q/Q − (q/Q)²)
+    """
+    if Q <= 0 or H <= 0:
+        raise ValueError(f"Punto de diseño inválido: Q={Q}, H={H}")
+    return CurvaBomba(
+        carga=(4.0 / 3.0 * H, 0.0, -H / (3.0 * Q**2)),
+        eficiencia=(0.0, 2.0 * eta_max / Q, -eta_max / Q**2),
+        nombre=nombre,
+    )
+
+
+@dataclass(frozen=True)
+class BombasEstaciones:
+    """
+    Bombas instaladas en las estaciones, como estructura de arreglos.
+    
+    Una fila por estación con bomba. Los polinomios se guardan como
+    matrices de coeficientes (n, grado + 1) rellenas con ceros, para
+    evaluar todas las curvas a la vez.
+    
+    Atributos:
+        tramo: número de tramo de cada estación
+        estacion: número de estación dentro del tramo (1..num_estaciones)
+        indice_tramo: posición del tramo en RedTramos
+        coef_carga: coeficientes de H(Q), potencias crecientes
+        coef_eficiencia: coeficientes de η(Q), potencias crecientes
+        nombres: nombre de la bomba de cada estación
+    """
+    tramo: np.ndarray
+    estacion: np.ndarray
+    indice_tramo: np.ndarray
+    coef_carga: np.ndarray
+    coef_eficiencia: np.ndarray
+    nombres: tuple[str, ...]
+    
+    @property
+    def n_estaciones(self) -> int:
+        return len(self.tramo)
+    
+    def carga(self, Q) -> np.ndarray:
+        """H(Q) de cada estación para un caudal por estación (n,)."""
+        return _evaluar_polinomios(self.coef_carga, Q)
+    
+    def eficiencia(self, Q) -> np.ndarray:
+        """η(Q) de cada estación para un caudal por estación (n,)."""
+        return _evaluar_polinomios(self.coef_eficiencia, Q)
+
+
+def _evaluar_polinomios(coeficientes: np.ndarray, Q) -> np.ndarray:
+    """Horner fila a fila: Σ c[i, k]·Q[i]^k."""
+    Q = np.asarray(Q, dtype=float)
+    resultado = np.zeros(np.broadcast(Q, coeficientes[:, 0]).shape)
+    for k in range(coeficientes.shape[1] - 1, -1, -1):
+        resultado = resultado * Q + coeficientes[:, k]
+    return resultado
+
+
+def _matriz_coeficientes(polinomios: list[tuple[float, ...]]) -> np.ndarray:
+    grado = max(len(p) for p in polinomios)
+    matriz = np.zeros((len(polinomios), grado))
+    for i, p in enumerate(polinomios):
+        matriz[i, :len(p)] = p
+    matriz.setflags(write=False)
+    return matriz
+
+
+def instalar_bombas(curvas: Mapping) -> BombasEstaciones:
+    """
+    Asigna curvas de bomba a las estaciones de bombeo.
+    
+    `curvas` mapea (num_tramo, num_estacion) → CurvaBomba, o
+    num_tramo → CurvaBomba para la misma bomba en todas las estaciones
+    del tramo. Lanza ValueError si el tramo no existe, no bombea o la
+    estación está fuera de rango.
+    """
+    red = obtener_red_tramos()
+    filas = {}
+    for clave, curva in curvas.items():
+        num, estacion = clave if isinstance(clave, tuple) else (clave, None)
+        if num not in red.numeros:
+            raise ValueError(f"Tramo desconocido: {num}")
+        j = red.indice(num)
+        if red.es_bajada[j]:
+            raise ValueError(f"El tramo {num} es descendente y no tiene bombas")
+        n_est = int(red.num_estaciones[j])
+        estaciones = range(1, n_est + 1) if estacion is None else (estacion,)
+        for s in estaciones:
+            if not 1 <= s <= n_est:
+                raise ValueError(f"El tramo {num} tiene {n_est} estación(es); se pidió la {s}")
+            filas[(int(num), int(s))] = curva
+    
+    claves = sorted(filas)
+    return BombasEstaciones(
+        tramo=_arreglo_fijo([t for t, _ in claves], np.int64),
+        estacion=_arreglo_fijo([s for _, s in claves], np.int64),
+        indice_tramo=_arreglo_fijo([red.indice(t) for t, _ in claves], np.int64),
+        coef_carga=_matriz_coeficientes([filas[c].carga for c in claves]),
+        coef_eficiencia=_matriz_coeficientes([filas[c].eficiencia for c in claves]),
+        nombres=tuple(filas[c].nombre or f"T{c[0]}.E{c[1]}" for c in claves),
+    )
+
+
+def bombas_diseno(
+    Q: float = 0.025,
+    D: float = 0.1541,
+    rho: float = 998.0,
+    mu: float = 0.001,
+    epsilon: float = 0.000046,
+    eta_max: float = 0.75,
+) -> BombasEstaciones:
+    """
+    Bombas seleccionadas para el caudal de diseño Q.
+    
+    Cada estación de bombeo recibe curva_punto_diseno(Q, carga_estacion)
+    con la carga que exige calcular_sistema_completo (en T8, ya reducida
+    por la gravedad de T7). Con estas bombas, el punto de operación
+    coincide con Q; al cambiar D, ε o el fluido, muestra hacia dónde se
+    desplaza el caudal con las bombas ya instaladas.
+    """
+    from core.hidraulica import calcular_sistema_completo
+    
+    resultados = calcular_sistema_completo(Q, D, rho, mu, epsilon)
+    red = obtener_red_tramos()
+    curvas = {}
+    for j, num in enumerate(red.numeros.tolist()):
+        if red.es_bajada[j] or resultados[num]['carga_estacion'] <= 0:
+            continue
+        curvas[num] = curva_punto_diseno(
+            Q, resultados[num]['carga_estacion'], eta_max, nombre=f"Bomba T{num}",
+        )
+    return instalar_bombas(curvas)
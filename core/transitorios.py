@@ -0,0 +1,463 @@
+"""
+transitorios.py — Golpe de ariete por el método de las características.
+
+Cada estación de la conducción es una tubería entre su bomba (o tanque)
+de aguas arriba y una válvula que descarga al tanque de aguas abajo. Se
+discretiza en N tramos de cálculo con Δx = a·Δt y, sobre las
+características dx/dt = ±a,
+
+    C⁺:  H_P = C_P − B·Q_P,   C_P = H_A + B·Q_A − R·Q_A·|Q_A|
+    C⁻:  H_P = C_M + B·Q_P,   C_M = H_B − B·Q_B + R·Q_B·|Q_B|
+
+con B = a/(g·A) y R = f·Δx/(2·g·D·A²), de modo que en cada nodo interior
+
+    H_P = (C_P + C_M)/2,   Q_P = (C_P − C_M)/(2·B)
+
+Todas las tuberías comparten Δt (la celeridad de cada una se ajusta para
+que N·Δx = L) y sus nodos van uno tras otro en un solo arreglo: cada paso
+es un puñado de operaciones NumPy sobre la malla completa, y luego se
+imponen a la vez las fronteras de todas las tuberías.
+
+Eventos:
+    'disparo_bomba': las bombas pierden el motor en t = 0 y desaceleran con
+        par ∝ n², n/n₀ = 1/(1 + t/T), T = I·ω₀²/P₀; la válvula de
+        retención cierra en cuanto el caudal se invertiría.
+    'cierre_valvula': la válvula de aguas abajo cierra según
+        τ(t) = (1 − t/t_c)^m; las bombas siguen girando.
+    'sin_evento': fronteras fijas; el permanente debe mantenerse (sirve
+        para comprobar la malla).
+
+No se modela la separación de columna: una presión mínima por debajo de
+la de vapor indica que ocurriría, y entonces la sobrepresión real al
+recolapsar la cavidad puede superar la envolvente calculada.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from core.hidraulica import area_seccion, calcular_sistema_completo, g
+from core.perfil import poligonal_tramo
+from core.perfilado import perfilar
+from core.tramos import curva_punto_diseno, obtener_red_tramos
+
+# Tubería DN150 cédula 40 de acero con agua (celeridad de Korteweg)
+ESPESOR_PARED = 0.00711  # m
+MODULO_ELASTICIDAD_ACERO = 2.07e11  # Pa
+MODULO_COMPRESIBILIDAD_AGUA = 2.19e9  # Pa
+
+# Presión nominal de la tubería (PN16) y presión de vapor del agua a 20 °C
+PRESION_NOMINAL_MPA = 1.6
+PRESION_ATMOSFERICA = 101_325.0  # Pa
+PRESION_VAPOR = 2_340.0  # Pa
+
+# Conjunto motor-bomba de cada estación
+RPM_BOMBA = 1750.0
+INERCIA_BOMBA = 0.3  # kg·m²
+
+# Longitud objetivo de los tramos de cálculo (m)
+DX_TRANSITORIO = 1.0
+
+EVENTOS = ('disparo_bomba', 'cierre_valvula', 'sin_evento')
+
+
+def celeridad_onda(
+    D: float = 0.1541,
+    espesor: float = ESPESOR_PARED,
+    rho: float = 998.0,
+    E: float = MODULO_ELASTICIDAD_ACERO,
+    K: float = MODULO_COMPRESIBILIDAD_AGUA,
+) -> float:
+    """
+    Celeridad de la onda de presión en una tubería elástica (Korteweg):
+
+        a = √(K/ρ) / √(1 + K·D/(E·e))
+    """
+    return float(np.sqrt(K / rho / (1.0 + K * D / (E * espesor))))
+
+
+@dataclass(frozen=True)
+class ConduccionTransitorio:
+    """
+    Malla de características de varias tuberías (una por estación).
+
+    Las cargas son relativas a la cota de inicio de cada tubería.
+
+    Atributos por tubería:
+        tramo, estacion: número de tramo y estación (0..n−1)
+        inicio, fin: índices de su primer y último nodo
+        longitud: longitud de la tubería (m)
+        celeridad: celeridad ajustada a N·Δx = L (m/s)
+        caudal: caudal permanente Q₀ (m³/s)
+        bomba: hay bomba (con retención) aguas arriba; si no, un tanque
+        coef_bomba: (n, 3) curva H(Q) = a₀ + a₁·Q + a₂·Q² (ceros sin bomba)
+        carga_succion: carga del tanque de succión o de aguas arriba (m)
+        t_parada: constante T de desaceleración de la bomba (s)
+        carga_descarga: nivel del tanque de aguas abajo (m)
+        perdida_valvula: pérdida ΔH₀ de la válvula abierta con Q₀ (m);
+            agrupa las pérdidas menores o, en las bajadas, el
+            estrangulamiento que disipa el desnivel sobrante
+        cota_inicio: cota absoluta del inicio de la tubería (m)
+
+    Atributos por nodo:
+        x: distancia a lo largo de la tubería desde el inicio del tramo (m)
+        cota: cota relativa al inicio de su tubería (m)
+        B, R: constantes de las características
+        carga: carga del régimen permanente (m)
+
+    dt: paso de tiempo común (s); rho: densidad (kg/m³)
+    """
+    tramo: np.ndarray
+    estacion: np.ndarray
+    inicio: np.ndarray
+    fin: np.ndarray
+    longitud: np.ndarray
+    celeridad: np.ndarray
+    caudal: np.ndarray
+    bomba: np.ndarray
+    coef_bomba: np.ndarray
+    carga_succion: np.ndarray
+    t_parada: np.ndarray
+    carga_descarga: np.ndarray
+    perdida_valvula: np.ndarray
+    cota_inicio: np.ndarray
+    x: np.ndarray
+    cota: np.ndarray
+    B: np.ndarray
+    R: np.ndarray
+    carga: np.ndarray
+    dt: float
+    rho: float
+
+    @property
+    def n_tuberias(self) -> int:
+        return len(self.tramo)
+
+    @property
+    def n_nodos(self) -> int:
+        return len(self.x)
+
+
+def _cotas_tuberia(num_tramo: int, s: np.ndarray, longitud_tramo: float) -> np.ndarray:
+    """
+    Cota relativa al inicio del tramo en las abscisas s de su tubería.
+
+    La tubería sigue la poligonal del tramo; s se reparte en proporción
+    a la longitud de la poligonal.
+    """
+    u, dz = poligonal_tramo(num_tramo)
+    arco = np.concatenate(([0.0], np.cumsum(np.hypot(np.diff(u), np.diff(dz)))))
+    return np.interp(s * (arco[-1] / longitud_tramo), arco, dz)
+
+
+def construir_conduccion(
+    tramos=None,
+    Q: float = 0.025,
+    D: float = 0.1541,
+    rho: float = 998.0,
+    mu: float = 0.001,
+    epsilon: float = 0.000046,
+    metodo_friccion: str = 'colebrook',
+    dx: float = DX_TRANSITORIO,
+    espesor: float = ESPESOR_PARED,
+    eta_max: float = 0.75,
+    inercia: float = INERCIA_BOMBA,
+    rpm: float = RPM_BOMBA,
+) -> ConduccionTransitorio:
+    """
+    Malla de características de las estaciones de los tramos dados
+    (todos si tramos es None), en el régimen permanente del caudal Q.
+
+    El permanente es el de calcular_sistema_completo: fricción con el
+    factor de Colebrook y pérdidas menores agrupadas en la válvula de
+    aguas abajo. Cada estación con bomba recibe curva_punto_diseno(Q, H)
+    con su carga de estación, así que el transitorio parte exactamente
+    del punto de diseño (en T8, con la carga ya reducida por T7).
+    """
+    if Q <= 0 or dx <= 0:
+        raise ValueError(f"Se necesita Q > 0 y Δx > 0: Q={Q}, dx={dx}")
+
+    red = obtener_red_tramos()
+    resultados = calcular_sistema_completo(Q, D, rho, mu, epsilon, metodo_friccion)
+    numeros = red.numeros.tolist() if tramos is None else [int(t) for t in tramos]
+    for num in numeros:
+        if num not in resultados:
+            raise ValueError(f"Tramo inexistente: {num}")
+
+    a = celeridad_onda(D, espesor, rho)
+    dt = dx / a
+    A = area_seccion(D)
+    omega = 2.0 * np.pi * rpm / 60.0
+    cota_tramo = np.concatenate(([0.0], np.cumsum(red.altura)))
+
+    tuberias, nodos = [], []
+    inicio = 0
+    for num in numeros:
+        r = resultados[num]
+        k = red.indice(num)
+        L = r['longitud_estacion']
+        n_est = max(int(r['num_estaciones']), 1)
+        for s in range(n_est):
+            N = max(int(round(L / dx)), 1)
+            x = s * L + np.linspace(0.0, L, N + 1)
+            z = _cotas_tuberia(num, x, red.longitud_tuberia[k])
+            cota = z - z[0]
+            hf, hm = r['perdidas_friccion_colebrook'], r['perdidas_menores']
+
+            # Cargas permanentes relativas al inicio de la tubería
+            carga_descarga = cota[-1]
+            if r['es_bajada']:
+                coef, t_parada = np.zeros(3), np.inf
+                carga_inicial = carga_succion = 0.0
+            else:
+                curva = curva_punto_diseno(Q, r['carga_estacion'], eta_max)
+                coef = np.array(curva.carga)
+                P0 = rho * g * Q * r['carga_estacion'] / float(curva.eficiencia_en(Q))
+                t_parada = inercia * omega**2 / P0
+                carga_inicial = carga_descarga + hf + hm
+                carga_succion = carga_inicial - r['carga_estacion']
+            perdida_valvula = carga_inicial - hf - carga_descarga
+            if perdida_valvula <= 0:
+                raise ValueError(
+                    f"T{num}: el desnivel no alcanza para Q={Q} m³/s "
+                    f"(pérdida de válvula {perdida_valvula:.2f} m)"
+                )
+
+            celeridad = L / (N * dt)
+            tuberias.append({
+                'tramo': num, 'estacion': s, 'inicio': inicio, 'fin': inicio + N,
+                'longitud': L, 'celeridad': celeridad, 'caudal': Q,
+                'bomba': not r['es_bajada'], 'coef_bomba': coef,
+                'carga_succion': carga_succion, 't_parada': t_parada,
+                'carga_descarga': carga_descarga, 'perdida_valvula': perdida_valvula,
+                'cota_inicio': cota_tramo[k] + z[0],
+            })
+            nodos.append({
+                'x': x, 'cota': cota,
+                'B': np.full(N + 1, celeridad / (g * A)),
+                'R': np.full(N + 1, hf / (N * Q**2)),
+                'carga': carga_inicial - hf * np.arange(N + 1) / N,
+            })
+            inicio += N + 1
+
+    def por_tuberia(clave, dtype=float):
+        return np.array([t[clave] for t in tuberias], dtype=dtype)
+
+    def por_nodo(clave):
+        return np.concatenate([n[clave] for n in nodos])
+
+    return ConduccionTransitorio(
+        tramo=por_tuberia('tramo', np.int64),
+        estacion=por_tuberia('estacion', np.int64),
+        inicio=por_tuberia('inicio', np.int64),
+        fin=por_tuberia('fin', np.int64),
+        longitud=por_tuberia('longitud'),
+        celeridad=por_tuberia('celeridad'),
+        caudal=por_tuberia('caudal'),
+        bomba=por_tuberia('bomba', np.bool_),
+        coef_bomba=np.vstack([t['coef_bomba'] for t in tuberias]),
+        carga_succion=por_tuberia('carga_succion'),
+        t_parada=por_tuberia('t_parada'),
+        carga_descarga=por_tuberia('carga_descarga'),
+        perdida_valvula=por_tuberia('perdida_valvula'),
+        cota_inicio=por_tuberia('cota_inicio'),
+        x=por_nodo('x'),
+        cota=por_nodo('cota'),
+        B=por_nodo('B'),
+        R=por_nodo('R'),
+        carga=por_nodo('carga'),
+        dt=dt,
+        rho=rho,
+    )
+
+
+def _leyes_frontera(
+    conduccion: ConduccionTransitorio, evento: str, t: np.ndarray,
+    t_cierre: float, exponente_cierre: float,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Coeficientes de frontera de cada paso, (n_pasos, n_tuberías):
+    a₀·α² y a₁·α de las bombas (α = n/n₀) y τ·Q₀ de las válvulas.
+    """
+    c = conduccion
+    alfa = np.ones((t.size, c.n_tuberias))
+    tau = np.ones((t.size, c.n_tuberias))
+    if evento == 'disparo_bomba':
+        alfa = 1.0 / (1.0 + t[:, None] / c.t_parada)
+    elif evento == 'cierre_valvula':
+        tau = np.clip(1.0 - t[:, None] / t_cierre, 0.0, 1.0)**exponente_cierre
+        tau = np.broadcast_to(tau, alfa.shape)
+    return c.coef_bomba[:, 0] * alfa**2, c.coef_bomba[:, 1] * alfa, tau * c.caudal
+
+
+@perfilar()
+def simular_transitorio(
+    conduccion: ConduccionTransitorio,
+    evento: str = 'disparo_bomba',
+    duracion: float = 10.0,
+    t_cierre: float = 2.0,
+    exponente_cierre: float = 1.0,
+) -> dict:
+    """
+    Transitorio de `duracion` segundos desde el régimen permanente.
+
+    Fronteras (todas las tuberías a la vez, con C_M del segundo nodo y
+    C_P del penúltimo):
+        aguas arriba, bomba: a₀α² + a₁α·Q + a₂Q² + H_s = C_M + B·Q, con
+            Q = 0 si la retención cierra; tanque: H = H_s
+        aguas abajo, válvula: Q = τ·Q₀·√((C_P − B·Q − H_d)/ΔH₀), con el
+            signo de C_P − H_d (admite flujo inverso)
+
+    Retorna dict con:
+        t: instantes (s), (n_pasos + 1,)
+        carga_max, carga_min, presion_max, presion_min: envolventes por
+            nodo; carga absoluta (m) y presión manométrica (m.c.a.)
+        presion_inicial: presión del régimen permanente (m.c.a.)
+        x, cota: abscisa y cota absoluta de cada nodo (m)
+        carga_inicio, caudal_inicio, carga_fin, caudal_fin: series en la
+            bomba (o tanque) y en la válvula, (n_pasos + 1, n_tuberías)
+    """
+    c = conduccion
+    if evento not in EVENTOS:
+        raise ValueError(f"Evento desconocido: {evento!r}; opciones: {EVENTOS}")
+    if evento == 'disparo_bomba' and not c.bomba.any():
+        raise ValueError("Ninguna de las tuberías tiene bomba que disparar")
+    if duracion <= 0 or t_cierre <= 0:
+        raise ValueError(f"Duración y tiempo de cierre deben ser positivos: {duracion}, {t_cierre}")
+
+    n_pasos = int(np.ceil(duracion / c.dt))
+    t = np.arange(n_pasos + 1) * c.dt
+    a0, a1, tau_q0 = _leyes_frontera(c, evento, t[1:], t_cierre, exponente_cierre)
+
+    # Fronteras: nodos vecinos y coeficientes precalculados por paso
+    iu, id_ = c.inicio, c.fin
+    iu1, id1 = iu + 1, id_ - 1
+    Bt = c.B[iu]
+    c4 = -4.0 * c.coef_bomba[:, 2]
+    hs_a0 = c.carga_succion + a0
+    b = Bt - a1
+    b2 = b * b
+    B_s = Bt * tau_q0
+    B_s2 = B_s * B_s
+    B_s += 1e-300
+    dos_s = 2.0 * tau_q0
+    cuatro_dH0 = 4.0 * c.perdida_valvula
+    Hd = c.carga_descarga
+    # Con retención el caudal en la bomba no baja de cero
+    piso = np.where(c.bomba, 0.0, -np.inf)
+
+    H = c.carga.copy()
+    Q = np.repeat(c.caudal, id_ - iu + 1)
+    H_n, Q_n = np.empty_like(H), np.empty_like(Q)
+    w, cp, cm = np.empty_like(H), np.empty_like(H), np.empty_like(H)
+    inv_2B = 0.5 / c.B
+    h_max, h_min = H.copy(), H.copy()
+
+    carga_inicio, caudal_inicio, carga_fin, caudal_fin = (
+        np.empty((n_pasos + 1, c.n_tuberias)) for _ in range(4)
+    )
+    carga_inicio[0], caudal_inicio[0] = H[iu], Q[iu]
+    carga_fin[0], caudal_fin[0] = H[id_], Q[id_]
+
+    for k in range(n_pasos):
+        # w = (R·|Q| − B)·Q  →  C_P = H − w,  C_M = H + w
+        np.abs(Q, out=w)
+        w *= c.R
+        w -= c.B
+        w *= Q
+        np.subtract(H, w, out=cp)
+        np.add(H, w, out=cm)
+
+        # Nodos interiores (los extremos de cada tubería se reescriben abajo)
+        np.add(cp[:-2], cm[2:], out=H_n[1:-1])
+        H_n[1:-1] *= 0.5
+        np.subtract(cp[:-2], cm[2:], out=Q_n[1:-1])
+        Q_n[1:-1] *= inv_2B[1:-1]
+
+        # Aguas arriba: raíz de c₂Q² + b·Q − d = 0 escrita sin cancelación,
+        # Q = 2d / (b + √(b² + 4c₂d))
+        cm_u = cm[iu1]
+        d = hs_a0[k] - cm_u
+        raiz = c4 * d
+        raiz += b2[k]
+        np.maximum(raiz, 0.0, out=raiz)
+        np.sqrt(raiz, out=raiz)
+        raiz += b[k]
+        q_u = caudal_inicio[k + 1]
+        np.divide(d + d, raiz, out=q_u)
+        np.maximum(q_u, piso, out=q_u)
+        np.multiply(Bt, q_u, out=carga_inicio[k + 1])
+        carga_inicio[k + 1] += cm_u
+
+        # Aguas abajo: válvula hacia el tanque,
+        # |Q| = 2·s·|Δ| / (B·s + √((B·s)² + 4·|Δ|·ΔH₀)),  s = τ·Q₀
+        cp_d = cp[id1]
+        dd = cp_d - Hd
+        ad = np.abs(dd)
+        raiz = ad * cuatro_dH0
+        raiz += B_s2[k]
+        np.sqrt(raiz, out=raiz)
+        raiz += B_s[k]
+        q_d = caudal_fin[k + 1]
+        np.multiply(ad, dos_s[k], out=q_d)
+        q_d /= raiz
+        np.copysign(q_d, dd, out=q_d)
+        np.multiply(Bt, q_d, out=carga_fin[k + 1])
+        np.subtract(cp_d, carga_fin[k + 1], out=carga_fin[k + 1])
+
+        H_n[iu], Q_n[iu] = carga_inicio[k + 1], q_u
+        H_n[id_], Q_n[id_] = carga_fin[k + 1], q_d
+        np.maximum(h_max, H_n, out=h_max)
+        np.minimum(h_min, H_n, out=h_min)
+        H, H_n = H_n, H
+        Q, Q_n = Q_n, Q
+
+    # Cargas absolutas: se suma la cota de inicio de cada tubería
+    base = np.repeat(c.cota_inicio, id_ - iu + 1)
+    return {
+        't': t,
+        'carga_max': h_max + base,
+        'carga_min': h_min + base,
+        'presion_max': h_max - c.cota,
+        'presion_min': h_min - c.cota,
+        'presion_inicial': c.carga - c.cota,
+        'x': c.x,
+        'cota': c.cota + base,
+        'carga_inicio': carga_inicio + c.cota_inicio,
+        'caudal_inicio': caudal_inicio,
+        'carga_fin': carga_fin + c.cota_inicio,
+        'caudal_fin': caudal_fin,
+    }
+
+
+def tabla_envolventes(conduccion: ConduccionTransitorio, transitorio: dict) -> pd.DataFrame:
+    """
+    Resumen de simular_transitorio por tubería: presión máxima y mínima
+    (m.c.a. y MPa), dónde ocurren, y si superan la presión nominal o
+    bajan de la presión de vapor.
+    """
+    c = conduccion
+    a_mpa = c.rho * g / 1e6
+    vapor = (PRESION_VAPOR - PRESION_ATMOSFERICA) / (c.rho * g)
+    filas = []
+    for j in range(c.n_tuberias):
+        nodos = slice(c.inicio[j], c.fin[j] + 1)
+        p_max, p_min = transitorio['presion_max'][nodos], transitorio['presion_min'][nodos]
+        x = transitorio['x'][nodos]
+        i_max, i_min = int(np.argmax(p_max)), int(np.argmin(p_min))
+        filas.append({
+            'Tramo': int(c.tramo[j]),
+            'Estación': int(c.estacion[j]) + 1,
+            'L (m)': c.longitud[j],
+            'a (m/s)': c.celeridad[j],
+            'P permanente máx (m)': transitorio['presion_inicial'][nodos].max(),
+            'P máx (m)': p_max[i_max],
+            'P máx (MPa)': p_max[i_max] * a_mpa,
+            'x P máx (m)': x[i_max],
+            'P mín (m)': p_min[i_min],
+            'x P mín (m)': x[i_min],
+            'Supera PN': bool(p_max[i_max] * a_mpa > PRESION_NOMINAL_MPA),
+            'Cavitación': bool(p_min[i_min] < vapor),
+        })
+    return pd.DataFrame(filas)
@@ -0,0 +1,6 @@
+"""Configuración de pytest: raíz del proyecto en el path (como app.py y tools/)."""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,24 @@
+"""Pruebas del punto de operación de las estaciones (core/hidraulica.py)."""
+
+import dataclasses
+
+import numpy as np
+import pytest
+
+from core.hidraulica import punto_operacion
+from core.tramos import bombas_diseno
+
+
+def test_bombas_de_diseno_operan_en_el_caudal_de_diseno():
+    tabla = punto_operacion(bombas_diseno(0.025))
+    assert tabla['convergio'].all()
+    np.testing.assert_allclose(tabla['Q'], 0.025, rtol=1e-6)
+
+
+def test_bomba_sin_corte_con_el_sistema_lanza_error():
+    bombas = bombas_diseno(0.025)
+    # H = 1e4 + 1e6·Q³ vence la carga estática y crece más rápido que el sistema (~Q²): nunca se cortan
+    coef = np.zeros((bombas.n_estaciones, 4))
+    coef[:, 0], coef[:, 3] = 1e4, 1e6
+    with pytest.raises(ValueError, match='no corta'):
+        punto_operacion(dataclasses.replace(bombas, coef_carga=coef))
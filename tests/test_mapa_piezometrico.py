@@ -0,0 +1,19 @@
+"""Pruebas del mapa piezométrico (visualizaciones/mapa_piezometrico.py)."""
+
+import pytest
+
+from core.hidraulica import calcular_sistema_completo
+from core.perfil import calcular_perfil_piezometrico, presion_minima
+from visualizaciones.mapa_piezometrico import crear_mapa_piezometrico, limpiar_cache_figuras
+
+
+def test_anotacion_de_cavitacion_en_el_minimo_exacto():
+    resultados = calcular_sistema_completo()
+    exacto = presion_minima(calcular_perfil_piezometrico(resultados, puntos_por_metro=100.0))
+    assert exacto['cavitacion']
+
+    limpiar_cache_figuras()
+    fig = crear_mapa_piezometrico(resultados, 0.025, 0.1541)
+    (nota,) = [a for a in fig.layout.annotations if 'Cavitación' in (a.text or '')]
+    assert nota.x == pytest.approx(exacto['distancia'])
+    assert nota.y == pytest.approx(exacto['presion'])
@@ -0,0 +1,36 @@
+"""Pruebas del perfil piezométrico (core/perfil.py)."""
+
+import pytest
+
+from core.hidraulica import calcular_sistema_completo
+from core.perfil import calcular_perfil_piezometrico, presion_minima
+
+
+@pytest.fixture(scope='module')
+def resultados():
+    return calcular_sistema_completo()
+
+
+@pytest.mark.parametrize('resolucion', [
+    {'puntos_por_estacion': 1},
+    {'puntos_por_metro': 10.0},
+    {'puntos_por_metro': 0.25, 'max_puntos': 1000},
+])
+def test_presion_minima_no_depende_de_la_resolucion(resultados, resolucion):
+    referencia = presion_minima(calcular_perfil_piezometrico(resultados, puntos_por_estacion=5))
+    minimo = presion_minima(calcular_perfil_piezometrico(resultados, **resolucion))
+    assert minimo['presion'] == pytest.approx(referencia['presion'], abs=1e-12)
+    assert minimo['distancia'] == pytest.approx(referencia['distancia'], abs=1e-9)
+    assert minimo['tramo'] == referencia['tramo']
+
+
+def test_inicio_de_estacion_tras_la_perdida_menor(resultados):
+    perfil = calcular_perfil_piezometrico(resultados, puntos_por_estacion=1)
+    bombas = perfil['bombas']
+    r1 = resultados[1]
+    # Primera estación: punto estructural en x = 0 con E = H_bomba − hm
+    assert perfil['distancia'][1] == 0.0 and perfil['quiebre'][1]
+    assert perfil['egl'][1] == pytest.approx(
+        bombas['energia_despues'][0] - r1['perdidas_menores']
+    )
+    assert perfil['hgl'][1] == pytest.approx(perfil['egl'][1] - perfil['carga_cinetica'])
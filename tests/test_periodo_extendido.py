@@ -0,0 +1,34 @@
+"""Pruebas de la simulación en periodo extendido (core/periodo_extendido.py)."""
+
+import numpy as np
+import pytest
+
+from core.periodo_extendido import _incidencia_tanques, escenario_tramos, simular_periodo
+
+
+@pytest.fixture(scope='module')
+def simulacion():
+    escenario = escenario_tramos()
+    return escenario, simular_periodo(**escenario, duracion_h=6.0, paso_min=5.0)
+
+
+def test_balance_de_masa_en_tanques(simulacion):
+    escenario, sim = simulacion
+    red, tanques = escenario['red'], escenario['tanques']
+    assert sim['convergio']
+
+    # ΔV = (Σ Q_entra − Σ Q_sale − demanda)·Δt en cada tanque y paso
+    enlace, tanque, signo = _incidencia_tanques(red, tanques)
+    dt = (sim['t_h'][1] - sim['t_h'][0]) * 3600.0
+    entra = np.zeros((len(sim['caudal']), tanques.n_tanques))
+    np.add.at(entra.T, tanque, signo[:, None] * sim['caudal'][:, enlace].T)
+    demanda = np.outer(sim['multiplicador'], red.demanda[tanques.nodo])
+    volumen_esperado = (entra - demanda) * dt
+    volumen = np.diff(sim['nivel'], axis=0) * tanques.area
+
+    # Fuera de los pasos recortados por nivel mínimo/máximo, el balance es exacto
+    libre = (sim['nivel'][1:] > tanques.nivel_min) & (sim['nivel'][1:] < tanques.nivel_max)
+    assert libre.mean() > 0.9
+    assert np.all(sim['nivel'] >= tanques.nivel_min) and np.all(sim['nivel'] <= tanques.nivel_max)
+    np.testing.assert_allclose(volumen[libre], volumen_esperado[libre], rtol=1e-9, atol=1e-9)
+
@@ -0,0 +1,85 @@
+"""Pruebas del solucionador de Gradiente Global (core/red.py)."""
+
+import numpy as np
+import pytest
+
+import core.red as modulo_red
+from core.hidraulica import calcular_sistema_completo
+from core.red import construir_red, red_desde_tramos, resolver_red, tablas_solucion
+
+
+Q, D, RHO, MU, EPS = 0.025, 0.1541, 998.0, 0.001, 0.000046
+
+
+@pytest.fixture(scope='module')
+def solucion_tramos():
+    red = red_desde_tramos(Q, D, RHO, MU, EPS)
+    return red, resolver_red(red, rho=RHO, mu=MU)
+
+
+def test_tramos_convergen_con_caudal_de_diseno(solucion_tramos):
+    red, sol = solucion_tramos
+    assert sol['convergio']
+    np.testing.assert_allclose(sol['caudal'], Q, rtol=1e-6)
+
+
+def test_tramos_reproducen_calcular_sistema_completo(solucion_tramos):
+    red, sol = solucion_tramos
+    resultados = calcular_sistema_completo(Q, D, RHO, MU, EPS)
+    _, enlaces = tablas_solucion(red, sol)
+    for _, enlace in enlaces.iterrows():
+        r = resultados[int(enlace['enlace'][1])]
+        if enlace['tipo'] == 'bomba':
+            # La bomba entrega la carga de estación del diseño
+            assert -enlace['perdida'] == pytest.approx(r['carga_estacion'], abs=1e-4)
+        elif enlace['tipo'] == 'tuberia':
+            hf_hm = r['perdidas_friccion_colebrook'] + r['perdidas_menores']
+            assert enlace['perdida'] == pytest.approx(hf_hm, rel=1e-4)
+
+    carga = dict(zip(red.nodos, sol['carga']))
+    # Cada estación de subida llega justo a su cota y la planta a +100 m
+    assert carga['T1.E1.fin'] == pytest.approx(100.0, abs=1e-4)
+    assert carga['T3.E2.fin'] == pytest.approx(500.0, abs=1e-4)
+    assert carga['T8.E1.fin'] == pytest.approx(100.0, abs=1e-4)
+    # Los rompe-presión fijan la carga en la cota de llegada
+    assert carga['T5.E1.fin'] == pytest.approx(400.0, abs=1e-3)
+
+
+def _red_paralelo(demanda: float):
+    nodos = [
+        {'nombre': 'embalse', 'cota': 0.0, 'carga': 50.0},
+        {'nombre': 'a', 'cota': 0.0},
+        {'nombre': 'b', 'cota': 0.0, 'demanda': demanda},
+    ]
+    tuberia = {'tipo': 'tuberia', 'diametro': 0.1, 'rugosidad': 4.6e-5, 'K': 0.0}
+    enlaces = [
+        {'nombre': 'entrada', 'desde': 'embalse', 'hasta': 'a', 'longitud': 100.0, **tuberia},
+        {'nombre': 'p1', 'desde': 'a', 'hasta': 'b', 'longitud': 300.0, **tuberia},
+        {'nombre': 'p2', 'desde': 'a', 'hasta': 'b', 'longitud': 300.0, **tuberia},
+    ]
+    return construir_red(nodos, enlaces)
+
+
+def test_malla_en_paralelo_reparte_y_conserva_masa():
+    red = _red_paralelo(0.02)
+    sol = resolver_red(red)
+    assert sol['convergio']
+    q = dict(zip(red.enlaces, sol['caudal']))
+    assert q['entrada'] == pytest.approx(0.02, rel=1e-8)
+    assert q['p1'] == pytest.approx(0.01, rel=1e-6)
+    assert q['p2'] == pytest.approx(0.01, rel=1e-6)
+    assert np.max(np.abs(sol['desequilibrio'])) < 1e-8
+
+
+def test_cache_de_patrones_acotada():
+    # Cadenas de longitud distinta: una topología (y un patrón) nueva por cada una
+    for n in range(2, modulo_red.TAMANO_CACHE_PATRONES + 8):
+        nodos = [{'nombre': f'n{i}', 'cota': 0.0, 'demanda': 0.001} for i in range(n)]
+        nodos[0] = {'nombre': 'n0', 'cota': 0.0, 'carga': 10.0}
+        enlaces = [
+            {'nombre': f'e{i}', 'tipo': 'tuberia', 'desde': f'n{i}', 'hasta': f'n{i + 1}',
+             'longitud': 10.0, 'diametro': 0.1, 'rugosidad': 4.6e-5}
+            for i in range(n - 1)
+        ]
+        assert resolver_red(construir_red(nodos, enlaces))['convergio']
+    assert len(modulo_red._cache_patrones) <= modulo_red.TAMANO_CACHE_PATRONES
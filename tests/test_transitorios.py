@@ -0,0 +1,46 @@
+"""Pruebas del golpe de ariete por características (core/transitorios.py)."""
+
+import dataclasses
+
+import numpy as np
+import pytest
+
+from core.hidraulica import area_seccion, g
+from core.transitorios import construir_conduccion, simular_transitorio
+
+Q, D = 0.025, 0.1541
+
+
+def _sin_friccion(c):
+    """Misma malla con R = 0: carga plana y la pérdida por fricción pasa a la válvula."""
+    hf = c.carga[c.inicio] - c.carga[c.fin]
+    return dataclasses.replace(
+        c,
+        R=np.zeros_like(c.R),
+        carga=np.repeat(c.carga[c.inicio], c.fin - c.inicio + 1),
+        perdida_valvula=c.perdida_valvula + hf,
+    )
+
+
+@pytest.fixture(scope='module')
+def conduccion():
+    return construir_conduccion([5, 8], Q, D)
+
+
+def test_sin_evento_mantiene_el_permanente(conduccion):
+    r = simular_transitorio(conduccion, 'sin_evento', duracion=2.0)
+    np.testing.assert_allclose(r['presion_max'], r['presion_inicial'], atol=1e-8)
+    np.testing.assert_allclose(r['presion_min'], r['presion_inicial'], atol=1e-8)
+    np.testing.assert_allclose(r['caudal_inicio'], Q, rtol=1e-10)
+    np.testing.assert_allclose(r['caudal_fin'], Q, rtol=1e-10)
+
+
+def test_cierre_instantaneo_sin_friccion_da_joukowsky(conduccion):
+    c = _sin_friccion(conduccion)
+    # Dentro de 2L/a la onda reflejada aún no vuelve a la válvula
+    duracion = 0.9 * (2 * c.longitud / c.celeridad).min()
+    r = simular_transitorio(c, 'cierre_valvula', duracion=duracion, t_cierre=1e-9)
+    joukowsky = c.celeridad * (Q / area_seccion(D)) / g
+    sobrepresion = r['presion_max'][c.fin] - r['presion_inicial'][c.fin]
+    np.testing.assert_allclose(sobrepresion, joukowsky, rtol=1e-6)
+    np.testing.assert_allclose(r['caudal_fin'][-1], 0.0, atol=1e-12)
@@ -0,0 +1,309 @@
+"""
+benchmark.py — Banco de pruebas de rendimiento del motor hidráulico.
+
+Mide throughput (evaluaciones/s), percentiles de latencia y memoria pico
+de las funciones de core y de los constructores de figuras de
+visualizaciones. Escribe los resultados en JSON y, opcionalmente, los
+compara con una línea base guardada para detectar regresiones.
+
+Uso:
+    python tools/benchmark.py                          # todos los casos
+    python tools/benchmark.py --salida resultados.json
+    python tools/benchmark.py --comparar base.json     # falla si hay regresión
+    python tools/benchmark.py --filtro colebrook --repeticiones 50
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+# Asegurar que el directorio raíz del proyecto esté en el path
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+from core.hidraulica import (  # noqa: E402
+    f_colebrook, f_haaland, f_swamee_jain,
+    calcular_tramo, calcular_sistema_completo, calcular_sistema_lote,
+    punto_operacion, curvas_sistema,
+)
+from core.datos import extraer_datos_completos  # noqa: E402
+from core.perfil import calcular_perfil_piezometrico  # noqa: E402
+from core.periodo_extendido import escenario_tramos, simular_periodo  # noqa: E402
+from core.red import construir_red, red_desde_tramos, resolver_red  # noqa: E402
+from core.tramos import bombas_diseno  # noqa: E402
+from core.transitorios import construir_conduccion, simular_transitorio  # noqa: E402
+from visualizaciones.mapa_piezometrico import (  # noqa: E402
+    crear_mapa_piezometrico,
+    crear_desglose_perdidas,
+    crear_grafico_potencia,
+    crear_perfil_terreno_con_tramos,
+    crear_curvas_sistema,
+    limpiar_cache_figuras,
+)
+from visualizaciones.modelo_3d import (  # noqa: E402
+    datos_modelo_red, datos_modelo_tramo, generar_modelo_tramo,
+)
+
+
+# Parámetros de diseño (mismos valores por defecto que la app)
+Q, D, RHO, MU, EPS = 0.025, 0.1541, 998.0, 0.001, 0.000046
+RE_DISENO = RHO * (Q / (np.pi * D**2 / 4)) * D / MU
+
+# Tamaño de los barridos vectorizados
+N_ARREGLO = 10_000
+
+# Barrido grande para comparar Colebrook exacta y tabulada
+N_BARRIDO = 1_000_000
+
+# Lado de la malla sintética de resolver_red (2·n·(n−1) + 1 enlaces)
+N_MALLA = 50
+
+
+def _sin_cache(constructor, *args):
+    """Llama a un constructor de figuras con la caché de figuras vacía."""
+    limpiar_cache_figuras()
+    return constructor(*args)
+
+
+def _red_malla(n: int):
+    """
+    Red cuadrada de n×n nodos con demanda, alimentada por un embalse en
+    una esquina; diámetros y cotas aleatorios (semilla fija).
+    """
+    rng = np.random.default_rng(0)
+    nodos = [{'nombre': 'embalse', 'cota': 0.0, 'carga': 80.0}]
+    enlaces = [{
+        'nombre': 'alimentacion', 'desde': 'embalse', 'hasta': '0,0',
+        'longitud': 100.0, 'diametro': 0.8, 'rugosidad': EPS,
+    }]
+    for a in range(n):
+        for b in range(n):
+            nodos.append({'nombre': f"{a},{b}", 'cota': rng.uniform(0, 30), 'demanda': 2e-4})
+            for da, db in ((1, 0), (0, 1)):
+                if a + da < n and b + db < n:
+                    enlaces.append({
+                        'nombre': f"{a},{b}-{a + da},{b + db}",
+                        'desde': f"{a},{b}", 'hasta': f"{a + da},{b + db}",
+                        'longitud': 200.0, 'diametro': rng.choice([0.1, 0.15, 0.2, 0.3]),
+                        'rugosidad': EPS, 'K': 1.0,
+                    })
+    return construir_red(nodos, enlaces)
+
+
+def _casos() -> dict:
+    """
+    Casos de medición: nombre → (función sin argumentos, evaluaciones por llamada).
+
+    Las entradas se preparan aquí, fuera de la zona cronometrada.
+    """
+    rng = np.random.default_rng(0)
+    Re_arr = 10.0**rng.uniform(np.log10(4000), 8, N_ARREGLO)
+    Re_barrido = 10.0**rng.uniform(np.log10(4000), 8, N_BARRIDO)
+    eps_arr = 10.0**rng.uniform(-6, -3, N_ARREGLO)
+    Q_malla, D_malla = np.meshgrid(
+        np.linspace(0.005, 0.1, 100), np.linspace(0.05, 0.3, 100),
+    )
+    resultados = calcular_sistema_completo(Q, D, RHO, MU, EPS)
+    red_tramos = red_desde_tramos(Q, D, RHO, MU, EPS)
+    red_malla = _red_malla(N_MALLA)
+    bombas = bombas_diseno(Q, D, RHO, MU, EPS)
+    escenario = escenario_tramos(Q, D, RHO, MU, EPS)
+    conduccion_t8 = construir_conduccion(tramos=(8,), Q=Q, D=D, rho=RHO, mu=MU, epsilon=EPS)
+
+    return {
+        'f_colebrook/escalar': (lambda: f_colebrook(RE_DISENO, EPS, D), 1),
+        'f_colebrook/arreglo': (lambda: f_colebrook(Re_arr, EPS, D), N_ARREGLO),
+        'f_colebrook/rapido': (lambda: f_colebrook(Re_arr, EPS, D, modo='rapido'), N_ARREGLO),
+        # ε/D distinta por punto: la tabla no gana a Newton (ver f_colebrook_tabla)
+        'f_colebrook/rapido_rugosidad': (
+            lambda: f_colebrook(Re_arr, eps_arr, D, modo='rapido'), N_ARREGLO,
+        ),
+        'f_colebrook/barrido': (lambda: f_colebrook(Re_barrido, EPS, D), N_BARRIDO),
+        'f_colebrook/barrido_rapido': (
+            lambda: f_colebrook(Re_barrido, EPS, D, modo='rapido'), N_BARRIDO,
+        ),
+        'f_haaland/escalar': (lambda: f_haaland(RE_DISENO, EPS, D), 1),
+        'f_haaland/arreglo': (lambda: f_haaland(Re_arr, EPS, D), N_ARREGLO),
+        'f_swamee_jain/escalar': (lambda: f_swamee_jain(RE_DISENO, EPS, D), 1),
+        'f_swamee_jain/arreglo': (lambda: f_swamee_jain(Re_arr, EPS, D), N_ARREGLO),
+        'calcular_tramo': (
+            lambda: calcular_tramo(Q, D, L=1911.52, z=100.0, K_total=5.67), 1,
+        ),
+        'calcular_sistema_completo': (
+            lambda: calcular_sistema_completo(Q, D, RHO, MU, EPS), 8,
+        ),
+        'calcular_sistema_lote': (
+            lambda: calcular_sistema_lote(Q=Q_malla, D=D_malla), Q_malla.size * 8,
+        ),
+        'calcular_perfil_piezometrico': (
+            lambda: calcular_perfil_piezometrico(resultados), 1,
+        ),
+        'extraer_datos_completos': (extraer_datos_completos, 1),
+        'curvas_sistema': (lambda: curvas_sistema(), 200 * 8),
+        'punto_operacion': (
+            lambda: punto_operacion(bombas, D=0.13, epsilon=0.0003), bombas.n_estaciones,
+        ),
+        'resolver_red/tramos': (lambda: resolver_red(red_tramos), red_tramos.n_enlaces),
+        'resolver_red/malla': (lambda: resolver_red(red_malla), red_malla.n_enlaces),
+        # Un día a pasos de 1 min (evaluaciones = pasos)
+        'simular_periodo/dia': (lambda: simular_periodo(**escenario, duracion_h=24), 1440),
+        # 10 s de golpe de ariete en T8 con Δx ≈ 1 m (evaluaciones = nodos·pasos)
+        'simular_transitorio/T8': (
+            lambda: simular_transitorio(conduccion_t8, 'disparo_bomba', duracion=10.0),
+            conduccion_t8.n_nodos * int(np.ceil(10.0 / conduccion_t8.dt)),
+        ),
+        # Figuras: sin caché (se vacía antes de cada llamada) y con acierto de caché
+        'crear_mapa_piezometrico': (
+            lambda: _sin_cache(crear_mapa_piezometrico, resultados, Q, D), 1,
+        ),
+        'crear_mapa_piezometrico/cache': (
+            lambda: crear_mapa_piezometrico(resultados, Q, D), 1,
+        ),
+        'crear_desglose_perdidas': (
+            lambda: _sin_cache(crear_desglose_perdidas, resultados), 1,
+        ),
+        'crear_grafico_potencia': (
+            lambda: _sin_cache(crear_grafico_potencia, resultados), 1,
+        ),
+        'crear_perfil_terreno_con_tramos': (
+            lambda: _sin_cache(crear_perfil_terreno_con_tramos, resultados), 1,
+        ),
+        'crear_curvas_sistema': (
+            lambda: _sin_cache(crear_curvas_sistema, Q, 0.13, RHO, MU, 0.0003), 1,
+        ),
+        'generar_modelo_tramo': (lambda: generar_modelo_tramo(8, resultados), 1),
+        'datos_modelo_tramo': (lambda: datos_modelo_tramo(8, resultados), 1),
+        'datos_modelo_red': (lambda: datos_modelo_red(resultados), 1),
+    }
+
+
+def medir(funcion, evaluaciones: int, repeticiones: int, calentamiento: int = 2) -> dict:
+    """
+    Mide una función: latencia por llamada, throughput y memoria pico.
+
+    La memoria pico se toma en una llamada aparte bajo tracemalloc,
+    para no contaminar los tiempos con su sobrecosto.
+    """
+    for _ in range(calentamiento):
+        funcion()
+
+    tiempos = []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - t0)
+
+    tracemalloc.start()
+    funcion()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    t_ms = np.array(tiempos) * 1000.0
+    mediana_s = statistics.median(tiempos)
+    return {
+        'repeticiones': repeticiones,
+        'evaluaciones_por_llamada': evaluaciones,
+        'latencia_ms': {
+            'p50': float(np.percentile(t_ms, 50)),
+            'p90': float(np.percentile(t_ms, 90)),
+            'p99': float(np.percentile(t_ms, 99)),
+            'min': float(t_ms.min()),
+            'max': float(t_ms.max()),
+        },
+        'evaluaciones_por_s': evaluaciones / mediana_s if mediana_s > 0 else float('inf'),
+        'memoria_pico_kib': pico / 1024.0,
+    }
+
+
+def _metadatos() -> dict:
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=RAIZ, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'fecha': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'plataforma': platform.platform(),
+    }
+
+
+def comparar(actual: dict, base: dict, tolerancia: float) -> list[dict]:
+    """
+    Compara la latencia p50 de cada caso contra la línea base.
+
+    Retorna la lista de casos cuya p50 empeoró más que `tolerancia`
+    (fracción, p. ej. 0.2 = 20 %). Los casos ausentes en la base se omiten.
+    """
+    regresiones = []
+    for nombre, caso in actual['casos'].items():
+        ref = base.get('casos', {}).get(nombre)
+        if ref is None:
+            continue
+        p50 = caso['latencia_ms']['p50']
+        p50_ref = ref['latencia_ms']['p50']
+        cambio = (p50 - p50_ref) / p50_ref if p50_ref > 0 else 0.0
+        if cambio > tolerancia:
+            regresiones.append({
+                'caso': nombre, 'p50_ms': p50, 'p50_base_ms': p50_ref, 'cambio': cambio,
+            })
+    return regresiones
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--salida', type=Path, help='Archivo JSON de resultados')
+    parser.add_argument('--comparar', type=Path, help='JSON de línea base para detectar regresiones')
+    parser.add_argument('--tolerancia', type=float, default=0.20,
+                        help='Aumento relativo de p50 tolerado (por defecto 0.20)')
+    parser.add_argument('--repeticiones', type=int, default=30)
+    parser.add_argument('--filtro', default='', help='Solo casos cuyo nombre contenga este texto')
+    args = parser.parse_args(argv)
+
+    casos = {n: c for n, c in _casos().items() if args.filtro in n}
+    resultado = {'metadatos': _metadatos(), 'casos': {}}
+
+    print(f"{'caso':<34} {'p50 ms':>10} {'p99 ms':>10} {'eval/s':>14} {'pico KiB':>10}")
+    for nombre, (funcion, evaluaciones) in casos.items():
+        r = medir(funcion, evaluaciones, args.repeticiones)
+        resultado['casos'][nombre] = r
+        print(
+            f"{nombre:<34} {r['latencia_ms']['p50']:>10.3f} {r['latencia_ms']['p99']:>10.3f} "
+            f"{r['evaluaciones_por_s']:>14,.0f} {r['memoria_pico_kib']:>10.1f}"
+        )
+
+    if args.salida:
+        args.salida.parent.mkdir(parents=True, exist_ok=True)
+        args.salida.write_text(json.dumps(resultado, indent=2), encoding='utf-8')
+        print(f"\nResultados guardados en {args.salida}")
+
+    if args.comparar:
+        base = json.loads(args.comparar.read_text(encoding='utf-8'))
+        regresiones = comparar(resultado, base, args.tolerancia)
+        if regresiones:
+            print(f"\n{len(regresiones)} regresión(es) frente a {args.comparar}:")
+            for reg in regresiones:
+                print(
+                    f"  {reg['caso']}: {reg['p50_base_ms']:.3f} → {reg['p50_ms']:.3f} ms "
+                    f"(+{reg['cambio']:.0%})"
+                )
+            return 1
+        print(f"\nSin regresiones frente a {args.comparar} (tolerancia {args.tolerancia:.0%}).")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""
+vendorizar_recursos.py — Descarga Three.js y la fuente Inter a static/vendor/.
+
+Deja la app lista para redes sin salida a Internet: el modelo 3D y la
+tipografía se sirven desde el propio servidor de Streamlit. Registra el
+SHA-256 de cada archivo en static/vendor/MANIFIESTO.json para poder
+verificar la copia más tarde.
+
+Uso:
+    python tools/vendorizar_recursos.py              # descarga lo que falte
+    python tools/vendorizar_recursos.py --forzar     # vuelve a descargar todo
+    python tools/vendorizar_recursos.py --verificar  # compara con el manifiesto
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+import urllib.request
+from pathlib import Path
+
+# Asegurar que el directorio raíz del proyecto esté en el path
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+from visualizaciones.recursos import DIR_STATIC, RECURSOS, ruta_local  # noqa: E402
+
+RUTA_MANIFIESTO = DIR_STATIC / 'vendor' / 'MANIFIESTO.json'
+
+
+def _sha256(ruta: Path) -> str:
+    return hashlib.sha256(ruta.read_bytes()).hexdigest()
+
+
+def _leer_manifiesto() -> dict:
+    if RUTA_MANIFIESTO.is_file():
+        return json.loads(RUTA_MANIFIESTO.read_text(encoding='utf-8'))
+    return {}
+
+
+def descargar(nombre: str, timeout: float = 30.0) -> Path:
+    """Descarga un recurso a su ruta versionada (escritura atómica)."""
+    destino = ruta_local(nombre)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    with urllib.request.urlopen(RECURSOS[nombre]['origen'], timeout=timeout) as resp:
+        contenido = resp.read()
+    temporal = destino.with_suffix(destino.suffix + '.tmp')
+    temporal.write_bytes(contenido)
+    temporal.replace(destino)
+    return destino
+
+
+def verificar() -> list[str]:
+    """Nombres de recursos ausentes o cuyo SHA-256 no coincide con el manifiesto."""
+    manifiesto = _leer_manifiesto()
+    errores = []
+    for nombre in RECURSOS:
+        ruta = ruta_local(nombre)
+        esperado = manifiesto.get(nombre, {}).get('sha256')
+        if not ruta.is_file() or esperado is None or _sha256(ruta) != esperado:
+            errores.append(nombre)
+    return errores
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--forzar', action='store_true', help='Descargar aunque ya exista')
+    parser.add_argument('--verificar', action='store_true', help='Solo verificar contra el manifiesto')
+    args = parser.parse_args(argv)
+
+    if args.verificar:
+        errores = verificar()
+        for nombre in errores:
+            print(f"✗ {nombre}: ausente o con SHA-256 distinto ({RECURSOS[nombre]['ruta']})")
+        if not errores:
+            print(f"✓ {len(RECURSOS)} recursos verificados")
+        return 1 if errores else 0
+
+    manifiesto = _leer_manifiesto()
+    for nombre, recurso in RECURSOS.items():
+        ruta = ruta_local(nombre)
+        if ruta.is_file() and not args.forzar:
+            print(f"= {recurso['ruta']}")
+        else:
+            try:
+                descargar(nombre)
+            except OSError as e:
+                print(f"✗ {recurso['ruta']}: {e}")
+                return 1
+            print(f"↓ {recurso['ruta']}")
+        manifiesto[nombre] = {
+            'ruta': recurso['ruta'],
+            'origen': recurso['origen'],
+            'sha256': _sha256(ruta),
+            'bytes': ruta.stat().st_size,
+        }
+
+    RUTA_MANIFIESTO.parent.mkdir(parents=True, exist_ok=True)
+    RUTA_MANIFIESTO.write_text(json.dumps(manifiesto, indent=2), encoding='utf-8')
+    print(f"\nManifiesto: {RUTA_MANIFIESTO.relative_to(RAIZ)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -5,134 +5,188 @@ Visualiza la línea de energía (EGL), la línea de gradiente hidráulico (HGL),
 y las pérdidas/ganancias de presión en cada bomba y válvula del sistema.
 """
 
+import functools
+import json
+import threading
+from collections import OrderedDict
+
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import numpy as np
 
+from core.perfilado import perfilar
+
+
+# ====================================
+# CACHÉ DE FIGURAS (LRU)
+# ====================================
+# Guarda el JSON serializado de cada figura, indexado por los parámetros
+# de entrada redondeados. Al revisitar una configuración se reconstruye
+# la figura desde el JSON sin validación de Plotly (~7 ms frente a
+# ~180 ms del mapa piezométrico completo).
+
+TAMANO_CACHE_FIGURAS = 64
+CIFRAS_CLAVE_FIGURAS = 10   # cifras significativas al redondear la clave
+
+_cache_figuras: OrderedDict = OrderedDict()
+_candado_figuras = threading.Lock()
+_estadisticas_figuras = {'aciertos': 0, 'fallos': 0}
+
+
+def _clave_valor(valor):
+    """Valor escalar redondeado a CIFRAS_CLAVE_FIGURAS cifras significativas."""
+    if isinstance(valor, (bool, np.bool_)):
+        return bool(valor)
+    if isinstance(valor, (int, float, np.integer, np.floating)):
+        return format(float(valor), f'.{CIFRAS_CLAVE_FIGURAS}g')
+    if isinstance(valor, str):
+        return valor
+    return None   # listas/dicts anidados (p. ej. accesorios): cubiertos por la huella
+
+
+def _clave_figura(nombre: str, args: tuple, kwargs: dict) -> tuple:
+    """
+    Clave de caché: función + huella de tramos + entradas redondeadas.
+
+    De `resultados` se toman solo los campos escalares; lo que depende de
+    la definición de tramos queda cubierto por huella_tramos().
+    """
+    from core.tramos import huella_tramos
+
+    def clave_arg(arg):
+        if isinstance(arg, dict):   # resultados: {num_tramo: {campo: valor}}
+            return tuple(
+                (num, tuple(
+                    (k, _clave_valor(v)) for k, v in sorted(r.items())
+                    if _clave_valor(v) is not None
+                ))
+                for num, r in sorted(arg.items())
+            )
+        return _clave_valor(arg)
+
+    return (
+        nombre,
+        huella_tramos(),
+        tuple(clave_arg(a) for a in args),
+        tuple((k, clave_arg(v)) for k, v in sorted(kwargs.items())),
+    )
+
+
+def _cache_figura(funcion):
+    """Decorador: memoriza la figura como JSON en la caché LRU compartida."""
+    @functools.wraps(funcion)
+    def envoltura(*args, **kwargs):
+        clave = _clave_figura(funcion.__name__, args, kwargs)
+        with _candado_figuras:
+            figura_json = _cache_figuras.get(clave)
+            if figura_json is not None:
+                _cache_figuras.move_to_end(clave)
+                _estadisticas_figuras['aciertos'] += 1
+        if figura_json is not None:
+            # Se devuelve una figura nueva: el llamador puede modificarla
+            return go.Figure(json.loads(figura_json), _validate=False)
+
+        fig = funcion(*args, **kwargs)
+        figura_json = fig.to_json()
+        with _candado_figuras:
+            _estadisticas_figuras['fallos'] += 1
+            _cache_figuras[clave] = figura_json
+            _cache_figuras.move_to_end(clave)
+            while len(_cache_figuras) > TAMANO_CACHE_FIGURAS:
+                _cache_figuras.popitem(last=False)
+        return fig
+    return envoltura
+
+
+def limpiar_cache_figuras() -> None:
+    """Vacía la caché de figuras y reinicia sus contadores."""
+    with _candado_figuras:
+        _cache_figuras.clear()
+        _estadisticas_figuras.update(aciertos=0, fallos=0)
+
+
+def estadisticas_cache_figuras() -> dict:
+    """Aciertos, fallos, entradas y tamaño total (bytes de JSON) de la caché."""
+    with _candado_figuras:
+        return {
+            **_estadisticas_figuras,
+            'entradas': len(_cache_figuras),
+            'capacidad': TAMANO_CACHE_FIGURAS,
+            'bytes': sum(len(j) for j in _cache_figuras.values()),
+        }
 
+
+# Color de cada tramo (perfil del terreno y curvas del sistema)
+COLORES_TRAMO = {
+    1: '#ef4444',  # Red - Pump
+    2: '#dc2626',  # Dark Red - Pump
+    3: '#ef4444',  # Red - Pump
+    4: '#f59e0b',  # Amber - Flat
+    5: '#3b82f6',  # Blue - Gravity
+    6: '#2563eb',  # Dark Blue - Gravity
+    7: '#3b82f6',  # Blue - Gravity
+    8: '#a855f7',  # Purple - Underground
+}
+
+# Resolución del perfil del mapa: ~1 punto cada 4 m de tubería, acotado
+# por decimación min/max para no inflar el JSON que recibe el navegador
+PUNTOS_POR_METRO_MAPA = 0.25
+MAX_PUNTOS_MAPA = 1000
+
+
+@perfilar()
+@_cache_figura
 def crear_mapa_piezometrico(resultados: dict, Q: float, D: float) -> go.Figure:
     """
     Genera el mapa piezométrico completo del sistema.
     """
-    from core.tramos import obtener_definicion_tramos
-    
-    definiciones = obtener_definicion_tramos()
-    
-    dist_puntos = [0.0]       # Distancia acumulada
-    elev_puntos = [0.0]       # Elevación del terreno
-    egl_puntos = [0.0]        # Línea de energía
-    hgl_puntos = [0.0]        # Línea gradiente hidráulico
-    presion_puntos = [0.0]    # Presión manométrica (m.c.a.)
-    etiquetas = ['Río\n(Captación)']
-    
-    dist_acum = 0.0
-    elev_acum = 0.0
-    energia_actual = 0.0
-    
-    bombas_x = []
-    bombas_y_antes = []
-    bombas_y_despues = []
-    bombas_label = []
-    
-    valvulas_x = []
-    valvulas_y = []
-    valvulas_label = []
-    
-    hv = resultados[1]['carga_cinetica']
+    from core.perfil import calcular_perfil_piezometrico, presion_minima
     
-    for num_tramo in range(1, 9):
-        if num_tramo > 7:
-            dist_tramo = definiciones[8]['distancia']
-        else:
-            dist_tramo = definiciones[num_tramo]['distancia']
-        
-        r = resultados[num_tramo]
-        n_est = r['num_estaciones']
-        L_est = r['longitud_estacion']
-        hf_est = r['perdidas_friccion_colebrook']
-        hm_est = r['perdidas_menores']
-        z_total = definiciones[num_tramo]['altura']
-        z_est = z_total / n_est if n_est > 0 else z_total
-        
-        for est in range(n_est):
-            x_inicio = dist_acum
-            
-            if not r['es_bajada']:
-                H_bomba = r['carga_estacion']
-                bombas_x.append(x_inicio)
-                bombas_y_antes.append(energia_actual)
-                energia_actual += H_bomba
-                bombas_y_despues.append(energia_actual)
-                bombas_label.append(
-                    f'Bomba T{num_tramo}'
-                    + (f'-E{est+1}' if n_est > 1 else '')
-                    + f'\nΔH = {H_bomba:.1f} m'
-                    + f'\nP = {r["potencia_kw"]:.1f} kW'
-                )
-            
-            dist_sub = dist_tramo / n_est
-            n_puntos_sub = 5
-            
-            for j in range(1, n_puntos_sub + 1):
-                frac = j / n_puntos_sub
-                dx = dist_sub * frac
-                dz = z_est * frac
-                
-                hf_parcial = hf_est * frac
-                hm_parcial = hm_est if j == 1 else 0
-                
-                x_actual = x_inicio + dx
-                elev_actual = elev_acum + dz
-                energia_actual -= (hf_est / n_puntos_sub + (hm_est if j == 1 else 0))
-                
-                dist_puntos.append(x_actual)
-                elev_puntos.append(elev_actual)
-                egl_puntos.append(energia_actual)
-                hgl_puntos.append(energia_actual - hv)
-                presion_puntos.append(energia_actual - hv - elev_actual)
-                
-                if j == n_puntos_sub:
-                    etiquetas.append(
-                        f'T{num_tramo}' + (f'-E{est+1}' if n_est > 1 else '') + ' fin'
-                    )
-                else:
-                    etiquetas.append('')
-            
-            elev_acum += z_est
-            dist_acum += dist_sub
-            
-            if r['es_bajada']:
-                tiene_tanque = definiciones[num_tramo].get('tanque_rompe_presion', True)
-                
-                if tiene_tanque:
-                    egl_meta = elev_acum + hv
-                    perdida = energia_actual - egl_meta
-                    
-                    valvulas_x.append(dist_acum)
-                    valvulas_y.append(energia_actual)
-                    valvulas_label.append(
-                        f'Tanque rompe-presión T{num_tramo}'
-                        + (f'-E{est+1}' if n_est > 1 else '')
-                        + f'\nDisipa: {perdida:.1f} m'
-                    )
-                    
-                    energia_actual -= perdida
-                    
-                    if abs(perdida) > 0.01:
-                        dist_puntos.append(dist_acum)
-                        elev_puntos.append(elev_acum)
-                        egl_puntos.append(energia_actual)
-                        hgl_puntos.append(energia_actual - hv)
-                        presion_puntos.append(energia_actual - hv - elev_acum)
-                        etiquetas.append(f'Tanque T{num_tramo}' + (f'-E{est+1}' if n_est > 1 else ''))
-                else:
-                    presion_local = energia_actual - hv - elev_acum
-                    valvulas_x.append(dist_acum)
-                    valvulas_y.append(energia_actual)
-                    valvulas_label.append(
-                        f'T{num_tramo} → Gravedad a T{num_tramo+1}'
-                        + f'\nCabeza disponible: {presion_local:.1f} m'
-                    )
+    perfil = calcular_perfil_piezometrico(
+        resultados,
+        puntos_por_metro=PUNTOS_POR_METRO_MAPA,
+        max_puntos=MAX_PUNTOS_MAPA,
+    )
+    dist_puntos = perfil['distancia']
+    bombas = perfil['bombas']
+    tanques = perfil['tanques']
+    transferencias = perfil['transferencias']
+    
+    def sufijo_estacion(est, n_est):
+        return f'-E{est+1}' if n_est > 1 else ''
+    
+    bombas_x = bombas['distancia'].tolist()
+    bombas_y_antes = bombas['energia_antes'].tolist()
+    bombas_y_despues = bombas['energia_despues'].tolist()
+    bombas_label = [
+        f'Bomba T{t}' + sufijo_estacion(e, n)
+        + f'\nΔH = {H:.1f} m'
+        + f'\nP = {P:.1f} kW'
+        for t, e, n, H, P in zip(
+            bombas['tramo'].tolist(), bombas['estacion'].tolist(),
+            bombas['num_estaciones'].tolist(), bombas['carga'].tolist(),
+            bombas['potencia_kw'].tolist(),
+        )
+    ]
+    
+    valvulas_x = tanques['distancia'].tolist() + transferencias['distancia'].tolist()
+    valvulas_y = tanques['energia'].tolist() + transferencias['energia'].tolist()
+    valvulas_label = [
+        f'Tanque rompe-presión T{t}' + sufijo_estacion(e, n)
+        + f'\nDisipa: {d:.1f} m'
+        for t, e, n, d in zip(
+            tanques['tramo'].tolist(), tanques['estacion'].tolist(),
+            tanques['num_estaciones'].tolist(), tanques['disipacion'].tolist(),
+        )
+    ] + [
+        f'T{t} → Gravedad a T{t_rec}'
+        + f'\nCabeza disponible: {h:.1f} m'
+        for t, t_rec, h in zip(
+            transferencias['tramo'].tolist(),
+            transferencias['tramo_receptor'].tolist(),
+            transferencias['cabeza_disponible'].tolist(),
+        )
+    ]
     
     # ====== Crear figura ======
     fig = make_subplots(
@@ -149,7 +203,7 @@ def crear_mapa_piezometrico(resultados: dict, Q: float, D: float) -> go.Figure:
     
     # Terreno (relleno)
     fig.add_trace(go.Scatter(
-        x=dist_puntos, y=elev_puntos,
+        x=dist_puntos, y=perfil['elevacion'],
         fill='tozeroy',
         fillcolor='rgba(100, 116, 139, 0.4)', # Slate 500 con opacidad
         line=dict(color='#94a3b8', width=1),
@@ -159,7 +213,7 @@ def crear_mapa_piezometrico(resultados: dict, Q: float, D: float) -> go.Figure:
     
     # EGL
     fig.add_trace(go.Scatter(
-        x=dist_puntos, y=egl_puntos,
+        x=dist_puntos, y=perfil['egl'],
         line=dict(color='#00d4ff', width=3), # Cian eléctrico
         name='EGL (Línea de Energía)',
         hovertemplate='<b>Distancia:</b> %{x:.0f} m<br><b>EGL:</b> %{y:.1f} m<extra></extra>',
@@ -167,60 +221,61 @@ def crear_mapa_piezometrico(resultados: dict, Q: float, D: float) -> go.Figure:
     
     # HGL
     fig.add_trace(go.Scatter(
-        x=dist_puntos, y=hgl_puntos,
+        x=dist_puntos, y=perfil['hgl'],
         line=dict(color='#f4c430', width=3, dash='dash'), # Amarillo dorado
         name='HGL (Gradiente Hidráulico)',
         hovertemplate='<b>Distancia:</b> %{x:.0f} m<br><b>HGL:</b> %{y:.1f} m<extra></extra>',
     ), row=1, col=1)
     
-    # Marcadores de bombas
-    for i, (bx, by_a, by_d, blbl) in enumerate(zip(
-        bombas_x, bombas_y_antes, bombas_y_despues, bombas_label
-    )):
+    # Marcadores de bombas: una sola traza con segmentos separados por None
+    # (el costo de Plotly escala con el número de trazas, no de puntos)
+    if bombas_x:
+        n_bombas = len(bombas_x)
+        seg_x = np.full(3 * n_bombas, None, dtype=object)
+        seg_y = np.full(3 * n_bombas, None, dtype=object)
+        seg_txt = np.full(3 * n_bombas, '', dtype=object)
+        seg_x[0::3] = seg_x[1::3] = bombas_x
+        seg_y[0::3] = bombas_y_antes
+        seg_y[1::3] = bombas_y_despues
+        seg_txt[0::3] = seg_txt[1::3] = bombas_label
+
         fig.add_trace(go.Scatter(
-            x=[bx, bx], y=[by_a, by_d],
+            x=seg_x.tolist(), y=seg_y.tolist(),
             mode='lines+markers',
             line=dict(color='#10B981', width=4), # Green
             marker=dict(size=10, symbol='triangle-up', color='#10B981'),
-            name=f'Bomba T{i+1}' if i == 0 else None,
-            showlegend=(i == 0),
-            hovertext=blbl,
+            name='Estaciones de bombeo',
+            hovertext=seg_txt.tolist(),
             hoverinfo='text',
         ), row=1, col=1)
-        
-        fig.add_annotation(
-            x=bx, y=(by_a + by_d) / 2,
-            text=f'<b>⬆ {by_d - by_a:.0f} m</b>',
-            showarrow=True,
-            arrowhead=2,
-            arrowcolor='#10B981',
-            font=dict(size=11, color='#059669', family="Inter, sans-serif"),
-            bgcolor="rgba(0,0,0,0.7)",
-            bordercolor="#10B981",
-            borderwidth=1,
-            borderpad=3,
-            ax=45, ay=0,
-            row=1, col=1,
-        )
-    
+
+        # Etiquetas ΔH como texto de una traza (en lugar de una anotación por bomba)
+        fig.add_trace(go.Scatter(
+            x=bombas_x,
+            y=[(a + d) / 2 for a, d in zip(bombas_y_antes, bombas_y_despues)],
+            mode='text',
+            text=[f'<b>  ⬆ {d - a:.0f} m</b>' for a, d in zip(bombas_y_antes, bombas_y_despues)],
+            textposition='middle right',
+            textfont=dict(size=11, color='#059669', family="Inter, sans-serif"),
+            showlegend=False,
+            hoverinfo='skip',
+        ), row=1, col=1)
+
     # Marcadores de válvulas
-    for i, (vx, vy, vlbl) in enumerate(zip(valvulas_x, valvulas_y, valvulas_label)):
+    if valvulas_x:
         fig.add_trace(go.Scatter(
-            x=[vx], y=[vy],
+            x=valvulas_x, y=valvulas_y,
             mode='markers',
             marker=dict(size=14, symbol='x', color='#ef4444', line=dict(width=2)), # Red
-            name='Válv. Estrang.' if i == 0 else None,
-            showlegend=(i == 0),
-            hovertext=vlbl,
+            name='Válv. Estrang.',
+            hovertext=valvulas_label,
             hoverinfo='text',
         ), row=1, col=1)
     
     # --- Panel inferior: Presión manométrica ---
     
-    colores_presion = ['#10B981' if p >= 0 else '#EF4444' for p in presion_puntos]
-    
     fig.add_trace(go.Scatter(
-        x=dist_puntos, y=presion_puntos,
+        x=dist_puntos, y=perfil['presion'],
         fill='tozeroy',
         fillcolor='rgba(16, 185, 129, 0.1)', # Green tint
         line=dict(color='#22d3ee', width=2), # Cyan
@@ -237,21 +292,20 @@ def crear_mapa_piezometrico(resultados: dict, Q: float, D: float) -> go.Figure:
         row=2, col=1,
     )
 
-    # Anotaciones de presión negativa (Fix: Check for empty list)
-    if presion_puntos:
-        min_presion = min(presion_puntos)
-        if min_presion < 0:
-            idx_min = presion_puntos.index(min_presion)
-            fig.add_annotation(
-                x=dist_puntos[idx_min], y=min_presion,
-                text=f'<b>⚠️ Cavitación ({min_presion:.1f} m)</b>',
-                showarrow=True,
-                arrowhead=2,
-                arrowcolor='#EF4444',
-                font=dict(size=12, color='#EF4444', family="Inter, sans-serif"),
-                bgcolor="rgba(0,0,0,0.8)",
-                row=2, col=1,
-            )
+    # Anotación del punto de presión mínima si hay riesgo de cavitación; se
+    # toma de los quiebres, no de la serie remuestreada y decimada
+    minimo = presion_minima(perfil, solo_quiebres=True)
+    if minimo['cavitacion']:
+        fig.add_annotation(
+            x=minimo['distancia'], y=minimo['presion'],
+            text=f'<b>⚠️ Cavitación ({minimo["presion"]:.1f} m)</b>',
+            showarrow=True,
+            arrowhead=2,
+            arrowcolor='#EF4444',
+            font=dict(size=12, color='#EF4444', family="Inter, sans-serif"),
+            bgcolor="rgba(0,0,0,0.8)",
+            row=2, col=1,
+        )
     
     # ====== Formato ======
     fig.update_layout(
@@ -312,6 +366,8 @@ def crear_mapa_piezometrico(resultados: dict, Q: float, D: float) -> go.Figure:
     return fig
 
 
+@perfilar()
+@_cache_figura
 def crear_desglose_perdidas(resultados: dict) -> go.Figure:
     """
     Gráfico de barras apiladas: desglose de pérdidas por tramo.
@@ -378,6 +434,8 @@ def crear_desglose_perdidas(resultados: dict) -> go.Figure:
     return fig
 
 
+@perfilar()
+@_cache_figura
 def crear_grafico_potencia(resultados: dict) -> go.Figure:
     """Gráfico de barras: potencia requerida por tramo (kW y HP)."""
     tramos_nums = list(range(1, 9))
@@ -428,11 +486,13 @@ def crear_grafico_potencia(resultados: dict) -> go.Figure:
     return fig
 
 
+@perfilar()
+@_cache_figura
 def crear_perfil_terreno_con_tramos(resultados: dict) -> go.Figure:
     """
     Perfil de elevación del terreno con tramos coloreados.
     """
-    from core.tramos import obtener_definicion_tramos, obtener_elevaciones_acumuladas
+    from core.tramos import obtener_red_tramos, obtener_elevaciones_acumuladas
     
     puntos = obtener_elevaciones_acumuladas()
     
@@ -452,39 +512,29 @@ def crear_perfil_terreno_con_tramos(resultados: dict) -> go.Figure:
     ))
     
     # Segmentos por tramo con colores
-    definiciones = obtener_definicion_tramos()
-    colores_tramo = {
-        1: '#ef4444',  # Red - Pump
-        2: '#dc2626',  # Dark Red - Pump
-        3: '#ef4444',  # Red - Pump
-        4: '#f59e0b',  # Amber - Flat
-        5: '#3b82f6',  # Blue - Gravity
-        6: '#2563eb',  # Dark Blue - Gravity
-        7: '#3b82f6',  # Blue - Gravity
-        8: '#a855f7',  # Purple - Underground
-    }
+    red = obtener_red_tramos()
+    colores_tramo = COLORES_TRAMO
     
     dist_acum = 0.0
     elev_acum = 0.0
     
-    for i in range(1, 8):
-        d = definiciones[i]
+    for j, i in enumerate(red.numeros[:7].tolist()):
         x0 = dist_acum
         y0 = elev_acum
-        x1 = dist_acum + d['distancia']
-        y1 = elev_acum + d['altura']
+        x1 = dist_acum + red.distancia[j]
+        y1 = elev_acum + red.altura[j]
         
         fig.add_trace(go.Scatter(
             x=[x0, x1], y=[y0, y1],
             mode='lines+markers',
             line=dict(color=colores_tramo[i], width=5),
             marker=dict(size=8, color=colores_tramo[i]),
-            name=f'T{i}: {d["tipo"]}',
+            name=f'T{i}: {red.tipos[j]}',
             hovertemplate=(
                 f'<b>Tramo {i}</b><br>'
                 f'Dist: %{{x:.0f}} m<br>'
                 f'Elev: %{{y:.0f}} m<br>'
-                f'Pendiente: {d["pendiente"]:.1f}°'
+                f'Pendiente: {red.pendiente[j]:.1f}°'
                 '<extra></extra>'
             ),
         ))
@@ -540,3 +590,104 @@ def crear_perfil_terreno_con_tramos(resultados: dict) -> go.Figure:
     )
     
     return fig
+
+
+@perfilar()
+@_cache_figura
+def crear_curvas_sistema(
+    Q: float, D: float, rho: float, mu: float, epsilon: float,
+    Q_max: float = 0.06,
+) -> go.Figure:
+    """
+    Familia de curvas del sistema H(Q) por estación, una por tramo.
+    
+    Izquierda: estaciones de bombeo, con las curvas de las bombas de
+    diseño (bombas_diseno, para 25 L/s en DN150) y el punto de operación
+    real de cada una con la tubería y el fluido actuales. Derecha: bajadas,
+    donde H < 0 es la carga que disipan válvulas y tanques.
+    """
+    from core.hidraulica import curvas_sistema, punto_operacion
+    from core.tramos import bombas_diseno, obtener_red_tramos
+    
+    red = obtener_red_tramos()
+    curvas = curvas_sistema(D=D, rho=rho, mu=mu, epsilon=epsilon, Q_max=Q_max)
+    q_lps = curvas['Q'] * 1000
+    bombas = bombas_diseno()
+    operacion = punto_operacion(bombas, D=D, rho=rho, mu=mu, epsilon=epsilon)
+    
+    fig = make_subplots(
+        rows=1, cols=2,
+        subplot_titles=('<b>Estaciones de bombeo</b>', '<b>Bajadas por gravedad</b>'),
+    )
+    for j, num in enumerate(red.numeros.tolist()):
+        col = 2 if red.es_bajada[j] else 1
+        color = COLORES_TRAMO[num]
+        fig.add_trace(go.Scatter(
+            x=q_lps, y=curvas['carga_sistema'][:, j],
+            mode='lines',
+            line=dict(color=color, width=3),
+            name=f'T{num} sistema',
+            legendgroup=f'T{num}',
+            hovertemplate=(
+                f'<b>T{num}</b> (por estación, ×{int(red.num_estaciones[j])})<br>'
+                'Q: %{x:.1f} L/s<br>H: %{y:.2f} m<extra></extra>'
+            ),
+        ), row=1, col=col)
+    
+    for fila in operacion.itertuples():
+        if fila.estacion != 1:
+            continue   # estaciones del mismo tramo: misma curva y mismo punto
+        color = COLORES_TRAMO[fila.tramo]
+        i = int(np.flatnonzero(bombas.tramo == fila.tramo)[0])
+        H_bomba = np.polynomial.polynomial.polyval(curvas['Q'], bombas.coef_carga[i])
+        positiva = H_bomba > 0
+        fig.add_trace(go.Scatter(
+            x=q_lps[positiva],
+            y=H_bomba[positiva],
+            mode='lines',
+            line=dict(color=color, width=2, dash='dash'),
+            name=f'T{fila.tramo} bomba',
+            legendgroup=f'T{fila.tramo}',
+            hovertemplate=(
+                f'<b>{fila.bomba}</b> (cierre {bombas.coef_carga[i, 0]:.0f} m)<br>'
+                'Q: %{x:.1f} L/s<br>H: %{y:.2f} m<extra></extra>'
+            ),
+        ), row=1, col=1)
+        fig.add_trace(go.Scatter(
+            x=[fila.Q * 1000], y=[fila.carga],
+            mode='markers',
+            marker=dict(size=11, color=color, line=dict(color='#f8fafc', width=2)),
+            name=f'T{fila.tramo} operación',
+            legendgroup=f'T{fila.tramo}',
+            showlegend=False,
+            hovertemplate=(
+                f'<b>Operación T{fila.tramo}</b><br>'
+                f'Q: {fila.Q * 1000:.2f} L/s<br>H: {fila.carga:.2f} m<br>'
+                f'η: {fila.eficiencia:.0%}<extra></extra>'
+            ),
+        ), row=1, col=1)
+    
+    for col in (1, 2):
+        fig.add_vline(
+            x=Q * 1000, line=dict(color='#94a3b8', width=1, dash='dot'),
+            row=1, col=col,
+        )
+    
+    fig.update_layout(
+        title='<b>Curvas del Sistema H(Q)</b><br>'
+              '<span style="font-size:12px; color:#94a3b8">'
+              'Continua = sistema | Discontinua = bomba de diseño | Punto = operación real'
+              '</span>',
+        template='plotly_dark',
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        height=500,
+        font=dict(family='Inter, system-ui, sans-serif', size=14, color='#f1f5f9'),
+        hoverlabel=dict(bgcolor="#1e293b", font_size=14),
+        legend=dict(orientation='h', y=-0.2),
+    )
+    fig.update_xaxes(title_text='Caudal (L/s)', gridcolor='#334155')
+    fig.update_yaxes(title_text='Carga por estación (m)', gridcolor='#334155', col=1)
+    fig.update_yaxes(gridcolor='#334155', col=2)
+    
+    return fig
@@ -0,0 +1,142 @@
+"""
+recursos.py — Recursos web de terceros (Three.js, fuente Inter) servidos localmente.
+
+Los archivos se guardan versionados en static/vendor/ y Streamlit los
+sirve en app/static/vendor/... (server.enableStaticServing en
+.streamlit/config.toml). Como la versión forma parte de la ruta, cada URL
+es inmutable y puede cachearse indefinidamente.
+
+Se descargan una sola vez con:
+    python tools/vendorizar_recursos.py
+
+static/vendor/ no se versiona en git: hay que ejecutar ese paso en cada
+instalación que deba funcionar sin conexión. Si un archivo no está
+vendorizado se usa la URL pública de origen, de modo que la app sigue
+funcionando con conexión, y aviso_recursos_cdn() da el texto del aviso
+que la app muestra mientras tanto.
+"""
+
+from pathlib import Path
+
+# Directorio que Streamlit expone como app/static/
+DIR_STATIC = Path(__file__).resolve().parent.parent / 'static'
+
+# Prefijo URL de los archivos de DIR_STATIC. Es relativo a la página de la
+# app (respeta server.baseUrlPath) y también resuelve dentro de los iframes
+# srcdoc de components.html, que heredan la URL base de la página.
+URL_STATIC = 'app/static'
+
+# Mismo prefijo visto desde un componente propio de Streamlit, que se sirve
+# en component/<nombre>/index.html (dos niveles por debajo de la raíz).
+URL_STATIC_COMPONENTE = '../../app/static'
+
+VERSION_THREE = '0.128.0'    # r128
+VERSION_INTER = '5.0.8'      # @fontsource/inter
+
+# nombre → ruta dentro de static/ y URL pública de origen
+RECURSOS = {
+    'three': {
+        'ruta': f'vendor/three@{VERSION_THREE}/three.min.js',
+        'origen': 'https://cdnjs.cloudflare.com/ajax/libs/three.js/r128/three.min.js',
+    },
+    **{
+        f'inter-{peso}': {
+            'ruta': f'vendor/inter@{VERSION_INTER}/inter-latin-{peso}-normal.woff2',
+            'origen': (
+                f'https://cdn.jsdelivr.net/npm/@fontsource/inter@{VERSION_INTER}'
+                f'/files/inter-latin-{peso}-normal.woff2'
+            ),
+        }
+        for peso in (300, 400, 500, 600, 700, 800)
+    },
+}
+
+# Hoja de estilos de Google Fonts usada si no hay fuentes locales
+_URL_GOOGLE_FONTS = (
+    'https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700;800&display=swap'
+)
+
+
+def ruta_local(nombre: str) -> Path:
+    """Ruta del recurso vendorizado en el disco."""
+    return DIR_STATIC / RECURSOS[nombre]['ruta']
+
+
+def recurso_disponible(nombre: str) -> bool:
+    """True si el recurso está vendorizado en static/."""
+    return ruta_local(nombre).is_file()
+
+
+def recursos_faltantes() -> list[str]:
+    """Nombres de los recursos sin copia local (se cargan desde su CDN)."""
+    return [nombre for nombre in RECURSOS if not recurso_disponible(nombre)]
+
+
+def aviso_recursos_cdn() -> str | None:
+    """
+    Aviso para la interfaz si algún recurso se carga desde Internet,
+    o None si todos están vendorizados.
+    """
+    faltantes = recursos_faltantes()
+    if not faltantes:
+        return None
+    partes = []
+    if 'three' in faltantes:
+        partes.append(f'Three.js {VERSION_THREE}')
+    if any(nombre.startswith('inter-') for nombre in faltantes):
+        partes.append('la fuente Inter')
+    return (
+        f"Sin copia local de {' ni '.join(partes)}: se cargan desde CDN, "
+        "así que sin conexión el modelo 3D no se dibuja y la fuente cambia. "
+        "Para el modo sin conexión ejecute `python tools/vendorizar_recursos.py`."
+    )
+
+
+def url_recurso(nombre: str, base: str = URL_STATIC) -> str:
+    """URL local del recurso si está vendorizado; si no, la URL de origen."""
+    if recurso_disponible(nombre):
+        return f"{base}/{RECURSOS[nombre]['ruta']}"
+    return RECURSOS[nombre]['origen']
+
+
+def urls_three(base: str = URL_STATIC) -> list[str]:
+    """URLs de Three.js en orden de preferencia (local y, después, origen)."""
+    url = url_recurso('three', base)
+    origen = RECURSOS['three']['origen']
+    return [url] if url == origen else [url, origen]
+
+
+def html_script_three() -> str:
+    """
+    Etiquetas <script> que cargan Three.js.
+
+    Con la copia local, si la carga falla (p. ej. static serving
+    desactivado) se recurre a la URL de origen antes de seguir parseando.
+    """
+    url = url_recurso('three')
+    origen = RECURSOS['three']['origen']
+    if url == origen:
+        return f'<script src="{origen}"></script>'
+    return (
+        f'<script src="{url}"></script>\n'
+        f'<script>window.THREE || document.write(\'<script src="{origen}"><\\/script>\')</script>'
+    )
+
+
+def css_fuente_inter(
+    pesos: tuple[int, ...] = (300, 400, 500, 600, 700, 800),
+    base: str = URL_STATIC,
+) -> str:
+    """
+    Reglas CSS de la fuente Inter: @font-face locales si están vendorizadas,
+    si no, la hoja de Google Fonts.
+    """
+    locales = [p for p in pesos if recurso_disponible(f'inter-{p}')]
+    if not locales:
+        return f"@import url('{_URL_GOOGLE_FONTS}');"
+    return '\n'.join(
+        "@font-face { font-family: 'Inter'; font-style: normal; "
+        f"font-weight: {p}; font-display: swap; "
+        f"src: url('{url_recurso(f'inter-{p}', base)}') format('woff2'); }}"
+        for p in locales
+    )